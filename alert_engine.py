@@ -0,0 +1,318 @@
+import asyncio
+import json
+from bisect import bisect_right
+from collections import namedtuple
+
+import aiohttp
+
+from config.app_config import DEFAULT_SYMBOL, parse_span
+from metrics import REGISTRY
+from rolling_stats import RollingWindow
+from utils import codec
+from utils.logger import setup_logger
+
+THRESHOLD = 'threshold'
+MOVE = 'move'
+ZSCORE = 'zscore'
+RULE_KINDS = {THRESHOLD: 'price', MOVE: 'pct', ZSCORE: 'z'}
+
+UP = 'up'
+DOWN = 'down'
+BOTH = 'both'
+DIRECTIONS = (UP, DOWN, BOTH)
+
+AlertRule = namedtuple('AlertRule', ['name', 'kind', 'symbol', 'level', 'window', 'direction'])
+Alert = namedtuple('Alert', ['rule', 'symbol', 'timestamp', 'price', 'value', 'message'])
+
+
+def _span_text(seconds):
+    """Formats a window the way it is configured, e.g. 900 -> '15m'."""
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds % size == 0:
+            return f"{seconds / size:g}{unit}"
+    return f"{seconds:g}s"
+
+
+def parse_rule(spec):
+    """Builds an AlertRule from a dict such as ``{"type": "move", "symbol": "BTC-USD", "pct": 2, "window": "15m"}``.
+
+    ``threshold`` rules take ``price``, ``move`` rules ``pct`` and ``zscore``
+    rules ``z``; ``direction`` is ``up``, ``down`` or ``both`` (default ``up``
+    for thresholds, ``both`` otherwise) and ``window`` a span such as ``15m``.
+    """
+    kind = spec.get('type')
+    if kind not in RULE_KINDS:
+        raise ValueError(f"Unknown alert rule type '{kind}', expected one of {sorted(RULE_KINDS)}")
+    level = float(spec[RULE_KINDS[kind]])
+    direction = spec.get('direction', UP if kind == THRESHOLD else BOTH)
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown alert direction '{direction}', expected one of {DIRECTIONS}")
+    window = None
+    if kind != THRESHOLD:
+        window = parse_span(spec.get('window', '1h'))
+        if level <= 0:
+            raise ValueError(f"Alert rule {spec} needs a positive {RULE_KINDS[kind]}")
+    symbol = spec.get('symbol', DEFAULT_SYMBOL).upper()
+    name = spec.get('name') or f"{symbol} {kind} {direction} {level:g}" + (
+        f" in {_span_text(window)}" if window else "")
+    return AlertRule(name, kind, symbol, level, window, direction)
+
+
+def load_rules(filepath):
+    """Reads a JSON list of rule specs (or ``{"rules": [...]}``) from ``filepath``."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    specs = document['rules'] if isinstance(document, dict) else document
+    rules = [parse_rule(spec) for spec in specs]
+    names = [rule.name for rule in rules]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate alert rule names: {', '.join(duplicates)}")
+    return rules
+
+
+class _Ladder:
+    """Rules sorted by level; reports the rules a metric rises through between two samples.
+
+    A rule fires when the metric goes from below its level to at or above
+    it, so finding the fired rules is a binary search plus the length of the
+    result however many rules are registered. A rule re-arms once the metric
+    falls back below its level.
+    """
+
+    def __init__(self, start=None):
+        self.levels = []
+        self.rules = []
+        self.start = start
+        self.last = start
+
+    def add(self, level, rule):
+        index = bisect_right(self.levels, level)
+        self.levels.insert(index, level)
+        self.rules.insert(index, rule)
+
+    def __bool__(self):
+        return bool(self.levels)
+
+    def crossed(self, value):
+        last, self.last = self.last, (self.start if value is None else value)
+        if value is None or last is None or value <= last:
+            return []
+        return self.rules[bisect_right(self.levels, last):bisect_right(self.levels, value)]
+
+
+class _WindowRules:
+    """Move and z-score rules of one symbol sharing one rolling window."""
+
+    def __init__(self, span):
+        self.window = RollingWindow(span)
+        self.move_up, self.move_down = _Ladder(0.0), _Ladder(0.0)
+        self.z_up, self.z_down = _Ladder(0.0), _Ladder(0.0)
+
+
+class AlertEngine:
+    """Evaluates price threshold, percent-move and z-score rules on every sample.
+
+    Rules are indexed per symbol in sorted ladders (price levels, move
+    percentages, z-scores per window), so each sample costs a rolling-window
+    update per distinct window and a binary search per ladder, independent of
+    the number of rules. Rules fire on crossings rather than while a
+    condition holds, and a rule that fired stays quiet for ``cooldown``
+    seconds of sample time.
+
+    ``zscore`` compares a sample with the mean and standard deviation of the
+    window before it, once the window holds ``min_samples`` samples.
+    """
+
+    def __init__(self, rules=(), cooldown=900.0, min_samples=30):
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.rule_count = 0
+        self._price_up = {}
+        self._price_down = {}
+        self._windows = {}
+        self._last_fired = {}
+        self.logger = setup_logger(__name__)
+        for rule in rules:
+            self.add_rule(rule)
+
+    def add_rule(self, rule):
+        directions = (UP, DOWN) if rule.direction == BOTH else (rule.direction,)
+        for direction in directions:
+            if rule.kind == THRESHOLD:
+                # Falling through a level is the negated price rising through the negated level
+                ladders = self._price_up if direction == UP else self._price_down
+                ladders.setdefault(rule.symbol, _Ladder()).add(rule.level if direction == UP else -rule.level, rule)
+                continue
+            windows = self._windows.setdefault(rule.symbol, {})
+            group = windows.get(rule.window)
+            if group is None:
+                group = windows[rule.window] = _WindowRules(rule.window)
+            if rule.kind == MOVE:
+                (group.move_up if direction == UP else group.move_down).add(rule.level, rule)
+            else:
+                (group.z_up if direction == UP else group.z_down).add(rule.level, rule)
+        self.rule_count += 1
+
+    def evaluate(self, symbol, timestamp, price):
+        """Feeds one sample and returns the Alerts it triggered; samples must arrive in time order."""
+        with REGISTRY.timer('alert_eval_seconds', 'Time to evaluate every alert rule on one sample'):
+            fired = []
+            ladder = self._price_up.get(symbol)
+            if ladder:
+                fired += [(rule, price, UP) for rule in ladder.crossed(price)]
+            ladder = self._price_down.get(symbol)
+            if ladder:
+                fired += [(rule, price, DOWN) for rule in ladder.crossed(-price)]
+            for group in self._windows.get(symbol, {}).values():
+                fired += self._evaluate_window(group, timestamp, price)
+            return [alert for alert in (self._alert(symbol, timestamp, price, *item) for item in fired) if alert]
+
+    def _evaluate_window(self, group, timestamp, price):
+        window = group.window
+        fired = []
+        if group.z_up or group.z_down:
+            z = None
+            if window.count >= self.min_samples and window.stddev:
+                z = (price - window.mean) / window.stddev
+            fired += [(rule, z, UP) for rule in group.z_up.crossed(z)]
+            fired += [(rule, -z, DOWN) for rule in group.z_down.crossed(None if z is None else -z)]
+        window.add(timestamp, price)
+        if group.move_up:
+            rise = (price - window.min) / window.min * 100
+            fired += [(rule, rise, UP) for rule in group.move_up.crossed(rise)]
+        if group.move_down:
+            drop = (window.max - price) / window.max * 100
+            fired += [(rule, drop, DOWN) for rule in group.move_down.crossed(drop)]
+        return fired
+
+    def _alert(self, symbol, timestamp, price, rule, value, direction):
+        last = self._last_fired.get(rule.name)
+        if last is not None and timestamp - last < self.cooldown:
+            REGISTRY.counter('alerts_suppressed_total', 'Alerts dropped by the per-rule cooldown').inc()
+            return None
+        self._last_fired[rule.name] = timestamp
+        REGISTRY.counter('alerts_total', 'Alerts fired by rule type', kind=rule.kind).inc()
+        if rule.kind == THRESHOLD:
+            message = f"{symbol} {'rose above' if direction == UP else 'fell below'} {rule.level:,.2f} " \
+                      f"(now {price:,.2f})"
+        elif rule.kind == MOVE:
+            message = f"{symbol} {'rose' if direction == UP else 'fell'} {value:.2f}% within " \
+                      f"{_span_text(rule.window)} (now {price:,.2f})"
+        else:
+            message = f"{symbol} price is {value:.1f} standard deviations {'above' if direction == UP else 'below'} " \
+                      f"its {_span_text(rule.window)} mean (now {price:,.2f})"
+        self.logger.warning(f"Alert [{rule.name}]: {message}")
+        return Alert(rule.name, symbol, timestamp, price, value, message)
+
+
+class EmailAlertChannel:
+    """Delivers alerts through the pooled ``EmailSender``."""
+
+    name = 'email'
+
+    def __init__(self, email_sender, recipients):
+        self.email_sender = email_sender
+        self.recipients = recipients
+
+    async def send(self, alerts):
+        if len(alerts) == 1:
+            subject = f"Price alert: {alerts[0].message}"
+        else:
+            subject = f"Price alerts: {len(alerts)} rules fired"
+        body = "\n".join(f"[{alert.rule}] {alert.message}" for alert in alerts)
+        results = await self.email_sender.send_alert_email(self.recipients, subject, body)
+        return all(results.values())
+
+
+class WebhookAlertChannel:
+    """POSTs alerts as ``{"alerts": [...]}`` JSON to a webhook URL."""
+
+    name = 'webhook'
+
+    def __init__(self, url, timeout=10.0):
+        self.url = url
+        self.timeout = timeout
+        self._session = None
+
+    async def send(self, alerts):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        payload = codec.dumps({'alerts': [alert._asdict() for alert in alerts]})
+        async with self._session.post(self.url, data=payload,
+                                      headers={'Content-Type': 'application/json'}) as response:
+            response.raise_for_status()
+        return True
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+class AlertDispatcher:
+    """Delivers alerts in the background without holding up sample collection.
+
+    ``submit`` only queues. A worker task sends the alerts to every channel,
+    at most ``max_per_minute`` deliveries per minute; alerts that arrive while
+    the limit holds are sent together in the next delivery instead of being
+    dropped. ``close`` delivers whatever is still queued without waiting for
+    the limit.
+    """
+
+    def __init__(self, channels, max_per_minute=6):
+        self.channels = list(channels)
+        self.min_interval = 60.0 / max_per_minute if max_per_minute else 0.0
+        self._queue = asyncio.Queue()
+        self._closing = asyncio.Event()
+        self._worker = None
+        self.logger = setup_logger(__name__)
+
+    def submit(self, alerts):
+        for alert in alerts:
+            self._queue.put_nowait(alert)
+
+    async def start(self):
+        if self._worker is None:
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_delivery = loop.time()
+        while True:
+            alerts = [await self._queue.get()]
+            delay = next_delivery - loop.time()
+            if delay > 0 and not self._closing.is_set():
+                try:
+                    await asyncio.wait_for(self._closing.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            while not self._queue.empty():
+                alerts.append(self._queue.get_nowait())
+            # None is the shutdown marker queued by close()
+            closing = None in alerts
+            alerts = [alert for alert in alerts if alert is not None]
+            next_delivery = loop.time() + self.min_interval
+            if alerts:
+                await self._deliver(alerts)
+            if closing:
+                return
+
+    async def _deliver(self, alerts):
+        results = await asyncio.gather(*(channel.send(alerts) for channel in self.channels), return_exceptions=True)
+        for channel, result in zip(self.channels, results):
+            ok = result is True
+            REGISTRY.counter('alert_deliveries_total', 'Alert deliveries by channel and outcome',
+                             channel=channel.name, outcome='sent' if ok else 'failed').inc()
+            if not ok:
+                self.logger.error(f"Could not deliver {len(alerts)} alert(s) via {channel.name}: {result}")
+
+    async def close(self):
+        """Delivers the alerts still queued, ignoring the rate limit, then stops the worker."""
+        if self._worker is not None:
+            self._closing.set()
+            self._queue.put_nowait(None)
+            await self._worker
+            self._worker = None
+        for channel in self.channels:
+            if hasattr(channel, 'close'):
+                await channel.close()
@@ -1,32 +1,353 @@
 import asyncio
-from typing import Optional
+import statistics
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
 import aiohttp
+from config.app_config import DEFAULT_SYMBOL
+from metrics import REGISTRY
+from price_sources import PriceSource
+from resilience import CircuitBreaker, RetryPolicy
+from response_cache import ResponseCache
 from utils.logger import setup_logger
 
+FASTEST = 'fastest'
+MEDIAN = 'median'
+AGGREGATION_MODES = (FASTEST, MEDIAN)
+
 
 class APIHandler:
-    """Handles fetching data from the Coinbase API asynchronously."""
+    """Handles fetching data from the Coinbase API asynchronously.
+
+    ``url`` may contain a ``{symbol}`` placeholder (e.g.
+    ``https://api.coinbase.com/v2/prices/{symbol}/spot``) so one handler can
+    fetch many currency pairs concurrently; a URL without the placeholder is
+    treated as a fixed single-pair endpoint.
+
+    The handler owns a long-lived ``aiohttp.ClientSession`` so consecutive polls
+    reuse pooled keep-alive connections and cached DNS lookups instead of paying
+    for a new TCP/TLS handshake on every request. Use it as an async context
+    manager (or call ``close()``) to release the pool at shutdown.
+
+    Transient failures (connection errors, timeouts, 429 and 5xx responses) are
+    retried with jittered exponential backoff as long as the next attempt fits
+    in the fetch budget. A circuit breaker per host stops requests to an
+    endpoint that keeps failing, and with ``hedge_percentile`` set a second
+    request is fired when the first is slower than that latency percentile.
 
-    def __init__(self, url, timeout=10):
+    ``sources`` turns the handler into a registry of exchanges (see
+    ``price_sources``); each tick then queries all of them concurrently and
+    either returns the first valid price (``fastest``) or the median of the
+    prices received before ``source_deadline`` (``median``). Without
+    ``sources`` the handler queries ``url`` with the Coinbase parser.
+
+    Prices are served through a ``ResponseCache``: concurrent callers asking
+    for the same pair share one in-flight fetch, a price younger than
+    ``cache_ttl`` (or the caller's ``max_staleness``) is returned without a
+    request, and sources that send ``ETag``/``Last-Modified`` are polled with
+    conditional requests.
+    """
+
+    def __init__(self, url, timeout=10, pool_size=10, max_per_host=4, keepalive_timeout=75, dns_cache_ttl=300,
+                 retry_policy=None, fetch_budget=30.0, breaker_threshold=5, breaker_reset_timeout=30.0,
+                 hedge_percentile=None, sources: Optional[List[PriceSource]] = None, aggregation=FASTEST,
+                 source_deadline=5.0, min_sources=1, cache_ttl=0.0):
+        if aggregation not in AGGREGATION_MODES:
+            raise ValueError(f"Unknown aggregation mode '{aggregation}', expected one of {AGGREGATION_MODES}")
         self.url = url
+        self.sources = sources or [PriceSource('coinbase', url)]
+        self.aggregation = aggregation
+        self.source_deadline = source_deadline
+        self.min_sources = min_sources
         self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_per_host = max_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.fetch_budget = fetch_budget
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedges_sent = 0
+        self.cache = ResponseCache(cache_ttl)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
         self.logger = setup_logger(__name__)
 
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """Create the pooled client session if it is not already open."""
+        self._get_session()
+
+    async def close(self):
+        """Close the client session and its connection pool."""
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+            self.logger.info("API client session closed")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it lazily on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.max_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self.logger.info(f"Opened API client session (pool size {self.pool_size})")
+        return self._session
+
+    def url_for(self, symbol: str) -> str:
+        """Return the primary source's endpoint URL for the given currency pair."""
+        return self.sources[0].url_for(symbol)
+
+    def source_stats(self) -> Dict[str, dict]:
+        """Return request, error, win and latency counters of every source."""
+        return {source.name: source.stats.snapshot() for source in self.sources}
+
     async def get_bitcoin_price(self) -> Optional[float]:
         """Asynchronously fetch the current Bitcoin price."""
         self.logger.info("Fetching Bitcoin price from API")
+        return await self.get_price(DEFAULT_SYMBOL)
+
+    async def get_prices(self, symbols: Iterable[str],
+                         max_staleness: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """Fetch all symbols concurrently and return a batch keyed by symbol.
+
+        Failed symbols map to ``None``. Concurrency towards each host is bounded
+        by the connector's ``limit_per_host``.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(*(self.get_price(symbol, max_staleness=max_staleness) for symbol in symbols),
+                                       return_exceptions=True)
+        prices = {}
+        # One symbol failing unexpectedly must not cost the other symbols their prices
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, BaseException):
+                self.logger.error(f"Error fetching {symbol} price: {type(result).__name__}: {result}")
+                result = None
+            prices[symbol] = result
+        return prices
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        """Return the circuit breaker guarding the host of ``url``."""
+        host = urlsplit(url).netloc
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                host, self.breaker_threshold, self.breaker_reset_timeout
+            )
+        return breaker
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Return the price cache's hit, miss, coalesced and not-modified counts."""
+        return dict(self.cache.stats)
+
+    async def get_price(self, symbol: str, budget: Optional[float] = None,
+                        max_staleness: Optional[float] = None) -> Optional[float]:
+        """Asynchronously fetch the current spot price of one currency pair.
+
+        With several sources the result is the fastest valid price or the
+        median of the sources, depending on ``aggregation``. A cached price up
+        to ``max_staleness`` seconds old (default ``cache_ttl``) is returned
+        without a request.
+        """
+        return await self.cache.get(symbol, lambda: self._fetch_price(symbol, budget), max_staleness)
+
+    async def _fetch_price(self, symbol: str, budget: Optional[float]) -> Optional[float]:
+        if len(self.sources) == 1:
+            return await self._fetch_from(self.sources[0], symbol, budget)
+        if self.aggregation == FASTEST:
+            return await self._first_valid(symbol, budget)
+        return await self._median(symbol, budget)
+
+    async def _first_valid(self, symbol: str, budget: Optional[float]) -> Optional[float]:
+        """Query all sources concurrently and return the first valid price."""
+        tasks = {asyncio.ensure_future(self._fetch_from(source, symbol, budget)): source for source in self.sources}
+        pending = set(tasks)
         try:
-            # aiohttp uses a client session
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                async with session.get(self.url) as response:
-                    response.raise_for_status()
-                    data = await response.json()
-                    price = float(data['data']['amount'])
-                    self.logger.info(f"Successfully fetched Bitcoin price: ${price:,.2f}")
-                    return price
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            self.logger.error(f"Error fetching Bitcoin price: {e}")
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    price = task.result()
+                    if price is not None:
+                        tasks[task].stats.wins += 1
+                        self.logger.debug("%s: %s answered first", symbol, tasks[task].name)
+                        return price
+            self.logger.error(f"No source returned a valid {symbol} price")
             return None
-        except (KeyError, ValueError) as e:
-            self.logger.error(f"Error parsing API response: {e}")
+        finally:
+            # The losers record their cancelled attempts themselves
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _median(self, symbol: str, budget: Optional[float]) -> Optional[float]:
+        """Query all sources concurrently and return the median of the prices received before the deadline."""
+        deadline = min(self.source_deadline, budget or self.fetch_budget)
+        tasks = {asyncio.ensure_future(self._fetch_from(source, symbol, deadline)): source
+                 for source in self.sources}
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        # Sources still busy record their cancelled attempts themselves
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        prices = {}
+        for task in done:
+            if task.result() is not None:
+                prices[tasks[task].name] = task.result()
+                tasks[task].stats.wins += 1
+        if len(prices) < self.min_sources:
+            self.logger.error(
+                f"Only {len(prices)} of {len(self.sources)} sources returned a {symbol} price "
+                f"within {deadline:.2f}s (need {self.min_sources})"
+            )
             return None
+        price = statistics.median(prices.values())
+        self.logger.debug("%s: median %.2f of %s", symbol, price, prices)
+        return price
+
+    async def _fetch_from(self, source: PriceSource, symbol: str, budget: Optional[float] = None) -> Optional[float]:
+        """Fetch one pair from one source, retrying transient failures within ``budget`` seconds.
+
+        Latency and outcome of every attempt are recorded in ``source.stats``.
+        """
+        url = source.url_for(symbol)
+        breaker = self.breaker_for(url)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (budget or self.fetch_budget)
+        attempt = 0
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                self._count_fetch(source, 'circuit_open')
+                self.logger.warning(f"Circuit open for {breaker.name}; skipping {symbol} fetch")
+                return None
+            started = loop.time()
+            settled = False
+            try:
+                price = await self._fetch(source, url, min(self.timeout, deadline - loop.time()))
+            except asyncio.CancelledError:
+                # Cancelled by the aggregation (lost the race or missed the median deadline) or with the tick.
+                # The attempt is recorded here, once, so it can never also be counted as its own timeout;
+                # it says nothing about the endpoint, so the breaker is only released (below)
+                source.stats.record(loop.time() - started, ok=False)
+                self._count_fetch(source, 'cancelled')
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                source.stats.record(loop.time() - started, ok=False)
+                breaker.record_failure()
+                settled = True
+                self._count_fetch(source, 'error')
+                delay = self.retry_policy.backoff(attempt)
+                if (not self._is_retriable(e) or attempt >= self.retry_policy.max_attempts
+                        or loop.time() + delay >= deadline):
+                    self.logger.error(
+                        f"Error fetching {symbol} price from {source.name} after {attempt} attempt(s): "
+                        f"{e or type(e).__name__}"
+                    )
+                    return None
+                self.logger.warning(
+                    f"Attempt {attempt} to fetch {symbol} from {source.name} failed ({e or type(e).__name__}); "
+                    f"retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            except Exception as e:
+                # Decoding raises KeyError/ValueError; anything else from the response counts the same way
+                source.stats.record(loop.time() - started, ok=False)
+                breaker.record_failure()
+                settled = True
+                self._count_fetch(source, 'parse_error')
+                self.logger.error(f"Error parsing API response: {e}")
+                return None
+            else:
+                source.stats.record(loop.time() - started, ok=True)
+                breaker.record_success()
+                settled = True
+                self._count_fetch(source, 'ok')
+                self.logger.info("Successfully fetched %s price from %s: %.2f", symbol, source.name, price)
+                return price
+            finally:
+                # An attempt that ended without an outcome must not keep a half-open trial taken
+                if not settled:
+                    breaker.release()
+
+    @staticmethod
+    def _count_fetch(source: PriceSource, outcome: str):
+        REGISTRY.counter('price_fetch_attempts_total', 'Price fetch attempts by outcome',
+                         source=source.name, outcome=outcome).inc()
+
+    @staticmethod
+    def _is_retriable(error) -> bool:
+        """Timeouts, connection errors, 429 and 5xx are transient; other HTTP errors are not."""
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status == 429 or error.status >= 500
+        return True
+
+    async def _fetch(self, source: PriceSource, url: str, timeout: float) -> float:
+        """Send one request, hedged with a second one when hedging is enabled and warmed up."""
+        hedge_delay = source.latency.percentile(self.hedge_percentile) if self.hedge_percentile else None
+        if hedge_delay is None or hedge_delay >= timeout:
+            return await self._request(source, url, timeout)
+        return await self._hedged_request(source, url, timeout, hedge_delay)
+
+    async def _hedged_request(self, source: PriceSource, url: str, timeout: float, hedge_delay: float) -> float:
+        """Return the first successful of a primary and a delayed hedge request."""
+        primary = asyncio.ensure_future(self._request(source, url, timeout))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                return primary.result()
+
+            self.hedges_sent += 1
+            REGISTRY.counter('price_fetch_hedges_total', 'Hedged requests sent', source=source.name).inc()
+            self.logger.debug("No response from %s after %.0f ms; sending hedged request",
+                              source.name, hedge_delay * 1000)
+            pending.add(asyncio.ensure_future(self._request(source, url, timeout - hedge_delay)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return primary.result()
+        finally:
+            # Also when this request is cancelled: the losers must give their pooled connections back
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _request(self, source: PriceSource, url: str, timeout: float) -> float:
+        """Send a single (conditional, if validators are known) GET request and parse the spot price."""
+        session = self._get_session()
+        started = asyncio.get_running_loop().time()
+        async with session.get(url, headers=self.cache.conditional_headers(url),
+                               timeout=aiohttp.ClientTimeout(total=max(timeout, 0.001))) as response:
+            response.raise_for_status()
+            if response.status == 304:
+                source.latency.record(asyncio.get_running_loop().time() - started)
+                return self.cache.not_modified(url)
+            body = await response.read()
+            latency = asyncio.get_running_loop().time() - started
+            source.latency.record(latency)
+            REGISTRY.histogram('price_fetch_seconds', 'Round trip of one price request, including the body read',
+                               source=source.name).record(latency)
+            with REGISTRY.timer('price_parse_seconds', 'Time to decode the price from a raw response body',
+                                source=source.name):
+                price = source.decode(body)
+            if response.status == 200:
+                self.cache.store_validators(url, response.headers, price)
+            return price
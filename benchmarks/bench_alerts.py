@@ -0,0 +1,78 @@
+"""Alert evaluation cost per sample as the number of rules grows: sorted ladders vs. scanning every rule.
+
+Usage:
+    python -m benchmarks.bench_alerts [--rules 10 1000 10000] [--samples 20000]
+
+Each rule set mixes price thresholds (both directions) with percent-move and
+z-score rules over three shared windows. The baseline checks every threshold
+rule against the previous and current price on each sample, which is what a
+plain list of rules costs. Samples are one second apart and rules keep the
+default 15 minute cooldown.
+"""
+import argparse
+import random
+import time
+
+from alert_engine import BOTH, DOWN, MOVE, THRESHOLD, UP, ZSCORE, AlertEngine, AlertRule
+from utils.logger import configure_logging
+
+START = 1_750_000_000.0
+WINDOWS = (300.0, 900.0, 3600.0)
+
+
+def _rules(count, rng):
+    rules = []
+    for i in range(count):
+        kind = rng.choices((THRESHOLD, MOVE, ZSCORE), weights=(8, 1, 1))[0]
+        if kind == THRESHOLD:
+            rules.append(AlertRule(f"r{i}", kind, 'BTC-USD', rng.uniform(95_000, 105_000), None, rng.choice((UP, DOWN))))
+        else:
+            level = rng.uniform(1, 5) if kind == MOVE else rng.uniform(3, 6)
+            rules.append(AlertRule(f"r{i}", kind, 'BTC-USD', level, rng.choice(WINDOWS), BOTH))
+    return rules
+
+
+def _prices(samples, rng):
+    price, prices = 100_000.0, []
+    for _ in range(samples):
+        price += rng.gauss(0, 25)
+        prices.append(price)
+    return prices
+
+
+def _scan(rules, prices):
+    thresholds = [rule for rule in rules if rule.kind == THRESHOLD]
+    fired = 0
+    for previous, price in zip(prices, prices[1:]):
+        for rule in thresholds:
+            if rule.direction == UP and previous < rule.level <= price or \
+                    rule.direction == DOWN and price <= rule.level < previous:
+                fired += 1
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--samples', type=int, default=20_000)
+    args = parser.parse_args()
+    configure_logging(level='ERROR', console=False)
+    rng = random.Random(3)
+    prices = _prices(args.samples, rng)
+
+    for count in args.rules:
+        rules = _rules(count, rng)
+        engine = AlertEngine(rules)
+        start = time.perf_counter()
+        fired = sum(len(engine.evaluate('BTC-USD', START + i, price)) for i, price in enumerate(prices))
+        engine_us = (time.perf_counter() - start) / len(prices) * 1e6
+
+        start = time.perf_counter()
+        _scan(rules, prices)
+        scan_us = (time.perf_counter() - start) / len(prices) * 1e6
+        print(f"{count:>7} rules: ladders {engine_us:8.2f} us/sample ({fired} alerts)   "
+              f"scan of thresholds only {scan_us:10.2f} us/sample")
+
+
+if __name__ == '__main__':
+    main()
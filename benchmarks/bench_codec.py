@@ -0,0 +1,86 @@
+"""Decode/encode throughput of the JSON codecs on recorded exchange payloads.
+
+Usage:
+    python -m benchmarks.bench_codec [--iterations 200000]
+
+Compares, per payload, the former path (stdlib ``json.loads`` + dict parser)
+with every installed codec's generic decode, and with the one-step typed
+decoder ``PriceSource.decode`` uses; then NDJSON record encoding, where the
+baseline is ``json.dumps`` with compact separators. Codecs that are not
+installed (``orjson``, ``msgspec``) are skipped.
+"""
+import argparse
+import json
+import time
+
+from price_sources import PARSERS, QUOTE_PATHS
+from stream_ingestion import parse_coinbase_ticker
+from utils import codec
+
+# Responses recorded from the public REST endpoints and the Coinbase ticker channel
+PAYLOADS = {
+    'coinbase': b'{"data":{"amount":"105565.745","base":"BTC","currency":"USD"}}',
+    'binance': b'{"symbol":"BTCUSDT","price":"105600.01000000"}',
+    'bitstamp': (b'{"timestamp": "1750030144", "open": "105220", "high": "106128", "low": "104500", '
+                 b'"last": "105550", "volume": "1423.59866361", "vwap": "105392", "bid": "105549", '
+                 b'"ask": "105551", "side": "0", "open_24": "104987", "percent_change_24": "0.54"}'),
+    'kraken': (b'{"error":[],"result":{"XXBTZUSD":{"a":["105551.00000","1","1.000"],'
+               b'"b":["105550.90000","4","4.000"],"c":["105550.90000","0.00047379"],'
+               b'"v":["1041.95810914","2305.81541187"],"p":["105320.54318","105289.24781"],'
+               b'"t":[30712,62719],"l":["104500.00000","104420.10000"],"h":["106128.00000","106128.00000"],'
+               b'"o":"105220.00000"}}}'),
+}
+TICKER = (b'{"type":"ticker","sequence":104599538563,"product_id":"BTC-USD","price":"105565.74",'
+          b'"open_24h":"104987.01","volume_24h":"9283.11727363","low_24h":"104420.1","high_24h":"106128",'
+          b'"volume_30d":"257832.35406049","best_bid":"105565.73","best_bid_size":"0.00071290",'
+          b'"best_ask":"105565.74","best_ask_size":"0.03651283","side":"buy","time":"2025-06-15T23:29:04.372858Z",'
+          b'"trade_id":812734662,"last_size":"0.00012"}')
+RECORD = {'timestamp': '2025-06-15T23:29:04.372858', 'symbol': 'BTC-USD', 'price': 105565.745}
+
+
+def _rate(function, argument, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function(argument)
+    return iterations / (time.perf_counter() - start)
+
+
+def _report(title, candidates, argument, iterations):
+    print(title)
+    baseline = None
+    for label, function in candidates:
+        rate = _rate(function, argument, iterations)
+        baseline = baseline or rate
+        print(f"  {label:<28} {rate:>12,.0f} ops/s   {rate / baseline:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200_000)
+    args = parser.parse_args()
+    print(f"Preferred codec: {codec.BACKEND}; installed: {', '.join(sorted(codec.CODECS))}\n")
+
+    for name, payload in PAYLOADS.items():
+        parse = PARSERS[name]
+        candidates = [("json.loads + parser (before)", lambda body, parse=parse: parse(json.loads(body)))]
+        candidates += [(f"{c.name}.loads + parser", lambda body, parse=parse, loads=c.loads: parse(loads(body)))
+                       for c in codec.CODECS.values() if c.name != 'json']
+        if name in QUOTE_PATHS and codec.msgspec is not None:
+            decode = codec.path_decoder(QUOTE_PATHS[name])
+            candidates.append(("msgspec typed path decoder", lambda body, decode=decode: float(decode(body))))
+        _report(f"{name} quote ({len(payload)} bytes)", candidates, payload, args.iterations)
+
+    ticker = TICKER.decode()
+    _report(f"coinbase ticker message ({len(TICKER)} bytes)",
+            [(f"{c.name}.loads + parser", lambda body, loads=c.loads: parse_coinbase_ticker(loads(body)))
+             for c in sorted(codec.CODECS.values(), key=lambda c: c.name != 'json')],
+            ticker, args.iterations)
+
+    _report("NDJSON record encode",
+            [("json.dumps (before)", lambda record: json.dumps(record, separators=(',', ':')))]
+            + [(f"{c.name} dumps", c.dumps) for c in codec.CODECS.values() if c.name != 'json'],
+            RECORD, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Time-range query latency of the indexed HistoryStore vs. loading and scanning a price file.
+
+Usage:
+    python -m benchmarks.bench_history [--days 30] [--interval 1] [--queries 200] [--db PATH]
+
+Generates ``--days`` of synthetic samples every ``--interval`` seconds (a year
+of per-second data is ``--days 365``, ~31.5M rows, which takes several minutes
+to load), then times random ``stats`` queries over ranges of one hour, one day
+and the whole history, a one-hour raw ``range`` read and a day of hourly
+candles. The baseline reads a one-day NDJSON file and filters it with NumPy,
+as answering such a question required before the history store.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from history_store import DAY, HOUR, HistoryStore
+from storage_backends import PriceRecord, open_backend, read_records
+from utils.logger import configure_logging
+
+START = 1_750_000_000.0
+
+
+def _records(days, interval):
+    rng = np.random.default_rng(42)
+    chunk = int(DAY / interval)
+    price = 100_000.0
+    for day in range(days):
+        prices = price + np.cumsum(rng.standard_normal(chunk) * 5)
+        price = float(prices[-1])
+        timestamps = START + day * DAY + np.arange(chunk) * interval
+        yield from (PriceRecord(t, 'BTC-USD', p) for t, p in zip(timestamps.tolist(), prices.tolist()))
+
+
+def _time_queries(label, query, spans, count, history_seconds):
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(count):
+        span = min(spans, history_seconds)
+        start = START + rng.uniform(0, history_seconds - span)
+        began = time.perf_counter()
+        query(start, start + span)
+        latencies.append(time.perf_counter() - began)
+    latencies.sort()
+    print(f"{label:<32} median {statistics.median(latencies) * 1000:8.3f} ms   "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--interval', type=float, default=1.0, help="Seconds between samples")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--db', help="Reuse/keep this database instead of a temporary one")
+    args = parser.parse_args()
+    configure_logging(level='WARNING', console=False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(args.db or Path(tmp) / 'history.db')
+        history_seconds = args.days * DAY
+        with HistoryStore(db) as store:
+            if not store.symbols():
+                began = time.perf_counter()
+                count = store.extend(_records(args.days, args.interval))
+                elapsed = time.perf_counter() - began
+                print(f"Loaded {count:,} samples in {elapsed:.1f}s ({count / elapsed:,.0f} samples/s)")
+            print(f"Database size: {db.stat().st_size / 2**20:,.1f} MiB\n")
+
+            _time_queries("stats, 1 hour range", lambda a, b: store.stats('BTC-USD', a, b),
+                          HOUR, args.queries, history_seconds)
+            _time_queries("stats, 1 day range", lambda a, b: store.stats('BTC-USD', a, b),
+                          DAY, args.queries, history_seconds)
+            _time_queries("stats, whole history", lambda a, b: store.stats('BTC-USD', a - 1, b + 1),
+                          history_seconds, min(args.queries, 20), history_seconds)
+            _time_queries("range, 1 hour of samples", lambda a, b: store.range('BTC-USD', a, b),
+                          HOUR, args.queries, history_seconds)
+            _time_queries("ohlc, 1 day of hourly candles", lambda a, b: store.ohlc('BTC-USD', a, b, HOUR),
+                          DAY, args.queries, history_seconds)
+
+        # Baseline: one day's file, loaded and scanned for a one-hour max
+        day_file = Path(tmp) / 'day.ndjson'
+        backend = open_backend(day_file, 'ndjson', fsync_every=10**9)
+        for record in _records(1, args.interval):
+            backend.append(record)
+        backend.close()
+
+        def scan(start, end):
+            records = list(read_records(day_file))
+            timestamps = np.fromiter((r.timestamp for r in records), np.float64, len(records))
+            prices = np.fromiter((r.price for r in records), np.float64, len(records))
+            return prices[(timestamps >= start) & (timestamps < end)].max()
+
+        _time_queries("baseline: load 1 day file + scan", scan, HOUR, min(args.queries, 5), DAY)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""End-to-end load test: the whole BusinessLogic daemon against a local mock exchange on an accelerated clock.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--hours 24] [--interval 60] [--symbols BTC-USD ETH-USD]
+        [--speedup 5000] [--latency-ms 80] [--jitter 0.5] [--error-rate 0.01] [--report-window 1h]
+        [--render-workers 0] [--replay bitcoin_price_data.json] [--baseline benchmarks/baselines/pipeline.json]
+        [--save-baseline] [--tolerance 0.25]
+
+The mock exchange (``benchmarks/mock_exchange.py``) replays a recorded price
+file with the given virtual latency distribution and error rate. The
+tracker's scheduler and report loop run on an ``AcceleratedClock``, so
+``--hours 24 --speedup 5000`` takes about 17 seconds. Price files are
+written, graphs rendered and report emails sent to a local SMTP sink when
+``aiosmtpd`` is installed (otherwise reports are rendered but not mailed).
+Retry, backoff and circuit-breaker timings, which use the real clock, are
+divided by the speed-up.
+
+Reported figures (lag and latency are converted back to real time, since a
+real millisecond of I/O shows up as ``speedup`` virtual milliseconds):
+    samples_per_second   samples stored per real second
+    tick_lag_p99_ms      scheduled tick time -> tick start (99th percentile)
+    e2e_p99_ms           scheduled tick time -> sample stored (99th percentile)
+    max_rss_mb           process memory high-water mark
+
+With ``--baseline`` the run is compared with the saved results of the same
+scenario and the exit code is 1 if any figure is worse by more than
+``--tolerance``; ``--save-baseline`` stores the run as the new baseline.
+"""
+import argparse
+import asyncio
+import json
+import resource
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.mock_exchange import AcceleratedClock, MockExchange
+from business_logic import BusinessLogic
+from config.app_config import parse_span
+from metrics import REGISTRY, Histogram
+from resilience import RetryPolicy
+from utils.logger import configure_logging
+
+START = 1_750_003_200.0  # an hour boundary
+DEFAULT_BASELINE = Path(__file__).parent / 'baselines' / 'pipeline.json'
+# Figure -> True if higher is better
+FIGURES = {'samples_per_second': True, 'tick_lag_p99_ms': False, 'e2e_p99_ms': False, 'max_rss_mb': False}
+
+
+def _start_smtp_sink():
+    """Starts a local SMTP server that accepts and counts messages; None if aiosmtpd is missing."""
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        return None, None
+
+    class Sink:
+        messages = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            Sink.messages += 1
+            return '250 OK'
+
+    # The controller probes its own port after starting, so it needs a concrete one
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    controller = Controller(Sink(), hostname='127.0.0.1', port=port)
+    controller.start()
+    return controller, Sink
+
+
+def _accelerate(tracker, clock):
+    """Moves the tracker's timing onto the accelerated clock."""
+    speedup = clock.speedup
+    tracker.scheduler.clock, tracker.scheduler.sleep = clock.time, clock.sleep
+    handler = tracker.api_handler
+    policy = handler.retry_policy
+    handler.retry_policy = RetryPolicy(policy.max_attempts, policy.base_delay / speedup, policy.max_delay / speedup)
+    handler.fetch_budget /= speedup
+    handler.source_deadline /= speedup
+    handler.breaker_reset_timeout /= speedup
+
+
+def _scenario(args):
+    return {
+        'hours': args.hours,
+        'interval': args.interval,
+        'symbols': args.symbols,
+        'speedup': args.speedup,
+        'latency_ms': args.latency_ms,
+        'jitter': args.jitter,
+        'error_rate': args.error_rate,
+        'report_window': args.report_window,
+        'render_workers': args.render_workers,
+        'replay': Path(args.replay).name,
+    }
+
+
+async def run_pipeline(args, workdir):
+    clock = AcceleratedClock(args.speedup, START)
+    exchange = MockExchange.from_file(args.replay, clock, latency=args.latency_ms / 1000, jitter=args.jitter,
+                                      error_rate=args.error_rate)
+    url = await exchange.start()
+    smtp, sink = _start_smtp_sink()
+    config = {
+        'api_url': url,
+        'symbols': args.symbols,
+        'json_filepath': str(workdir / 'prices.ndjson'),
+        'graph_filepath': str(workdir / 'graph.png'),
+        'recipient_email': 'bench@example.com',
+        'smtp_server': '127.0.0.1',
+        'smtp_port': smtp.port if smtp else 25,
+        'smtp_security': 'none',
+        'sender_email': 'tracker@example.com',
+        'sender_password': '',
+        'fetch_interval': args.interval,
+        'report_window': parse_span(args.report_window),
+        'render_workers': args.render_workers,
+    }
+    REGISTRY.clear()
+    tracker = BusinessLogic(config)
+    _accelerate(tracker, clock)
+    if smtp is None:
+        async def discard_report(*_, **__):
+            return {}
+        tracker.email_sender.send_report_email = discard_report
+
+    e2e = Histogram()
+    tracker.data_storage.listeners.append(lambda symbol, timestamp, price: e2e.record(clock.time() - timestamp))
+    stop = asyncio.Event()
+
+    async def stop_after(seconds):
+        await clock.sleep(seconds)
+        stop.set()
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(tracker.run_daemon(stop), stop_after(args.hours * 3600))
+    finally:
+        elapsed = time.perf_counter() - started
+        await exchange.close()
+        if smtp:
+            smtp.stop()
+
+    lag = REGISTRY.histogram('tick_lag_seconds')
+    stats = tracker.scheduler.stats
+    real_ms = 1000 / args.speedup
+    return {
+        'samples_per_second': round(e2e.count / elapsed, 1),
+        'tick_lag_p99_ms': round((lag.quantile(0.99) or 0) * real_ms, 3),
+        'e2e_p99_ms': round((e2e.quantile(0.99) or 0) * real_ms, 3),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'details': {
+            'real_seconds': round(elapsed, 2),
+            'samples': e2e.count,
+            'ticks': stats.ticks,
+            'ticks_skipped': stats.skipped,
+            'tick_lag_max_ms': round(stats.max_lag * real_ms, 3),
+            'e2e_p50_ms': round((e2e.quantile(0.5) or 0) * real_ms, 3),
+            'exchange_requests': exchange.requests,
+            'exchange_errors': exchange.errors,
+            'reports_mailed': sink.messages if sink else None,
+        },
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Returns the figures that are worse than ``baseline`` by more than ``tolerance``."""
+    regressions = []
+    for name, higher_is_better in FIGURES.items():
+        old, new = baseline.get(name), results[name]
+        if not old:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{name}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=24.0)
+    parser.add_argument('--interval', type=float, default=60.0, help="Virtual seconds between ticks")
+    parser.add_argument('--symbols', nargs='+', default=['BTC-USD', 'ETH-USD'])
+    parser.add_argument('--speedup', type=float, default=5000.0)
+    parser.add_argument('--latency-ms', type=float, default=80.0, help="Median virtual exchange latency")
+    parser.add_argument('--jitter', type=float, default=0.5, help="Log-normal shape of the latency")
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--report-window', default='1h')
+    parser.add_argument('--render-workers', type=int, default=0)
+    parser.add_argument('--replay', default='bitcoin_price_data.json', help="Recorded price file to replay")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+    configure_logging(level=args.log_level, console=False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(run_pipeline(args, Path(tmp)))
+    scenario = _scenario(args)
+    print(json.dumps({'scenario': scenario, **results}, indent=4))
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    key = json.dumps(scenario, sort_keys=True)
+    if args.save_baseline:
+        baselines[key] = {name: results[name] for name in FIGURES}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baselines, indent=4, sort_keys=True) + '\n')
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if key not in baselines:
+        print(f"No baseline for this scenario in {args.baseline}; run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, baselines[key], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"Within {args.tolerance:.0%} of the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
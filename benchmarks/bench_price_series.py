@@ -0,0 +1,74 @@
+"""Memory and throughput of PriceSeries vs. the former list-of-dicts storage.
+
+Usage:
+    python -m benchmarks.bench_price_series [--sizes 1000000 10000000] [--baseline-limit 1000000]
+
+The list-of-dicts baseline needs several GB at 10M samples, so by default it is
+only measured up to ``--baseline-limit`` samples.
+"""
+import argparse
+import datetime as dt
+import gc
+import time
+import tracemalloc
+
+from price_series import PriceSeries
+
+START = 1_750_000_000.0
+
+
+def _measure(label, n, build, query):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = build(n)
+    append_s = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    query(store)
+    query_s = time.perf_counter() - start
+    print(f"{label:<14} n={n:>11,}  append {n / append_s / 1e6:6.2f} M/s  "
+          f"memory {current / 2**20:9.1f} MiB ({current / n:6.1f} B/sample)  "
+          f"min/max/mean {query_s * 1000:8.2f} ms")
+    del store
+
+
+def _build_dicts(n):
+    data = []
+    for i in range(n):
+        data.append({'timestamp': dt.datetime.fromtimestamp(START + i).isoformat(), 'price': 100_000.0 + i % 997})
+    return data
+
+
+def _query_dicts(data):
+    prices = [item['price'] for item in data]
+    return min(prices), max(prices), sum(prices) / len(prices)
+
+
+def _build_series(n):
+    series = PriceSeries()
+    for i in range(n):
+        series.append(START + i, 100_000.0 + i % 997)
+    return series
+
+
+def _query_series(series):
+    return series.min(), series.max(), series.mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--baseline-limit', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        if n <= args.baseline_limit:
+            _measure("list-of-dicts", n, _build_dicts, _query_dicts)
+        _measure("PriceSeries", n, _build_series, _query_series)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Graphs rendered per second: fresh pyplot figure per graph vs. the cached template vs. the render pool.
+
+Usage:
+    python -m benchmarks.bench_render [--graphs 24] [--samples 3600] [--workers 1 2 4] [--format png]
+
+The baseline rebuilds a pyplot figure, style, locator and formatters for every
+graph, as GraphGenerator did before figure templates. Pool timings exclude
+worker start-up, which happens once per run while prices are being collected.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import numpy as np
+
+from graph_generator import GraphGenerator
+from price_series import PriceSeries, to_local_datetime64
+from render_service import RenderService
+from utils.logger import configure_logging
+
+START = 1_750_000_000.0
+
+
+def _make_series(count, samples):
+    rng = np.random.default_rng(42)
+    timestamps = START + np.arange(samples, dtype=np.float64) * 10
+    return [
+        PriceSeries.from_arrays(timestamps, 100_000 + np.cumsum(rng.standard_normal(samples) * 20), f"PAIR{i}-USD")
+        for i in range(count)
+    ]
+
+
+def _render_fresh(series, filepath):
+    """The pre-template behaviour: a new pyplot figure per graph."""
+    plt.style.use('seaborn-v0_8-whitegrid')
+    fig, ax = plt.subplots(figsize=(12, 7))
+    ax.plot(to_local_datetime64(series.timestamps), series.prices, linestyle='-', color='#0056b3')
+    ax.set_title(f'{series.symbol} Price', fontsize=16, weight='bold')
+    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: f'${x:,.2f}'))
+    locator = mdates.AutoDateLocator(minticks=5, maxticks=12)
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    plt.tight_layout()
+    plt.savefig(filepath)
+    plt.close(fig)
+
+
+def _report(label, graphs, seconds):
+    print(f"{label:<26} {graphs / seconds:7.2f} graphs/s  ({seconds * 1000 / graphs:7.1f} ms/graph)")
+
+
+async def _bench_pool(series, out_dir, fmt, workers):
+    service = RenderService(out_dir / 'pool.png', output_format=fmt, workers=workers)
+    async with service:
+        # One untimed round so every worker has rendered once
+        await service.render_all((s, s.symbol, service.filepath_for(s.symbol, True)) for s in series[:workers])
+        start = time.perf_counter()
+        await service.render_all((s, s.symbol, service.filepath_for(s.symbol, True)) for s in series)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--graphs', type=int, default=24)
+    parser.add_argument('--samples', type=int, default=3600)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--format', choices=['png', 'svg'], default='png')
+    args = parser.parse_args()
+    configure_logging(level='WARNING', console=False)
+
+    series = _make_series(args.graphs, args.samples)
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+
+        start = time.perf_counter()
+        for s in series:
+            _render_fresh(s, out_dir / f'fresh_{s.symbol}.{args.format}')
+        _report("fresh pyplot figure", len(series), time.perf_counter() - start)
+
+        generator = GraphGenerator(out_dir / 'template.png', output_format=args.format)
+        generator.warm_up()
+        start = time.perf_counter()
+        for s in series:
+            generator.generate_graph(s, s.symbol, generator.filepath_for(s.symbol, True))
+        _report("cached template", len(series), time.perf_counter() - start)
+
+        for workers in args.workers:
+            seconds = asyncio.run(_bench_pool(series, out_dir, args.format, workers))
+            _report(f"render pool, {workers} worker(s)", len(series), seconds)
+
+
+if __name__ == '__main__':
+    main()
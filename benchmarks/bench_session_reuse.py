@@ -0,0 +1,78 @@
+"""Compare per-request latency of a fresh session per call vs. the pooled APIHandler session.
+
+Runs against a local aiohttp test server so results are not affected by network jitter.
+
+Usage:
+    python -m benchmarks.bench_session_reuse [--requests 500]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from api_handler import APIHandler
+
+QUOTE = {"data": {"base": "BTC", "currency": "USD", "amount": "105565.74"}}
+
+
+async def _spot_price(request):
+    return web.json_response(QUOTE)
+
+
+async def _fresh_session_fetch(url):
+    """The pre-pooling behaviour: one ClientSession (and connection) per request."""
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            data = await response.json()
+            return float(data['data']['amount'])
+
+
+async def _measure(fetch, n):
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await fetch()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _report(label, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<16} mean={statistics.mean(latencies):7.3f} ms  "
+          f"p50={statistics.median(latencies):7.3f} ms  p99={p99:7.3f} ms")
+
+
+async def run(n):
+    app = web.Application()
+    app.router.add_get('/v2/prices/BTC-USD/spot', _spot_price)
+    server = TestServer(app)
+    await server.start_server()
+    url = str(server.make_url('/v2/prices/BTC-USD/spot'))
+    try:
+        fresh = await _measure(lambda: _fresh_session_fetch(url), n)
+        async with APIHandler(url) as handler:
+            handler.logger.disabled = True
+            pooled = await _measure(handler.get_bitcoin_price, n)
+    finally:
+        await server.close()
+
+    _report("fresh session", fresh)
+    _report("pooled session", pooled)
+    print(f"speed-up (mean): {statistics.mean(fresh) / statistics.mean(pooled):.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Cold-start cost: import time of ``main`` and time from process start to the first price request.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--top 8]
+
+Import time is read from ``python -X importtime -c "import main"`` and broken
+down by the modules ``main`` imports directly. Time to first fetch runs
+``python main.py`` in a fresh process against a local mock exchange
+(``benchmarks/mock_exchange.py``) and measures from spawning the process to
+the first request reaching the exchange (with a 50 ms fetch interval, since
+the first tick waits for an interval boundary); the start-up of a bare
+interpreter is shown alongside for reference. Also lists the heavy modules (matplotlib,
+the email MIME classes, the aiohttp server) that are loaded before the first
+fetch; they should only be loaded when first used.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.mock_exchange import AcceleratedClock, MockExchange
+from storage_backends import PriceRecord
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ('matplotlib', 'email.mime', 'aiohttp.web')
+
+
+def import_times(top):
+    """Returns the cumulative import time of ``main`` and its ``top`` slowest direct imports, in ms."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative) / 1000, name.strip()))
+        elif depth == 0:
+            if name.strip() == 'main':
+                return int(cumulative) / 1000, sorted(children, reverse=True)[:top]
+            children = []
+    raise RuntimeError("main was not found in the -X importtime output")
+
+
+def loaded_heavy_modules():
+    code = f"import sys, main; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                            check=True).stdout.strip()
+    return output.split(',') if output else []
+
+
+async def _spawn_until(args, env, ready):
+    """Starts a process and returns the seconds until ``ready()`` holds (or the process exits)."""
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(*args, cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                                                   stderr=subprocess.DEVNULL)
+    while not ready() and process.returncode is None:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    if process.returncode is None:
+        process.kill()
+    await process.wait()
+    return elapsed
+
+
+async def first_fetch_times(runs, workdir):
+    clock = AcceleratedClock(1.0, time.time())
+    exchange = MockExchange([PriceRecord(clock.start, 'BTC-USD', 100_000.0)], clock, latency=0)
+    url = await exchange.start()
+    env = {
+        **os.environ,
+        'API_URL': url,
+        'SYMBOLS': 'BTC-USD',
+        'RUN_MODE': 'once',
+        # Ticks are aligned to interval boundaries, so up to one interval of the figure is waiting
+        # for the first tick; fetches get 90% of the interval as their budget
+        'FETCH_INTERVAL': '0.05',
+        # Render workers are left out: the process is killed after the first fetch
+        'JSON_FILEPATH': str(workdir / 'prices.ndjson'),
+        'GRAPH_FILEPATH': str(workdir / 'graph.png'),
+        'RENDER_WORKERS': '0',
+        'HISTORY_DB': '',
+        'ALERT_RULES_FILE': '',
+        'RECIPIENT_EMAIL': 'bench@example.com',
+        'SMTP_SERVER': '127.0.0.1',
+        'SENDER_EMAIL': 'tracker@example.com',
+        'SENDER_PASSWORD': '',
+        'METRICS_PORT': '0',
+        'LOG_DIR': str(workdir / 'logs'),
+        'LOG_LEVEL': 'WARNING',
+    }
+    bare, first_fetch = [], []
+    try:
+        for _ in range(runs):
+            bare.append(await _spawn_until([sys.executable, '-c', 'pass'], env, lambda: False))
+            requests = exchange.requests
+            first_fetch.append(await _spawn_until([sys.executable, 'main.py'], env,
+                                                  lambda: exchange.requests > requests))
+    finally:
+        await exchange.close()
+    return bare, first_fetch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help="Number of direct imports of main to list")
+    args = parser.parse_args()
+
+    runs = [import_times(args.top) for _ in range(args.runs)]
+    total, children = min(runs, key=lambda run: run[0])
+    print(f"import main: {statistics.median(run[0] for run in runs):.1f} ms median, {total:.1f} ms best")
+    for cumulative, name in children:
+        print(f"  {name:<24} {cumulative:8.1f} ms")
+    heavy = loaded_heavy_modules()
+    print(f"heavy modules loaded by import: {', '.join(heavy) if heavy else 'none'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bare, first_fetch = asyncio.run(first_fetch_times(args.runs, Path(tmp)))
+    print(f"bare interpreter start:  {statistics.median(bare) * 1000:8.1f} ms median")
+    print(f"time to first fetch:     {statistics.median(first_fetch) * 1000:8.1f} ms median, "
+          f"{min(first_fetch) * 1000:.1f} ms best")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Local exchange and accelerated clock used by ``bench_pipeline`` to load-test the tracker offline."""
+import asyncio
+import math
+import random
+import time
+import zlib
+from bisect import bisect_right
+
+from aiohttp import web
+
+from storage_backends import read_records
+
+
+class AcceleratedClock:
+    """Virtual wall clock running ``speedup`` times faster than real time.
+
+    ``time()`` starts at ``start`` and ``sleep()`` waits ``1 / speedup`` of the
+    requested virtual duration, so passing both to ``TickScheduler`` turns a
+    24 hour run into seconds while real I/O (HTTP, SMTP, rendering) still takes
+    its real time and shows up as lag.
+    """
+
+    def __init__(self, speedup, start):
+        self.speedup = speedup
+        self.start = start
+        self._origin = time.perf_counter()
+
+    def time(self):
+        return self.start + (time.perf_counter() - self._origin) * self.speedup
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(max(0.0, seconds) / self.speedup)
+
+
+class MockExchange:
+    """aiohttp server answering Coinbase-style spot price requests from a recorded series.
+
+    The series is replayed in a loop against the virtual clock: a request at
+    virtual time ``t`` gets the last recorded price at or before ``t``
+    (relative to the clock's start). Other pairs get the same series scaled by
+    a per-symbol factor. Responses take a log-normally distributed virtual
+    latency with median ``latency`` seconds and shape ``jitter``, fail with a
+    503 at ``error_rate``, and carry an ``ETag`` per recorded sample so
+    conditional requests can be answered with 304.
+    """
+
+    def __init__(self, records, clock, latency=0.05, jitter=0.5, error_rate=0.0, seed=0):
+        records = sorted(records, key=lambda record: record.timestamp)
+        if not records:
+            raise ValueError("The replayed series has no records")
+        first = records[0].timestamp
+        self.offsets = [record.timestamp - first for record in records]
+        self.prices = [record.price for record in records]
+        spacing = self.offsets[-1] / (len(records) - 1) if len(records) > 1 else 60.0
+        self.period = self.offsets[-1] + spacing
+        self.clock = clock
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self._rng = random.Random(seed)
+        self._runner = None
+        self.url = None
+
+    @classmethod
+    def from_file(cls, filepath, clock, **kwargs):
+        return cls(list(read_records(filepath)), clock, **kwargs)
+
+    def quote(self, symbol, at):
+        """Returns ``(price, etag)`` of ``symbol`` at virtual time ``at``."""
+        cycle, offset = divmod(at - self.clock.start, self.period)
+        index = bisect_right(self.offsets, offset) - 1
+        scale = 1.0 if symbol == 'BTC-USD' else 0.01 + (zlib.crc32(symbol.encode()) % 1000) / 10000
+        return self.prices[index] * scale, f'"{symbol}-{int(cycle)}-{index}"'
+
+    def _delay(self):
+        if self.latency <= 0:
+            return 0.0
+        return self._rng.lognormvariate(math.log(self.latency), self.jitter) if self.jitter else self.latency
+
+    async def _spot(self, request):
+        self.requests += 1
+        await self.clock.sleep(self._delay())
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="Service Unavailable")
+        symbol = request.match_info['symbol']
+        price, etag = self.quote(symbol, self.clock.time())
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        base, _, currency = symbol.partition('-')
+        return web.json_response({"data": {"base": base, "currency": currency, "amount": f"{price:.2f}"}},
+                                 headers={'ETag': etag})
+
+    async def start(self, host='127.0.0.1', port=0):
+        app = web.Application()
+        app.router.add_get('/v2/prices/{symbol}/spot', self._spot)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}/v2/prices/{{symbol}}/spot"
+        return self.url
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -1,66 +1,283 @@
-import datetime as dt
+from alert_engine import AlertDispatcher, AlertEngine, EmailAlertChannel, WebhookAlertChannel, load_rules
 from api_handler import APIHandler
+from config.app_config import AppConfig
 from price_data_storage import DataStorage
-from graph_generator import GraphGenerator
+from price_sources import build_sources
+from render_service import RenderService
+from resilience import RetryPolicy
+from scheduler import TickScheduler
+from stream_ingestion import StreamIngestor
 from email_sender import EmailSender
+from metrics import REGISTRY, MetricsServer
+from graph_generator import describe_span
+from rolling_stats import RUN_WINDOW, StatsEngine
 from utils.logger import setup_logger
 import asyncio
+import datetime as dt
+import math
+
+
+def describe_period(seconds):
+    """Report cadence for email subjects, e.g. 'Hourly', 'Daily' or 'Every 15 Minutes'."""
+    named = {3600: 'Hourly', 86400: 'Daily', 7 * 86400: 'Weekly'}
+    return named.get(seconds) or f"Every {describe_span(seconds)}"
 
 
 class BusinessLogic:
     """Orchestrates and centralizes the price tracking process."""
 
     def __init__(self, config):
+        # Plain dicts (tests, benchmarks) get the same validation as the environment
+        if not isinstance(config, AppConfig):
+            config = AppConfig(**config)
         self.config = config
         self.logger = setup_logger(__name__)
-        self.api_handler = APIHandler(config['api_url'])
-        self.data_storage = DataStorage(config['json_filepath'])
-        self.graph_generator = GraphGenerator(config['graph_filepath'])
+        self.symbols = list(config.symbols)
+        interval = config.fetch_interval
+        self.api_handler = APIHandler(
+            config.api_url,
+            max_per_host=config.max_requests_per_host,
+            retry_policy=RetryPolicy(
+                config.fetch_retries,
+                config.retry_base_delay,
+                config.retry_max_delay
+            ),
+            # Retries must finish before the next tick is due
+            fetch_budget=interval * 0.9,
+            breaker_threshold=config.breaker_failure_threshold,
+            breaker_reset_timeout=config.breaker_reset_timeout,
+            hedge_percentile=config.hedge_percentile or None,
+            sources=build_sources(config.price_sources or ['coinbase'], config.api_url),
+            aggregation=config.aggregation,
+            source_deadline=config.source_deadline,
+            min_sources=config.min_sources,
+            cache_ttl=config.price_cache_ttl
+        )
+        if len(self.symbols) > 1 and '{symbol}' not in config.api_url:
+            self.logger.warning("API_URL has no {symbol} placeholder; every symbol will query the same endpoint.")
+        self.data_storage = DataStorage(
+            config.json_filepath,
+            config.storage_format,
+            config.fsync_every,
+            config.rolling_windows,
+            history_db=config.history_db or None,
+            max_memory_samples=config.max_memory_samples or None
+        )
+        self.stream_ingestor = StreamIngestor(
+            config.stream_url,
+            self.symbols,
+            self.store_tick,
+            heartbeat=config.stream_heartbeat,
+            sample_interval=config.stream_sample_interval
+        )
+        self.scheduler = TickScheduler(
+            interval,
+            config.overlap_policy
+        )
+        self.render_service = RenderService(
+            config.graph_filepath,
+            config.graph_style,
+            config.graph_max_points,
+            output_format=config.graph_format or None,
+            workers=config.render_workers
+        )
         self.email_sender = EmailSender(
-            config['smtp_server'],
-            config['smtp_port'],
-            config['sender_email'],
-            config['sender_password']
+            config.smtp_server,
+            config.smtp_port,
+            config.sender_email,
+            config.sender_password,
+            security=config.smtp_security or None,
+            pool_size=config.smtp_pool_size,
+            retry_policy=RetryPolicy(config.email_retries, base_delay=1.0, max_delay=30.0)
         )
+        self.metrics_server = MetricsServer(
+            REGISTRY, config.metrics_host, config.metrics_port
+        ) if config.metrics_port else None
+        self.alert_engine = None
+        self.alert_dispatcher = None
+        if config.alert_rules_file:
+            self._setup_alerts(config)
+        self._report_task = None
+
+    def _setup_alerts(self, config):
+        """Loads the alert rules and evaluates them on every stored sample."""
+        self.alert_engine = AlertEngine(load_rules(config.alert_rules_file), cooldown=config.alert_cooldown)
+        channels = []
+        alert_email = config.alert_email or config.recipient_email
+        if alert_email:
+            channels.append(EmailAlertChannel(self.email_sender, alert_email))
+        if config.alert_webhook_url:
+            channels.append(WebhookAlertChannel(config.alert_webhook_url))
+        self.alert_dispatcher = AlertDispatcher(channels, config.alert_max_per_minute)
+        self.data_storage.listeners.append(self.check_alerts)
+        self.logger.info(f"Loaded {self.alert_engine.rule_count} alert rules "
+                         f"({', '.join(channel.name for channel in channels) or 'no channels'})")
+
+    def check_alerts(self, symbol, timestamp, price):
+        """Evaluates the alert rules on a stored sample and queues any alerts for delivery."""
+        self.alert_dispatcher.submit(self.alert_engine.evaluate(symbol, timestamp, price))
+
+    async def collect_tick(self, tick_time):
+        """Fetches every symbol and stores the batch under the scheduled tick time."""
+        self.logger.debug("Requesting new price data.")
+        with REGISTRY.timer('tick_seconds', 'Time to fetch and store all symbols of one tick'):
+            # Each tick records a new sample; only a fetch already in flight is shared
+            prices = await self.api_handler.get_prices(self.symbols, max_staleness=0)
+            self.data_storage.store_batch(tick_time, prices)
+        failed = [symbol for symbol, price in prices.items() if price is None]
+        if failed:
+            self.logger.warning(f"Skipping storage due to fetch error for: {', '.join(failed)}")
+
+    def store_tick(self, symbol, timestamp, price):
+        """Stores one streamed tick."""
+        self.data_storage.store_price(timestamp, price, symbol)
 
     async def run_tracker(self):
-        """Executes the main async logic of the application."""
+        """Executes the main async logic of the application, serving metrics while it runs."""
+        await self._run_with_services(self._track())
+
+    async def run_daemon(self, stop=None):
+        """Collects prices without pause and reports on every window boundary until ``stop`` is set."""
+        await self._run_with_services(self._daemon(stop or asyncio.Event()))
+
+    async def _run_with_services(self, work):
+        """Runs ``work`` with the metrics endpoint and the render pool up, shutting them down afterwards."""
+        if self.metrics_server:
+            await self.metrics_server.start()
+        if self.alert_dispatcher:
+            await self.alert_dispatcher.start()
+        # Start the graph render workers while prices are being collected
+        render_start = asyncio.ensure_future(self.render_service.start())
+        try:
+            await work
+        finally:
+            await asyncio.gather(render_start, return_exceptions=True)
+            await self.render_service.close()
+            if self.alert_dispatcher:
+                await self.alert_dispatcher.close()
+            await self.email_sender.close()
+            for line in REGISTRY.summary_lines():
+                self.logger.info(f"Metric {line}")
+            if self.metrics_server:
+                await self.metrics_server.stop()
+
+    async def _collect(self, duration_seconds):
+        """Collects prices by streaming or polling for ``duration_seconds``, or until cancelled if None."""
+        if self.config.ingestion_mode == 'streaming':
+            with REGISTRY.timer('run_phase_seconds', 'Duration of each phase of the run', phase='collect'):
+                await self.stream_ingestor.run(duration_seconds)
+            return
+        try:
+            # Keep one pooled HTTP session open for the whole run
+            with REGISTRY.timer('run_phase_seconds', 'Duration of each phase of the run', phase='collect'):
+                async with self.api_handler:
+                    await self.scheduler.run(self.collect_tick, duration_seconds)
+        finally:
+            for name, stats in self.api_handler.source_stats().items():
+                mean_latency = (stats['mean_latency'] or 0) * 1000
+                self.logger.info(
+                    f"Source {name}: {stats['requests']} requests, {stats['errors']} errors, "
+                    f"{stats['wins']} wins, mean latency {mean_latency:.1f} ms"
+                )
+            cache = self.api_handler.cache_stats()
+            self.logger.info(
+                f"Price cache: {cache['hit']} hits, {cache['miss']} misses, {cache['coalesced']} coalesced, "
+                f"{cache['not_modified']} not modified"
+            )
+
+    async def _report(self, stats, series_by_symbol, period='Hourly'):
+        """Renders a graph per symbol and emails the report built from ``stats``."""
+        multi_symbol = len(series_by_symbol) > 1
+        with REGISTRY.timer('run_phase_seconds', phase='graphs'):
+            self.logger.info(f"Rendering {len(series_by_symbol)} price graph(s) in the render pool...")
+            rendered = await self.render_service.render_all(
+                (series, symbol, self.render_service.filepath_for(symbol, multi_symbol))
+                for symbol, series in series_by_symbol.items()
+            )
+        graph_paths = [path for path in rendered if path is not None]
+
+        for symbol in series_by_symbol:
+            self.logger.info(f"Maximum {symbol} price recorded: {stats.window(symbol, RUN_WINDOW).max:,.2f}")
+        # Send the email report
+        self.logger.info("Sending email report.")
+        with REGISTRY.timer('run_phase_seconds', phase='email'):
+            await self.email_sender.send_report_email(
+                self.config.recipient_email,
+                stats,
+                graph_paths,
+                period
+            )
+
+    async def _track(self):
         self.logger.info("Starting Bitcoin price tracking task.")
-        loop = asyncio.get_event_loop()
-        start_time = loop.time()
-        duration_seconds = self.config['duration_minutes'] * 60
-        # Initialize the data storage
-        while loop.time() - start_time < duration_seconds:
-            self.logger.debug("Requesting new price data.")
-            price = await self.api_handler.get_bitcoin_price()
-            if price is not None:
-                timestamp = dt.datetime.now().isoformat()
-                self.data_storage.store_price(timestamp, price)
-            else:
-                self.logger.warning("Skipping storage due to fetch error.")
-
-            self.logger.debug("Waiting for next 60-second interval.")
-            await asyncio.sleep(60)
+        await self._collect(self.config.duration_minutes * 60)
 
         self.data_storage.save_to_json()
         # Log the completion of data collection
         if self.data_storage.data:
-            self.logger.info("Generating price graph in executor...")
-            # Run the blocking graph generation in a separate thread
-            await loop.run_in_executor(
-                None, self.graph_generator.generate_graph, self.data_storage.data
-            )
-
-            max_price = self.data_storage.get_max_price()
-            self.logger.info(f"Maximum price recorded: ${max_price:,.2f}")
-            # Send the email report
-            self.logger.info("Sending email report.")
-            await self.email_sender.send_report_email(
-                self.config['recipient_email'],
-                max_price,
-                self.config['graph_filepath']
+            await self._report(
+                self.data_storage.stats,
+                {symbol: self.data_storage.series_between(symbol) for symbol in self.data_storage.symbols}
             )
         else:
             self.logger.warning("No data collected. Skipping graph and email steps.")
 
         self.logger.info("Bitcoin price tracking task finished.")
+
+    async def _daemon(self, stop):
+        window = self.config.report_window
+        self.logger.info(f"Starting price tracking daemon with {describe_period(window).lower()} reports.")
+        collector = asyncio.ensure_future(self._collect(None))
+        reporter = asyncio.ensure_future(self._report_every(window))
+        stopped = asyncio.ensure_future(stop.wait())
+        try:
+            done, _ = await asyncio.wait({collector, reporter, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done - {stopped}:
+                if not task.cancelled() and task.exception() is not None:
+                    self.logger.error(f"Daemon task failed: {task.exception()}")
+        finally:
+            self.logger.info("Stopping collection and flushing storage.")
+            for task in (collector, reporter, stopped):
+                task.cancel()
+            await asyncio.gather(collector, reporter, stopped, return_exceptions=True)
+            # A report that was already being generated is allowed to finish
+            if self._report_task is not None:
+                await asyncio.gather(self._report_task, return_exceptions=True)
+            self.data_storage.save_to_json()
+            self.logger.info("Price tracking daemon stopped.")
+
+    async def _report_every(self, window):
+        """Reports the samples of each finished window while collection continues."""
+        clock, sleep = self.scheduler.clock, self.scheduler.sleep
+        window_end = math.ceil(clock() / window) * window
+        while True:
+            delay = window_end - clock()
+            if delay > 0:
+                await sleep(delay)
+            self._report_task = asyncio.ensure_future(self._report_window(window_end - window, window_end))
+            # Shielded so that shutdown waits for a report in progress instead of aborting it
+            await asyncio.shield(self._report_task)
+            self._report_task = None
+            # A report that overran the next boundary is followed immediately by the next one
+            window_end += window
+
+    async def _report_window(self, start, end):
+        """Builds and sends the report of the samples with ``start <= timestamp < end``."""
+        window = end - start
+        series_by_symbol = {}
+        stats = StatsEngine(self.data_storage.stats.windows)
+        for symbol in self.data_storage.symbols:
+            series = self.data_storage.series_between(symbol, start, end)
+            if len(series):
+                series_by_symbol[symbol] = series
+                for timestamp, price in zip(series.timestamps.tolist(), series.prices.tolist()):
+                    stats.update(symbol, timestamp, price)
+        label = dt.datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M')
+        if not series_by_symbol:
+            self.logger.warning(f"No data collected in the window starting {label}; skipping its report.")
+        else:
+            self.logger.info(f"Reporting the {describe_span(window).lower()} window starting {label}.")
+            with REGISTRY.timer('window_report_seconds', 'Time to render and send one window report'):
+                await self._report(stats, series_by_symbol, describe_period(window))
+        # Earlier samples are only needed on disk from now on
+        self.data_storage.discard_before(end)
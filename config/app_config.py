@@ -1,37 +1,295 @@
 import os
+import re
 import logging
-import sys
-from datetime import datetime
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
 
 from dotenv import load_dotenv
 
+DEFAULT_SYMBOL = "BTC-USD"
+
+
+def parse_symbols(raw):
+    """Parses a comma-separated list of currency pairs, e.g. 'BTC-USD, ETH-USD'."""
+    symbols = [symbol.strip().upper() for symbol in (raw or "").split(",") if symbol.strip()]
+    return list(dict.fromkeys(symbols)) or [DEFAULT_SYMBOL]
+
+
+def parse_span(raw):
+    """Parses a span such as '30s', '5m', '1h' or '1d' into seconds."""
+    unit_seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", raw.strip())
+    if not match:
+        raise ValueError(f"Invalid time span '{raw}', expected e.g. 30s, 5m, 1h or 1d")
+    return float(match.group(1)) * unit_seconds[match.group(2)]
+
+
+def parse_windows(raw):
+    """Parses a comma-separated list of window spans such as '1m,5m,1h,24h' into seconds."""
+    return {name: parse_span(name) for name in (part.strip() for part in (raw or "").split(",")) if name}
+
+
+def parse_sources(raw):
+    """Parses a comma-separated list of price source names, e.g. 'coinbase,binance'."""
+    return [name.strip().lower() for name in (raw or "").split(",") if name.strip()]
+
+
+def _to_number(kind, value):
+    """Converts a number or numeric string to ``kind`` (int or float); raises ValueError otherwise."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError
+    if kind is int and isinstance(value, float) and not value.is_integer():
+        raise ValueError
+    try:
+        return kind(value)
+    except OverflowError:
+        raise ValueError from None
+
+
+def _lower(raw):
+    return raw.lower()
+
+
+def _upper(raw):
+    return raw.upper()
+
+
+# Allowed values, kept in step with the modules that use them (importing those here would
+# load half the application just to read the configuration)
+CHOICES = {
+    "aggregation": ("fastest", "median"),
+    "run_mode": ("once", "daemon"),
+    "ingestion_mode": ("polling", "streaming"),
+    "overlap_policy": ("skip", "queue", "cancel"),
+    "storage_format": ("ndjson", "binary", "json"),
+    "graph_style": ("line", "candlestick"),
+    "graph_format": ("", "png", "svg"),
+    "smtp_security": ("", "ssl", "starttls", "none"),
+    "log_level": ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"),
+}
+REQUIRED = ("api_url", "json_filepath", "graph_filepath", "recipient_email", "smtp_server", "sender_email",
+            "sender_password")
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """Validated application settings.
+
+    Built by ``load_configuration`` from the environment, or directly from
+    keyword arguments (tests, benchmarks). Values are checked when the object
+    is created, so a bad setting fails at start-up rather than on first use,
+    and the object cannot be changed afterwards.
+    """
+
+    api_url: Optional[str] = None
+    symbols: Tuple[str, ...] = (DEFAULT_SYMBOL,)
+    max_requests_per_host: int = 4
+    price_sources: Tuple[str, ...] = ("coinbase",)
+    aggregation: str = "fastest"
+    source_deadline: float = 5.0
+    min_sources: int = 1
+    duration_minutes: int = 60
+    run_mode: str = "once"
+    report_window: float = 3600.0
+    ingestion_mode: str = "polling"
+    stream_url: str = "wss://ws-feed.exchange.coinbase.com"
+    stream_heartbeat: float = 15.0
+    stream_sample_interval: float = 0.0
+    fetch_interval: float = 60.0
+    overlap_policy: str = "skip"
+    price_cache_ttl: float = 1.0
+    fetch_retries: int = 3
+    retry_base_delay: float = 0.25
+    retry_max_delay: float = 5.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    hedge_percentile: float = 0.0
+    json_filepath: Optional[str] = None
+    storage_format: str = "ndjson"
+    fsync_every: int = 32
+    history_db: str = ""
+    max_memory_samples: int = 100_000
+    rolling_windows: Mapping[str, float] = field(default_factory=lambda: parse_windows("1m,5m,1h,24h"))
+    graph_filepath: Optional[str] = None
+    graph_style: str = "line"
+    graph_max_points: int = 1000
+    graph_format: str = ""
+    render_workers: int = 2
+    recipient_email: Optional[str] = None
+    smtp_server: Optional[str] = None
+    smtp_port: int = 587
+    smtp_security: str = ""
+    smtp_pool_size: int = 2
+    email_retries: int = 3
+    alert_rules_file: str = ""
+    alert_email: str = ""
+    alert_webhook_url: str = ""
+    alert_cooldown: float = 900.0
+    alert_max_per_minute: int = 6
+    sender_email: Optional[str] = None
+    sender_password: Optional[str] = None
+    log_level: str = "INFO"
+    log_dir: str = "temp/test_runs"
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+    log_sample_rate: float = 1.0
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 0
+
+    def __post_init__(self):
+        # Store immutable copies of the collections
+        object.__setattr__(self, "symbols", tuple(self.symbols))
+        object.__setattr__(self, "price_sources", tuple(self.price_sources))
+        object.__setattr__(self, "rolling_windows", MappingProxyType(dict(self.rolling_windows)))
+
+        # Numeric settings given as strings (e.g. '587') are converted; anything else is reported
+        type_problems = []
+        for setting in fields(self):
+            if setting.type not in (int, float):
+                continue
+            value = getattr(self, setting.name)
+            try:
+                object.__setattr__(self, setting.name, _to_number(setting.type, value))
+            except ValueError:
+                type_problems.append(f"{setting.name} must be {'an integer' if setting.type is int else 'a number'}, "
+                                     f"got {value!r}")
+        problems = type_problems + [f"{name} must be one of {allowed}, got '{getattr(self, name)}'"
+                                    for name, allowed in CHOICES.items() if getattr(self, name) not in allowed]
+        if type_problems:
+            # The range checks below need numbers
+            raise ValueError("; ".join(problems))
+        checks = [
+            (self.symbols, "symbols must not be empty"),
+            (self.fetch_interval > 0, "fetch_interval must be positive"),
+            (self.report_window > 0, "report_window must be positive"),
+            (self.source_deadline > 0, "source_deadline must be positive"),
+            (self.min_sources >= 1, "min_sources must be at least 1"),
+            (self.price_cache_ttl >= 0, "price_cache_ttl must not be negative"),
+            (0 <= self.hedge_percentile < 100, "hedge_percentile must be in [0, 100)"),
+            (self.render_workers >= 0, "render_workers must not be negative"),
+            (self.max_memory_samples >= 0, "max_memory_samples must not be negative"),
+            (0 < self.smtp_port < 65536, "smtp_port must be a port number"),
+            (0 <= self.metrics_port < 65536, "metrics_port must be a port number or 0"),
+            (0 < self.log_sample_rate <= 1, "log_sample_rate must be in (0, 1]"),
+            (all(span > 0 for span in self.rolling_windows.values()), "rolling_windows must be positive spans"),
+        ]
+        problems += [message for ok, message in checks if not ok]
+        if problems:
+            raise ValueError("; ".join(problems))
+
+    @property
+    def missing(self):
+        """Names of the required settings that are not set."""
+        return [name for name in REQUIRED if getattr(self, name) is None]
+
+
+# Setting -> (environment variable, parser); unset variables keep the AppConfig default
+ENVIRONMENT = {
+    "api_url": ("API_URL", str),
+    "symbols": ("SYMBOLS", parse_symbols),
+    "max_requests_per_host": ("MAX_REQUESTS_PER_HOST", int),
+    "price_sources": ("PRICE_SOURCES", parse_sources),
+    "aggregation": ("AGGREGATION", _lower),
+    "source_deadline": ("SOURCE_DEADLINE", float),
+    "min_sources": ("MIN_SOURCES", int),
+    "duration_minutes": ("TRACKING_DURATION", int),
+    "run_mode": ("RUN_MODE", _lower),
+    "report_window": ("REPORT_WINDOW", parse_span),
+    "ingestion_mode": ("INGESTION_MODE", _lower),
+    "stream_url": ("STREAM_URL", str),
+    "stream_heartbeat": ("STREAM_HEARTBEAT", float),
+    "stream_sample_interval": ("STREAM_SAMPLE_INTERVAL", float),
+    "fetch_interval": ("FETCH_INTERVAL", float),
+    "overlap_policy": ("OVERLAP_POLICY", _lower),
+    "price_cache_ttl": ("PRICE_CACHE_TTL", float),
+    "fetch_retries": ("FETCH_RETRIES", int),
+    "retry_base_delay": ("RETRY_BASE_DELAY", float),
+    "retry_max_delay": ("RETRY_MAX_DELAY", float),
+    "breaker_failure_threshold": ("BREAKER_FAILURE_THRESHOLD", int),
+    "breaker_reset_timeout": ("BREAKER_RESET_TIMEOUT", float),
+    "hedge_percentile": ("HEDGE_PERCENTILE", float),
+    "json_filepath": ("JSON_FILEPATH", str),
+    "storage_format": ("STORAGE_FORMAT", _lower),
+    "fsync_every": ("FSYNC_EVERY", int),
+    "history_db": ("HISTORY_DB", str),
+    "max_memory_samples": ("MAX_MEMORY_SAMPLES", int),
+    "rolling_windows": ("ROLLING_WINDOWS", parse_windows),
+    "graph_filepath": ("GRAPH_FILEPATH", str),
+    "graph_style": ("GRAPH_STYLE", _lower),
+    "graph_max_points": ("GRAPH_MAX_POINTS", int),
+    "graph_format": ("GRAPH_FORMAT", _lower),
+    "render_workers": ("RENDER_WORKERS", int),
+    "recipient_email": ("RECIPIENT_EMAIL", str),
+    "smtp_server": ("SMTP_SERVER", str),
+    "smtp_port": ("SMTP_PORT", int),
+    "smtp_security": ("SMTP_SECURITY", _lower),
+    "smtp_pool_size": ("SMTP_POOL_SIZE", int),
+    "email_retries": ("EMAIL_RETRIES", int),
+    "alert_rules_file": ("ALERT_RULES_FILE", str),
+    "alert_email": ("ALERT_EMAIL", str),
+    "alert_webhook_url": ("ALERT_WEBHOOK_URL", str),
+    "alert_cooldown": ("ALERT_COOLDOWN", parse_span),
+    "alert_max_per_minute": ("ALERT_MAX_PER_MINUTE", int),
+    "sender_email": ("SENDER_EMAIL", str),
+    "sender_password": ("SENDER_PASSWORD", str),
+    "log_level": ("LOG_LEVEL", _upper),
+    "log_dir": ("LOG_DIR", str),
+    "log_max_bytes": ("LOG_MAX_BYTES", int),
+    "log_backup_count": ("LOG_BACKUP_COUNT", int),
+    "log_sample_rate": ("LOG_SAMPLE_RATE", float),
+    "metrics_host": ("METRICS_HOST", str),
+    "metrics_port": ("METRICS_PORT", int),
+}
+# An empty numeric variable (e.g. HEDGE_PERCENTILE=) means the default
+NUMERIC = (int, float, parse_span)
+
+
+def config_from_environment(environ=None):
+    """Builds an AppConfig from environment variables; raises ValueError on invalid values."""
+    environ = os.environ if environ is None else environ
+    values = {}
+    for name, (variable, parse) in ENVIRONMENT.items():
+        raw = environ.get(variable)
+        if raw is None or (parse in NUMERIC and not raw.strip()):
+            continue
+        try:
+            values[name] = parse(raw)
+        except ValueError as e:
+            raise ValueError(f"{variable}: {e}") from None
+    return AppConfig(**values)
+
+
+@lru_cache(maxsize=None)
+def _read_configuration():
+    """Reads and validates the configuration; raises ValueError, which is not cached."""
+    load_dotenv()
+    config = config_from_environment()
+    missing_configs = config.missing
+    if missing_configs:
+        variables = [ENVIRONMENT[name][0] for name in missing_configs]
+        raise ValueError(f"Missing required environment variables: {', '.join(variables)}")
+    return config
+
+
 def load_configuration():
     """
     Loads configuration from the .env file and validates it.
 
+    A valid configuration is read once per process; later calls return the
+    same object (``load_configuration.cache_clear()`` forces a reload). An
+    invalid one is not kept, so the next call reads the environment again.
+
     Returns:
-        dict: A dictionary with configuration values, or None if validation fails.
+        AppConfig: The validated configuration, or None if validation fails.
     """
-    load_dotenv()
-
-    config = {
-        "api_url": os.getenv("API_URL"),
-        "duration_minutes": int(os.getenv("TRACKING_DURATION", 60)),
-        "json_filepath": os.getenv("JSON_FILEPATH"),
-        "graph_filepath": os.getenv("GRAPH_FILEPATH"),
-        "recipient_email": os.getenv("RECIPIENT_EMAIL"),
-        "smtp_server": os.getenv("SMTP_SERVER"),
-        "smtp_port": int(os.getenv("SMTP_PORT", 587)),
-        "sender_email": os.getenv("SENDER_EMAIL"),
-        "sender_password": os.getenv("SENDER_PASSWORD")
-    }
-
-    # Validate that all necessary configurations are present
-    missing_configs = [key for key, value in config.items() if value is None]
-    if missing_configs:
-        logging.error(f"Error: Missing required environment variables: {', '.join(missing_configs)}")
+    try:
+        return _read_configuration()
+    except ValueError as e:
+        logging.error(f"Error: Invalid configuration: {e}")
         logging.error("Please ensure your .env file is correctly set up.")
         return None
 
-    return config
 
+load_configuration.cache_clear = _read_configuration.cache_clear
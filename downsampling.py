@@ -0,0 +1,85 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Bucket sizes (seconds) that give readable candle boundaries
+NICE_BUCKETS = (
+    1, 2, 5, 10, 15, 30,
+    60, 120, 300, 600, 900, 1800,
+    3600, 7200, 14400, 21600, 43200,
+    86400, 2 * 86400, 7 * 86400, 14 * 86400, 30 * 86400,
+)
+
+OHLCBuckets = namedtuple('OHLCBuckets', ['start', 'open', 'high', 'low', 'close', 'bucket_seconds'])
+
+
+def choose_bucket_seconds(span_seconds, target_buckets=120):
+    """Returns the smallest nice bucket size giving at most ``target_buckets`` buckets over the span."""
+    for bucket in NICE_BUCKETS:
+        if span_seconds / bucket <= target_buckets:
+            return bucket
+    return NICE_BUCKETS[-1]
+
+
+def ohlc(timestamps, prices, bucket_seconds=None, target_buckets=120):
+    """Aggregates sorted samples into open/high/low/close buckets aligned to the bucket size.
+
+    Runs in O(n) NumPy operations; when ``bucket_seconds`` is omitted it is
+    chosen from the time span so the output has at most ``target_buckets`` rows.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    if bucket_seconds is None:
+        span = timestamps[-1] - timestamps[0] if len(timestamps) else 0.0
+        bucket_seconds = choose_bucket_seconds(span, target_buckets)
+    if not len(timestamps):
+        empty = np.empty(0, dtype=np.float64)
+        return OHLCBuckets(empty, empty, empty, empty, empty, bucket_seconds)
+
+    bucket_ids = np.floor(timestamps / bucket_seconds)
+    starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+    ends = np.r_[starts[1:], len(prices)]
+    return OHLCBuckets(
+        start=bucket_ids[starts] * bucket_seconds,
+        open=prices[starts],
+        high=np.maximum.reduceat(prices, starts),
+        low=np.minimum.reduceat(prices, starts),
+        close=prices[ends - 1],
+        bucket_seconds=bucket_seconds,
+    )
+
+
+def lttb(timestamps, prices, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; returns the indices of the kept samples.
+
+    Keeps the first and last samples and, for each of ``threshold - 2`` equal
+    buckets in between, the sample forming the largest triangle with the
+    previously kept sample and the average of the next bucket. This keeps the
+    visual shape (peaks and troughs) of the series with a bounded point count.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    n = len(timestamps)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        if next_lo >= next_hi:
+            next_x, next_y = timestamps[-1], prices[-1]
+        else:
+            next_x = timestamps[next_lo:next_hi].mean()
+            next_y = prices[next_lo:next_hi].mean()
+        x0, y0 = timestamps[previous], prices[previous]
+        area = np.abs(
+            (x0 - next_x) * (prices[lo:hi] - y0) - (x0 - timestamps[lo:hi]) * (next_y - y0)
+        )
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
@@ -1,79 +1,209 @@
 # email_sender.py
 import asyncio
 from pathlib import Path
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
+import smtplib
+from config.app_config import DEFAULT_SYMBOL
+from metrics import REGISTRY
+from resilience import RetryPolicy
+from rolling_stats import RUN_WINDOW
+from smtp_pool import SMTPConnectionPool
 from utils.logger import setup_logger
 
 
+def parse_recipients(raw):
+    """Parses a comma-separated recipient list (or passes a list through), dropping duplicates."""
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    return list(dict.fromkeys(address.strip() for address in raw if address and address.strip()))
+
+
+def describe_window(period):
+    """The span a report covers, from its cadence: 'Hourly' -> 'hour', 'Every 15 Minutes' -> '15 minutes'."""
+    named = {'Hourly': 'hour', 'Daily': 'day', 'Weekly': 'week'}
+    if period in named:
+        return named[period]
+    return (period[len('Every '):] if period.startswith('Every ') else period).lower()
+
+
 class EmailSender:
-    """Handles sending emails asynchronously."""
+    """Handles sending emails asynchronously.
+
+    Reports go out through a small pool of persistent, authenticated SMTP
+    connections, so the TLS handshake and login happen once per connection
+    rather than once per email. The report body and graph attachments are
+    built once and shared by the messages of all recipients; at most
+    ``pool_size`` messages are in flight at a time, and transient failures
+    (dropped connections, 4xx replies) are retried with jittered backoff.
+    """
 
-    def __init__(self, smtp_server, port, sender_email, sender_password):
+    def __init__(self, smtp_server, port, sender_email, sender_password, security=None, pool_size=2,
+                 retry_policy=None):
         self.smtp_server = smtp_server
         self.port = port
         self.sender_email = sender_email
         self.sender_password = sender_password
+        self.pool_size = pool_size
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=30.0)
+        self.pool = SMTPConnectionPool(smtp_server, port, sender_email, sender_password, security, pool_size)
         self.logger = setup_logger(__name__)
 
-    async def send_report_email(self, recipient_email, max_price, graph_path):
-        msg = MIMEMultipart()
-        msg['Subject'] = f"Bitcoin Hourly Price Report - Max Price: ${max_price:,.2f}"
-        msg['From'] = self.sender_email
-        msg['To'] = recipient_email
+    async def close(self):
+        """Closes the pooled SMTP connections."""
+        await asyncio.get_running_loop().run_in_executor(None, self.pool.close)
+
+    async def send_report_email(self, recipient_email, stats, graph_paths, period='Hourly'):
+        """Sends the report built from a StatsEngine's whole-run and rolling-window figures.
+
+        ``recipient_email`` is one address, a comma-separated list or a list of
+        addresses; ``period`` names the report cadence in the subject. Returns a
+        dict mapping each recipient to whether delivery succeeded.
+        """
+        if isinstance(graph_paths, (str, Path)):
+            graph_paths = [graph_paths]
+        recipients = parse_recipients(recipient_email)
+        symbols = stats.symbols
+        if not symbols:
+            self.logger.warning("No price data to report; email not sent.")
+            return {}
+
+        if len(symbols) == 1:
+            symbol = symbols[0]
+            label = "Bitcoin" if symbol == DEFAULT_SYMBOL else symbol
+            max_price = stats.window(symbol, RUN_WINDOW).max
+            subject = f"{label} {period} Price Report - Max Price: {self._format_price(symbol, max_price)}"
+        else:
+            subject = f"{period} Price Report - {len(symbols)} pairs"
+
+        summary = "\n\n".join(self._format_stats(symbol, stats.snapshot(symbol), period) for symbol in symbols)
 
         body = f"""
         Hello,
 
-        This is your automated Bitcoin price report.
+        This is your automated price report.
 
-        The maximum price recorded in the last hour was: ${max_price:,.2f}
+        {summary}
 
-        The attached graph shows the price trend over this period.
+        The attached graphs show the price trend over this period.
 
         Best Regards,
         Your Bitcoin Price Tracker
         """
-        msg.attach(MIMEText(body, 'plain'))
-
-        # Attach the graph if available
-        try:
-            with open(graph_path, 'rb') as fp:
-                img = MIMEImage(fp.read())
-                img.add_header('Content-Disposition', 'attachment', filename=Path(graph_path).name)
-                msg.attach(img)
-        except IOError as e:
-            self.logger.error(f"Could not attach graph file: {e}")
-            return
+        # The MIME classes are only imported once there is something to send
+        from email.mime.image import MIMEImage
+        from email.mime.text import MIMEText
+        parts = [MIMEText(body, 'plain')]
+
+        # Attach the graphs if available; every part is encoded once and shared by all messages
+        for graph_path in graph_paths:
+            try:
+                with open(graph_path, 'rb') as fp:
+                    # SVG is not among the image types MIMEImage can detect
+                    subtype = 'svg+xml' if Path(graph_path).suffix.lower() == '.svg' else None
+                    img = MIMEImage(fp.read(), _subtype=subtype)
+                    img.add_header('Content-Disposition', 'attachment', filename=Path(graph_path).name)
+                    parts.append(img)
+            except IOError as e:
+                self.logger.error(f"Could not attach graph file: {e}")
+                return {recipient: False for recipient in recipients}
+
+        return await self._deliver(subject, recipients, parts)
+
+    async def send_alert_email(self, recipient_email, subject, body):
+        """Sends a plain-text alert over the same pooled connections; returns recipient -> delivered."""
+        from email.mime.text import MIMEText
+        return await self._deliver(subject, parse_recipients(recipient_email), [MIMEText(body, 'plain')])
+
+    async def _deliver(self, subject, recipients, parts):
+        """Queues one message per recipient and sends them with up to ``pool_size`` concurrent workers."""
+        outbox = asyncio.Queue()
+        for recipient in recipients:
+            outbox.put_nowait((recipient, self._build_message(subject, recipient, parts)))
+        results = {}
+        await asyncio.gather(*(self._drain_outbox(outbox, results)
+                               for _ in range(min(self.pool_size, len(recipients)))))
+        return {recipient: results[recipient] for recipient in recipients}
+
+    def _build_message(self, subject, recipient, parts):
+        from email.mime.multipart import MIMEMultipart
+        msg = MIMEMultipart()
+        msg['Subject'] = subject
+        msg['From'] = self.sender_email
+        msg['To'] = recipient
+        for part in parts:
+            msg.attach(part)
+        return msg
+
+    async def _drain_outbox(self, outbox, results):
+        """One delivery worker: sends queued messages until the outbox is empty."""
+        while not outbox.empty():
+            recipient, msg = outbox.get_nowait()
+            results[recipient] = await self._send_with_retry(msg, recipient)
 
+    async def _send_with_retry(self, msg, recipient_email):
         # Run email sending in a thread pool to avoid blocking
         loop = asyncio.get_running_loop()
-        try:
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with REGISTRY.timer('email_send_seconds', 'Time to send one report message'):
+                    await loop.run_in_executor(None, self._send_email_sync, msg, recipient_email)
+                REGISTRY.counter('emails_total', 'Report emails by outcome', outcome='sent').inc()
+                self.logger.info(f"Email report sent successfully to {recipient_email}")
+                return True
+            except Exception as e:
+                if not self._is_retriable(e) or attempt >= self.retry_policy.max_attempts:
+                    REGISTRY.counter('emails_total', 'Report emails by outcome', outcome='failed').inc()
+                    self.logger.critical(f"Failed to send email to {recipient_email}: {e}")
+                    self.logger.critical(f"Error type: {type(e).__name__}, Details: {str(e)}")
+                    return False
+                delay = self.retry_policy.backoff(attempt)
+                REGISTRY.counter('email_retries_total', 'Report email attempts that were retried').inc()
+                self.logger.warning(
+                    f"Attempt {attempt} to email {recipient_email} failed ({e}); retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
 
-            await loop.run_in_executor(None, self._send_email_sync, msg, recipient_email)
-            self.logger.info(f"Email report sent successfully to {recipient_email}")
-        except Exception as e:
-            self.logger.critical(f"Failed to send email: {e}")
-            self.logger.critical(f"Error type: {type(e).__name__}, Details: {str(e)}")
+    @staticmethod
+    def _is_retriable(error):
+        """Dropped connections, network errors and 4xx replies are transient; 5xx and auth errors are not."""
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(400 <= code < 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        # SMTPException derives from OSError; only plain socket errors remain retriable
+        return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
 
-    def _send_email_sync(self, msg, recipient_email):
-        """Synchronous email sending using standard smtplib"""
-        import smtplib
-        import ssl
+    @classmethod
+    def _format_stats(cls, symbol, snapshot, period='Hourly'):
+        """Renders one symbol's whole-run and rolling-window statistics as a text table."""
+        run = snapshot[RUN_WINDOW]
+        lines = [
+            f"{symbol}: the maximum price recorded in the last {describe_window(period)} was: "
+            f"{cls._format_price(symbol, run['max'])}",
+            f"        {'window':<8}{'max':>16}{'min':>16}{'mean':>16}{'twap':>16}{'stddev':>12}{'change':>10}",
+        ]
+        for name, values in snapshot.items():
+            if not values['count']:
+                continue
+            stddev = f"{values['stddev']:,.2f}" if values['stddev'] is not None else "-"
+            change = f"{values['pct_change']:+.2f}%" if values['pct_change'] is not None else "-"
+            lines.append(
+                f"        {name:<8}"
+                + "".join(f"{cls._format_price(symbol, values[key]):>16}" for key in ('max', 'min', 'mean', 'twap'))
+                + f"{stddev:>12}{change:>10}"
+            )
+        return "\n".join(lines)
 
-        context = ssl.create_default_context()
+    @staticmethod
+    def _format_price(symbol, price):
+        """Formats a price in the symbol's quote currency."""
+        quote = symbol.partition('-')[2]
+        return f"${price:,.2f}" if quote in ('', 'USD') else f"{price:,.2f} {quote}"
 
-        if self.port == 465:
-            # Use SSL connection directly
-            with smtplib.SMTP_SSL(self.smtp_server, self.port, context=context) as server:
-                server.login(self.sender_email, self.sender_password)
-                server.send_message(msg)
-        else:
-            # Use STARTTLS
-            with smtplib.SMTP(self.smtp_server, self.port) as server:
-                server.ehlo()
-                server.starttls(context=context)
-                server.ehlo()
-                server.login(self.sender_email, self.sender_password)
-                server.send_message(msg)
+    def _send_email_sync(self, msg, recipient_email):
+        """Sends one message over a pooled SMTP connection (blocking)."""
+        with self.pool.connection() as server:
+            server.send_message(msg, to_addrs=[recipient_email])
@@ -1,52 +1,174 @@
-import datetime as dt
+import time
 from pathlib import Path
-import matplotlib
-
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import numpy as np
+from config.app_config import DEFAULT_SYMBOL
+from downsampling import lttb, ohlc
+from metrics import REGISTRY
+from price_series import to_local_datetime64
 from utils.logger import setup_logger
 
 
+LINE = 'line'
+CANDLESTICK = 'candlestick'
+OUTPUT_FORMATS = ('png', 'svg')
+STYLE_SHEET = 'seaborn-v0_8-whitegrid'
+
+
+def describe_span(seconds):
+    """Human-readable duration for graph titles, e.g. '1 Hour', '45 Minutes', '3 Days'."""
+    if seconds >= 2 * 86400:
+        value, unit = round(seconds / 86400), 'Day'
+    elif seconds >= 0.9 * 3600:
+        value, unit = round(seconds / 3600), 'Hour'
+    else:
+        value, unit = max(1, round(seconds / 60)), 'Minute'
+    return f"{value} {unit}{'s' if value != 1 else ''}"
+
+
 class GraphGenerator:
-    """Generates a graph from the collected price data."""
+    """Generates a graph from the collected price data.
 
-    def __init__(self, filepath):
+    Large series are reduced before plotting, either to at most ``max_points``
+    samples with LTTB (line style) or to auto-sized OHLC buckets (candlestick
+    style), so rendering time stays roughly constant regardless of run length.
+
+    The figure, axes, date locator and line artist are built once and reused:
+    each graph only swaps the plotted data, title and price formatter. The
+    object-oriented Figure API is used instead of pyplot, so no global figure
+    state is shared; a single generator is still not meant to render from
+    several threads at once (see ``render_service`` for parallel rendering).
+    """
+
+    def __init__(self, filepath, style=LINE, max_points=1000, max_candles=120, output_format=None, dpi=100):
+        if style not in (LINE, CANDLESTICK):
+            raise ValueError(f"Unknown graph style '{style}', expected '{LINE}' or '{CANDLESTICK}'")
+        if output_format is not None and output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown graph format '{output_format}', expected one of {OUTPUT_FORMATS}")
         self.filepath = Path(filepath)
+        if output_format:
+            self.filepath = self.filepath.with_suffix(f'.{output_format}')
+        self.style = style
+        self.max_points = max_points
+        self.max_candles = max_candles
+        self.dpi = dpi
+        self._template = None
+        self._candles = []
         self.logger = setup_logger(__name__)
 
-    def generate_graph(self, data):
-        """Generates an hourly based and saves a line graph of Bitcoin prices."""
-        if not data:
+    def filepath_for(self, symbol, multi_symbol=False):
+        """Returns the graph path of a symbol; multi-symbol runs get one file per pair."""
+        if not multi_symbol:
+            return self.filepath
+        return self.filepath.with_name(f"{self.filepath.stem}_{symbol}{self.filepath.suffix}")
+
+    def warm_up(self):
+        """Builds the reusable figure template ahead of the first graph."""
+        self._get_template()
+
+    def _get_template(self):
+        if self._template is None:
+            # matplotlib is the slowest import of the application, so it is only loaded for the first graph
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.dates as mdates
+            import matplotlib.style
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            with matplotlib.style.context(STYLE_SHEET):
+                fig = Figure(figsize=(12, 7), dpi=self.dpi)
+                FigureCanvasAgg(fig)
+                ax = fig.add_subplot()
+                ax.xaxis_date()
+                line, = ax.plot([], [], linestyle='-', color='#0056b3')
+                ax.set_xlabel('Time', fontsize=12)
+
+                # Let the tick spacing and labels adapt to the plotted time span
+                locator = mdates.AutoDateLocator(minticks=5, maxticks=12)
+                ax.xaxis.set_major_locator(locator)
+                ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+            self._template = fig, ax, line
+        return self._template
+
+    def generate_graph(self, series, symbol=None, filepath=None):
+        """Generates and saves a line or candlestick graph of a PriceSeries; returns the path, or None on failure."""
+        if series is None or not len(series):
             self.logger.warning("No data provided to generate graph.")
-            return
+            return None
+        filepath = Path(filepath) if filepath else self.filepath
+        symbol = symbol or getattr(series, 'symbol', DEFAULT_SYMBOL)
+        base, _, quote = symbol.partition('-')
+        span = series.timestamps[-1] - series.timestamps[0]
+        started = time.perf_counter()
         try:
-            fig, ax = plt.subplots(figsize=(12, 7))
-            timestamps = [dt.datetime.fromisoformat(item['timestamp']) for item in data]
-            prices = [item['price'] for item in data]
-
-            plt.style.use('seaborn-v0_8-whitegrid')
+            fig, ax, line = self._get_template()
+            import matplotlib.style
+            from matplotlib.ticker import FuncFormatter
+            for artist in self._candles:
+                artist.remove()
+            self._candles = []
 
-            ax.plot(timestamps, prices, marker='.', linestyle='-', color='#0056b3')
+            if self.style == CANDLESTICK:
+                line.set_visible(False)
+                # Reset the data limits; the new candles extend them as they are added
+                ax.relim(visible_only=True)
+                self._plot_candlesticks(ax, series)
+            else:
+                self._plot_line(line, series)
+                ax.relim(visible_only=True)
+            ax.autoscale_view()
 
             # Set title and labels
-            date_str = timestamps[0].strftime('%d/%m/%Y')
-            ax.set_title(f'Bitcoin Price Index (BPI) Over 1 Hour - {date_str}', fontsize=16, weight='bold')
-            ax.set_xlabel('Time', fontsize=12)
-            ax.set_ylabel('Price (USD)', fontsize=12)
+            date_str = series.first_time().strftime('%d/%m/%Y')
+            title = 'Bitcoin Price Index (BPI)' if base == 'BTC' and quote == 'USD' else f'{symbol} Price'
+            ax.set_title(f'{title} Over {describe_span(span)} - {date_str}', fontsize=16, weight='bold')
+            ax.set_ylabel(f'Price ({quote or "USD"})', fontsize=12)
 
             # Format y-axis to show dollar amounts
-            ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: f'${x:,.2f}'))
+            prefix = '$' if quote in ('', 'USD') else ''
+            ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f'{prefix}{x:,.2f}'))
 
-            # Set x-axis to show ticks every 5 minutes
-            from matplotlib.dates import MinuteLocator, DateFormatter
-            ax.xaxis.set_major_locator(MinuteLocator(interval=5))
-            ax.xaxis.set_major_formatter(DateFormatter('%H:%M'))
-
-            plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
-
-            plt.tight_layout()
-            plt.savefig(self.filepath)
-            self.logger.info(f"Graph successfully saved to {self.filepath}")
-            plt.close(fig)
+            with matplotlib.style.context(STYLE_SHEET):
+                fig.tight_layout()
+                fig.savefig(filepath)
+            self.logger.info(f"Graph successfully saved to {filepath}")
+            return filepath
         except Exception as e:
             self.logger.error(f"Failed to generate graph: {e}")
+            return None
+        finally:
+            REGISTRY.histogram('graph_render_seconds', 'Time to render and save one graph',
+                               style=self.style).record(time.perf_counter() - started)
+
+    def _plot_line(self, line, series):
+        """Updates the template line with the series, reduced with LTTB when it exceeds ``max_points``."""
+        import matplotlib.dates as mdates
+        if len(series) > self.max_points:
+            keep = lttb(series.timestamps, series.prices, self.max_points)
+            timestamps, prices = series.timestamps[keep], series.prices[keep]
+            self.logger.info(f"Downsampled {len(series)} samples to {len(keep)} points with LTTB")
+        else:
+            timestamps, prices = series.timestamps, series.prices
+        line.set_data(mdates.date2num(to_local_datetime64(timestamps)), prices)
+        line.set_marker('.' if len(prices) <= 200 else 'None')
+        line.set_visible(True)
+
+    def _plot_candlesticks(self, ax, series):
+        """Plots auto-sized OHLC buckets as candlesticks."""
+        import matplotlib.dates as mdates
+        buckets = ohlc(series.timestamps, series.prices, target_buckets=self.max_candles)
+        self.logger.info(
+            f"Aggregated {len(series)} samples into {len(buckets.start)} "
+            f"{describe_span(buckets.bucket_seconds).lower()} candles"
+        )
+        width_days = buckets.bucket_seconds / 86400
+        x = mdates.date2num(to_local_datetime64(buckets.start)) + width_days / 2
+        rising = buckets.close >= buckets.open
+        colors = np.where(rising, '#2e7d32', '#c62828')
+        wicks = ax.vlines(x, buckets.low, buckets.high, colors=colors, linewidth=1)
+        bodies = np.abs(buckets.close - buckets.open)
+        # Give flat candles a visible sliver
+        bodies = np.maximum(bodies, (buckets.high.max() - buckets.low.min()) * 1e-3)
+        bars = ax.bar(x, bodies, width=width_days * 0.7, bottom=np.minimum(buckets.open, buckets.close),
+                      color=colors, edgecolor=colors)
+        self._candles = [wicks, *bars]
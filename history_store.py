@@ -0,0 +1,238 @@
+import math
+import sqlite3
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from price_series import PriceSeries
+from utils.logger import setup_logger
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+# Coarsest first; each level is rolled up from the one after it (minutes from raw samples)
+ROLLUP_RESOLUTIONS = (DAY, HOUR, MINUTE)
+
+OHLC = namedtuple('OHLC', ['start', 'open', 'high', 'low', 'close', 'count', 'mean'])
+RangeStats = namedtuple('RangeStats', ['count', 'open', 'high', 'low', 'close', 'mean', 'first_ts', 'last_ts'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    symbol TEXT NOT NULL,
+    ts REAL NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (symbol, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    symbol TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    open REAL NOT NULL,
+    high REAL NOT NULL,
+    low REAL NOT NULL,
+    close REAL NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    first_ts REAL NOT NULL,
+    last_ts REAL NOT NULL,
+    PRIMARY KEY (symbol, resolution, bucket)
+) WITHOUT ROWID;
+"""
+
+
+def _combine(parts):
+    """Merges time-ordered (open, high, low, close, count, total, first_ts, last_ts) rows into RangeStats."""
+    parts = [part for part in parts if part[4]]
+    if not parts:
+        return RangeStats(0, None, None, None, None, None, None, None)
+    count = sum(part[4] for part in parts)
+    return RangeStats(
+        count=count,
+        open=parts[0][0],
+        high=max(part[1] for part in parts),
+        low=min(part[2] for part in parts),
+        close=parts[-1][3],
+        mean=sum(part[5] for part in parts) / count,
+        first_ts=parts[0][6],
+        last_ts=parts[-1][7],
+    )
+
+
+class HistoryStore:
+    """Indexed price history in SQLite (WAL mode) with per-minute, hour and day OHLC rollups.
+
+    Raw samples are keyed by ``(symbol, ts)``, so a time-range read is an index
+    range scan. Every write batch also refreshes the rollup rows of the buckets
+    it touched (minutes from samples, hours from minutes, days from hours), so
+    aggregates over long ranges combine a few pre-computed rows instead of
+    scanning raw samples. WAL mode lets the ``query.py`` CLI read while the
+    tracker writes.
+
+    Writes are buffered and committed in batches of ``batch_size`` samples or
+    every ``flush_interval`` seconds, whichever comes first.
+    """
+
+    def __init__(self, path, batch_size=256, flush_interval=5.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.logger = setup_logger(__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def append(self, record):
+        """Queues one PriceRecord; the batch is committed when full or older than ``flush_interval``."""
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def extend(self, records, batch_size=10_000):
+        """Writes many records (e.g. an imported file) in large transactions; returns the count."""
+        count = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                count += self._write(batch)
+                batch = []
+        count += self._write(batch)
+        return count
+
+    def flush(self):
+        """Commits the queued samples and refreshes the affected rollups."""
+        pending, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        self._write(pending)
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def _write(self, records):
+        if not records:
+            return 0
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO samples (symbol, ts, price) VALUES (?, ?, ?)",
+                ((record.symbol, record.timestamp, record.price) for record in records)
+            )
+            touched = {}
+            for record in records:
+                touched.setdefault(record.symbol, set()).add(math.floor(record.timestamp / MINUTE))
+            for symbol, minutes in touched.items():
+                self._refresh_rollups(symbol, minutes)
+        return len(records)
+
+    def _refresh_rollups(self, symbol, minutes):
+        """Recomputes the minute, hour and day rows covering ``minutes`` from the level below."""
+        buckets = sorted(minutes)
+        child_resolution = None
+        for resolution in reversed(ROLLUP_RESOLUTIONS):
+            if child_resolution is not None:
+                buckets = sorted({bucket * child_resolution // resolution for bucket in buckets})
+            rows = []
+            for bucket in buckets:
+                start, end = bucket * resolution, (bucket + 1) * resolution
+                if child_resolution is None:
+                    samples = self.db.execute(
+                        "SELECT ts, price FROM samples WHERE symbol = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                        (symbol, start, end)).fetchall()
+                    prices = [price for _, price in samples]
+                    part = (prices[0], max(prices), min(prices), prices[-1], len(prices), sum(prices),
+                            samples[0][0], samples[-1][0]) if samples else None
+                else:
+                    part = _combine(self._rollup_rows(symbol, child_resolution, start // child_resolution,
+                                                      end // child_resolution))
+                    part = (part.open, part.high, part.low, part.close, part.count, part.mean * part.count,
+                            part.first_ts, part.last_ts) if part.count else None
+                if part:
+                    rows.append((symbol, resolution, bucket, *part))
+            self.db.executemany("INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            child_resolution = resolution
+
+    def _rollup_rows(self, symbol, resolution, first_bucket, end_bucket):
+        return self.db.execute(
+            "SELECT open, high, low, close, count, total, first_ts, last_ts FROM rollups "
+            "WHERE symbol = ? AND resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (symbol, resolution, first_bucket, end_bucket)
+        ).fetchall()
+
+    def symbols(self):
+        """Returns the stored symbols."""
+        return [symbol for symbol, in self.db.execute("SELECT DISTINCT symbol FROM rollups WHERE resolution = ?",
+                                                        (DAY,))]
+
+    def range(self, symbol, start, end):
+        """Returns the raw samples with ``start <= ts < end`` as a PriceSeries."""
+        rows = self.db.execute(
+            "SELECT ts, price FROM samples WHERE symbol = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (symbol, start, end)
+        ).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(-1, 2)
+        return PriceSeries.from_arrays(data[:, 0], data[:, 1], symbol)
+
+    def stats(self, symbol, start, end):
+        """Open/high/low/close/mean/count of ``start <= ts < end``, combining rollups with raw edge samples.
+
+        The range is split into whole days, then whole hours and minutes at its
+        edges, and only the sub-minute remainders are read from raw samples, so
+        the cost is bounded by a few hundred rows whatever the range length.
+        """
+        return _combine(self._stats_parts(symbol, start, end, 0))
+
+    def _stats_parts(self, symbol, start, end, level):
+        if start >= end:
+            return []
+        if level == len(ROLLUP_RESOLUTIONS):
+            row = self.db.execute(
+                "SELECT count(*), max(price), min(price), sum(price), min(ts), max(ts) FROM samples "
+                "WHERE symbol = ? AND ts >= ? AND ts < ?", (symbol, start, end)
+            ).fetchone()
+            count, high, low, total, first_ts, last_ts = row
+            if not count:
+                return []
+            open_price, = self.db.execute("SELECT price FROM samples WHERE symbol = ? AND ts = ?",
+                                          (symbol, first_ts)).fetchone()
+            close_price, = self.db.execute("SELECT price FROM samples WHERE symbol = ? AND ts = ?",
+                                           (symbol, last_ts)).fetchone()
+            return [(open_price, high, low, close_price, count, total, first_ts, last_ts)]
+        resolution = ROLLUP_RESOLUTIONS[level]
+        first_bucket, end_bucket = math.ceil(start / resolution), math.floor(end / resolution)
+        if first_bucket >= end_bucket:
+            return self._stats_parts(symbol, start, end, level + 1)
+        return (
+            self._stats_parts(symbol, start, first_bucket * resolution, level + 1)
+            + self._rollup_rows(symbol, resolution, first_bucket, end_bucket)
+            + self._stats_parts(symbol, end_bucket * resolution, end, level + 1)
+        )
+
+    def ohlc(self, symbol, start, end, resolution=HOUR):
+        """Returns the pre-aggregated candles of a resolution (MINUTE, HOUR or DAY) overlapping the range."""
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unsupported rollup resolution {resolution}s, expected one of {ROLLUP_RESOLUTIONS}")
+        rows = self.db.execute(
+            "SELECT bucket, open, high, low, close, count, total FROM rollups "
+            "WHERE symbol = ? AND resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (symbol, resolution, math.floor(start / resolution), math.ceil(end / resolution))
+        )
+        return [OHLC(bucket * resolution, o, h, l, c, count, total / count)
+                for bucket, o, h, l, c, count, total in rows]
+
+    def import_records(self, records):
+        """Loads PriceRecords (e.g. from ``storage_backends.read_records``) and logs the count."""
+        count = self.extend(records)
+        self.logger.info(f"Imported {count} records into {self.path}")
+        return count
@@ -1,12 +1,33 @@
+import argparse
+import signal
 import sys
 from config.app_config import load_configuration
-from utils.logger import setup_logger
+from utils.logger import configure_logging, setup_logger
 from business_logic import BusinessLogic
 import asyncio
 
 
-async def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Track crypto prices and email graph reports.")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Run continuously and report on every REPORT_WINDOW boundary (same as RUN_MODE=daemon)")
+    return parser.parse_args(argv)
+
+
+def stop_on_signals(stop):
+    """Sets ``stop`` on SIGTERM or SIGINT so the daemon can flush storage before exiting."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Not supported by the Windows event loop; Ctrl+C still raises KeyboardInterrupt there
+            pass
+
+
+async def main(argv=None):
     """Main function to run the Bitcoin tracker application."""
+    args = parse_args(argv)
     # Configure the root logger first
     logger = setup_logger(__name__)
     logger.info("Starting Bitcoin Tracker Application")
@@ -15,8 +36,21 @@ async def main():
     if config is None:
         sys.exit(1)
 
+    configure_logging(
+        level=config.log_level,
+        log_dir=config.log_dir,
+        max_bytes=config.log_max_bytes,
+        backup_count=config.log_backup_count,
+        sample_rate=config.log_sample_rate
+    )
+
     tracker = BusinessLogic(config)
-    await tracker.run_tracker()
+    if args.daemon or config.run_mode == 'daemon':
+        stop = asyncio.Event()
+        stop_on_signals(stop)
+        await tracker.run_daemon(stop)
+    else:
+        await tracker.run_tracker()
 
 
 if __name__ == "__main__":
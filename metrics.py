@@ -0,0 +1,244 @@
+import threading
+import time
+
+from utils.logger import setup_logger
+
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """HDR-style latency histogram with bounded relative error and O(1) recording.
+
+    Values (seconds) are stored as integer multiples of ``resolution``. Below
+    ``2**precision_bits`` units every value has its own bucket; above that,
+    each power of two is split into ``2**(precision_bits - 1)`` linear
+    sub-buckets, so a quantile is accurate to within ``2**(1 - precision_bits)``
+    (about 1.6% with the default 7 bits) whatever the range of the values.
+    """
+
+    def __init__(self, precision_bits=7, resolution=1e-6):
+        self.sub_bits = precision_bits
+        self.sub_count = 1 << precision_bits
+        self.resolution = resolution
+        self.counts = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def _index(self, units):
+        shift = units.bit_length() - self.sub_bits
+        if shift <= 0:
+            return units
+        half = self.sub_count >> 1
+        return self.sub_count + (shift - 1) * half + (units >> shift) - half
+
+    def _upper_bound(self, index):
+        """Highest value (in units) that falls into bucket ``index``."""
+        if index < self.sub_count:
+            return index
+        half = self.sub_count >> 1
+        shift, offset = divmod(index - self.sub_count, half)
+        shift += 1
+        return ((half + offset + 1) << shift) - 1
+
+    def record(self, seconds):
+        units = max(0, int(seconds / self.resolution))
+        index = self._index(units)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+            if self.max is None or seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        """Returns the value below which a fraction ``q`` of the recordings fall, or None if empty."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, round(q * self.count))
+            seen = 0
+            for index in sorted(self.counts):
+                seen += self.counts[index]
+                if seen >= rank:
+                    return min(self._upper_bound(index) * self.resolution, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+
+class Timer:
+    """Context manager recording the elapsed wall time of its block into a histogram."""
+
+    __slots__ = ('histogram', 'started', 'elapsed')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.started = None
+        self.elapsed = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.started
+        self.histogram.record(self.elapsed)
+        return False
+
+
+class MetricsRegistry:
+    """Named, labelled counters and histograms, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def _get(self, family, name, help_text, labels, factory):
+        key = _label_key(labels)
+        metric = family.get(name, {}).get(key)
+        if metric is None:
+            with self._lock:
+                series = family.setdefault(name, {})
+                metric = series.get(key)
+                if metric is None:
+                    metric = series[key] = factory()
+                if help_text:
+                    self._help.setdefault(name, help_text)
+        return metric
+
+    def counter(self, name, help_text='', **labels):
+        """Returns the counter ``name`` with the given labels, creating it on first use."""
+        return self._get(self._counters, name, help_text, labels, Counter)
+
+    def histogram(self, name, help_text='', **labels):
+        """Returns the histogram ``name`` with the given labels, creating it on first use."""
+        return self._get(self._histograms, name, help_text, labels, Histogram)
+
+    def timer(self, name, help_text='', **labels):
+        """Returns a context manager timing its block into histogram ``name``."""
+        return Timer(self.histogram(name, help_text, **labels))
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._help.clear()
+
+    def render_prometheus(self):
+        """Renders every metric in the Prometheus text exposition format (histograms as summaries)."""
+        lines = []
+        for name, series in sorted(self._counters.items()):
+            lines.extend(self._header(name, 'counter'))
+            for key, counter in list(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {counter.value}")
+        for name, series in sorted(self._histograms.items()):
+            lines.extend(self._header(name, 'summary'))
+            for key, histogram in list(series.items()):
+                for q in SUMMARY_QUANTILES:
+                    value = histogram.quantile(q)
+                    lines.append(f"{name}{_format_labels(key, [('quantile', q)])} "
+                                 f"{'NaN' if value is None else repr(value)}")
+                lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum!r}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, name, kind):
+        if name in self._help:
+            yield f"# HELP {name} {self._help[name]}"
+        yield f"# TYPE {name} {kind}"
+
+    def summary_lines(self):
+        """Human-readable one-line summaries of every metric, for the end-of-run log."""
+        lines = []
+        for name, series in sorted(self._histograms.items()):
+            for key, histogram in list(series.items()):
+                if not histogram.count:
+                    continue
+                p50, p90, p99 = (histogram.quantile(q) * 1000 for q in (0.5, 0.9, 0.99))
+                lines.append(
+                    f"{name}{_format_labels(key)}: n={histogram.count} p50={p50:.2f}ms p90={p90:.2f}ms "
+                    f"p99={p99:.2f}ms max={histogram.max * 1000:.2f}ms"
+                )
+        for name, series in sorted(self._counters.items()):
+            for key, counter in list(series.items()):
+                lines.append(f"{name}{_format_labels(key)}: {counter.value}")
+        return lines
+
+
+REGISTRY = MetricsRegistry()
+
+
+class MetricsServer:
+    """Serves a registry on ``/metrics`` from a local aiohttp server for Prometheus to scrape."""
+
+    def __init__(self, registry=REGISTRY, host='127.0.0.1', port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+        self.logger = setup_logger(__name__)
+
+    async def start(self):
+        # The aiohttp server side is only imported when metrics are actually served
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the real port when an ephemeral one (0) was requested
+        self.port = self._runner.addresses[0][1]
+        self.logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            runner, self._runner = self._runner, None
+            await runner.cleanup()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def _handle_metrics(self, request):
+        from aiohttp import web
+        return web.Response(body=self.registry.render_prometheus().encode(),
+                            headers={'Content-Type': PROMETHEUS_CONTENT_TYPE})
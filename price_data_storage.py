@@ -1,33 +1,153 @@
-import json
-
+import math
+import sqlite3
 from pathlib import Path
+from config.app_config import DEFAULT_SYMBOL
+from history_store import HistoryStore
+from metrics import REGISTRY
+from price_series import PriceSeries
+from rolling_stats import RUN_WINDOW, StatsEngine
+from storage_backends import PriceRecord, open_backend, read_records, to_epoch
 from utils.logger import setup_logger
 
 
 class DataStorage:
-    """Handles storage of the price data."""
+    """Handles storage of the price data for one or more currency pairs.
+
+    Every sample is appended to an on-disk backend (NDJSON, binary records or
+    the legacy JSON array) as it arrives, so a crash loses at most the samples
+    that were not yet fsynced instead of the whole run. In memory each symbol
+    is held as a columnar ``PriceSeries`` of epoch timestamps and prices, and
+    every sample also feeds the incremental ``StatsEngine`` so report figures
+    are available in O(1). With ``max_memory_samples`` only the newest samples
+    of each symbol stay in memory; ``series_between`` reads a report range
+    back from disk when memory no longer holds all of it. When ``history_db`` is given, samples are also
+    written to an indexed ``HistoryStore`` that outlives the run and answers
+    time-range queries. Callables in ``listeners`` are called with
+    ``(symbol, epoch, price)`` for every stored sample.
+    """
 
-    def __init__(self, filepath):
-        self.filepath = Path(filepath)
-        self.data = []
+    def __init__(self, filepath, storage_format='ndjson', fsync_every=32, windows=None, history_db=None,
+                 max_memory_samples=None):
+        self.backend = open_backend(filepath, storage_format, fsync_every=fsync_every)
+        self.filepath = self.backend.filepath
+        self.history = HistoryStore(history_db) if history_db else None
+        self.listeners = []
+        self.data = {}
+        # The legacy JSON array is only written on close, so its samples cannot be read back mid-run
+        self.max_memory_samples = max_memory_samples if storage_format != 'json' else None
+        # Symbol -> epoch from which memory holds every sample / of the first sample of this run
+        self._memory_start = {}
+        self._run_start = {}
+        self.stats = StatsEngine(windows)
         self.logger = setup_logger(__name__)
 
-    def store_price(self, timestamp, price):
-        """Adds a new price entry to the data list."""
-        self.data.append({'timestamp': timestamp, 'price': price})
-        self.logger.info(f"Stored price: ${price:,.2f} at {timestamp}")
+    @property
+    def symbols(self):
+        """Returns the symbols that have at least one stored price."""
+        return list(self.data)
+
+    def _remember(self, symbol, epoch, price):
+        """Appends a sample to the in-memory series, trimming it to ``max_memory_samples``."""
+        series = self.data.get(symbol)
+        if series is None:
+            series = self.data[symbol] = PriceSeries(symbol)
+            self._run_start[symbol] = epoch
+        series.append(epoch, price)
+        limit = self.max_memory_samples
+        # Trimming only once the series is twice the limit keeps appends amortized O(1)
+        if limit and len(series) >= 2 * limit:
+            cutoff = float(series.timestamps[-limit])
+            series.discard_before(cutoff)
+            self._memory_start[symbol] = cutoff
+
+    def store_price(self, timestamp, price, symbol=DEFAULT_SYMBOL):
+        """Appends a sample to the symbol's series and to disk; timestamp may be datetime, ISO or epoch."""
+        epoch = to_epoch(timestamp)
+        self._remember(symbol, epoch, price)
+        self.stats.update(symbol, epoch, price)
+        try:
+            with REGISTRY.timer('storage_write_seconds', 'Time to append one sample to the on-disk store'):
+                record = PriceRecord(epoch, symbol, price)
+                self.backend.append(record)
+                if self.history:
+                    self.history.append(record)
+        except (IOError, sqlite3.Error, ValueError) as e:
+            REGISTRY.counter('storage_write_errors_total', 'Samples that could not be written to disk').inc()
+            self.logger.error(f"Error appending price to {self.filepath}: {e}")
+        REGISTRY.counter('samples_stored_total', 'Price samples stored', symbol=symbol).inc()
+        for listener in self.listeners:
+            listener(symbol, epoch, price)
+        self.logger.info("Stored %s price: %.2f at %s", symbol, price, timestamp)
+
+    def store_batch(self, timestamp, prices):
+        """Stores a batch of prices keyed by symbol, skipping failed (None) entries."""
+        for symbol, price in prices.items():
+            if price is not None:
+                self.store_price(timestamp, price, symbol)
+
+    def get_prices(self, symbol=DEFAULT_SYMBOL):
+        """Returns the PriceSeries of a single symbol (empty if nothing was stored)."""
+        series = self.data.get(symbol)
+        return series if series is not None else PriceSeries(symbol, capacity=1)
+
+    def series_between(self, symbol, start=None, end=None):
+        """Returns this run's samples of a symbol with ``start <= timestamp < end`` as a PriceSeries.
+
+        The range is served from memory while memory still holds all of it,
+        and streamed from disk otherwise.
+        """
+        if symbol not in self._run_start:
+            return self.get_prices(symbol)
+        start = self._run_start[symbol] if start is None else to_epoch(start)
+        end = math.inf if end is None else to_epoch(end)
+        if start >= self._memory_start.get(symbol, -math.inf):
+            return self.get_prices(symbol).between(start, end)
+        self.logger.info(f"Reading {symbol} samples from {self.filepath}; they are no longer held in memory")
+        return PriceSeries.from_records(
+            (record for record in self.iter_history(symbol) if start <= record.timestamp < end), symbol
+        )
+
+    def iter_history(self, symbol=None, filepath=None):
+        """Streams records from disk (this run's file by default) without loading them all."""
+        self.backend.sync()
+        return read_records(Path(filepath) if filepath else self.filepath, symbol)
+
+    def discard_before(self, timestamp):
+        """Frees in-memory samples older than ``timestamp`` (epoch or datetime); they stay on disk."""
+        cutoff = to_epoch(timestamp)
+        dropped = 0
+        for symbol, series in self.data.items():
+            dropped += series.discard_before(cutoff)
+            self._memory_start[symbol] = max(self._memory_start.get(symbol, cutoff), cutoff)
+        if dropped:
+            self.logger.debug("Discarded %d in-memory samples older than %s", dropped, timestamp)
+        return dropped
+
+    def import_file(self, filepath):
+        """Loads an existing price file (including legacy bitcoin_price_data.json) into memory."""
+        count = 0
+        for record in read_records(filepath):
+            self._remember(record.symbol, record.timestamp, record.price)
+            self.stats.update(record.symbol, record.timestamp, record.price)
+            count += 1
+        self.logger.info(f"Imported {count} records from {filepath}")
+        return count
 
     def save_to_json(self):
-        """Saves the collected data to a JSON file along with relevant timestamp."""
+        """Flushes all pending samples to disk and closes the store."""
         try:
-            with open(self.filepath, 'w') as f:
-                json.dump(self.data, f, indent=4)
+            self.backend.close()
+            if self.history:
+                self.history.close()
             self.logger.info(f"Data successfully saved to {self.filepath}")
-        except IOError as e:
-            self.logger.error(f"Error saving data to JSON file: {e}")
-
-    def get_max_price(self):
-        """Returns the maximum price from the collected data."""
-        if not self.data:
-            return None
-        return max(item['price'] for item in self.data)
+        except (IOError, sqlite3.Error) as e:
+            self.logger.error(f"Error saving data to {self.filepath}: {e}")
+
+    def get_max_price(self, symbol=DEFAULT_SYMBOL):
+        """Returns the maximum price from the collected data of a symbol."""
+        window = self.stats.window(symbol, RUN_WINDOW)
+        return window.max if window else None
+
+    def get_max_prices(self):
+        """Returns the maximum price of every stored symbol."""
+        return {symbol: self.get_max_price(symbol) for symbol in self.data}
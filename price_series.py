@@ -0,0 +1,163 @@
+import datetime as dt
+
+import numpy as np
+
+from config.app_config import DEFAULT_SYMBOL
+
+
+class PriceSeries:
+    """Compact columnar series of (epoch timestamp, price) samples for one symbol.
+
+    Samples live in two parallel float64 NumPy buffers (16 bytes per sample)
+    that grow geometrically, so ``append`` is amortized O(1). Slicing returns
+    a new series that shares the underlying buffers (no copy), and min/max/mean
+    are vectorized over the populated region.
+    """
+
+    __slots__ = ('symbol', '_timestamps', '_prices', '_size')
+
+    def __init__(self, symbol=DEFAULT_SYMBOL, capacity=1024):
+        self.symbol = symbol
+        self._timestamps = np.empty(max(capacity, 1), dtype=np.float64)
+        self._prices = np.empty(max(capacity, 1), dtype=np.float64)
+        self._size = 0
+
+    @classmethod
+    def from_arrays(cls, timestamps, prices, symbol=DEFAULT_SYMBOL):
+        """Wraps existing arrays (viewed, not copied, when already contiguous float64)."""
+        series = cls.__new__(cls)
+        series.symbol = symbol
+        series._timestamps = np.ascontiguousarray(timestamps, dtype=np.float64)
+        series._prices = np.ascontiguousarray(prices, dtype=np.float64)
+        if series._timestamps.shape != series._prices.shape:
+            raise ValueError("timestamps and prices must have the same length")
+        series._size = len(series._timestamps)
+        return series
+
+    @classmethod
+    def from_records(cls, records, symbol=DEFAULT_SYMBOL):
+        """Builds a series from an iterable of PriceRecords, e.g. a streaming file reader."""
+        series = cls(symbol)
+        for record in records:
+            series.append(record.timestamp, record.price)
+        return series
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"PriceSeries({self.symbol!r}, {self._size} samples)"
+
+    def __getitem__(self, index):
+        """Integer indexing returns ``(timestamp, price)``; slicing returns a zero-copy series."""
+        if isinstance(index, slice):
+            return PriceSeries.from_arrays(self.timestamps[index], self.prices[index], self.symbol)
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("PriceSeries index out of range")
+        return float(self._timestamps[index]), float(self._prices[index])
+
+    @property
+    def timestamps(self):
+        """Read-only view of the epoch timestamps."""
+        view = self._timestamps[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def prices(self):
+        """Read-only view of the prices."""
+        view = self._prices[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def append(self, timestamp, price):
+        """Appends one sample; the buffers double in size when full."""
+        if self._size == len(self._timestamps):
+            self._grow(self._size + 1)
+        self._timestamps[self._size] = timestamp
+        self._prices[self._size] = price
+        self._size += 1
+
+    def extend(self, timestamps, prices):
+        """Appends many samples at once."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        end = self._size + len(timestamps)
+        if end > len(self._timestamps):
+            self._grow(end)
+        self._timestamps[self._size:end] = timestamps
+        self._prices[self._size:end] = prices
+        self._size = end
+
+    def _grow(self, minimum):
+        capacity = max(minimum, 2 * len(self._timestamps))
+        # Fresh buffers: views handed out earlier keep pointing at the old ones
+        timestamps = np.empty(capacity, dtype=np.float64)
+        prices = np.empty(capacity, dtype=np.float64)
+        timestamps[:self._size] = self._timestamps[:self._size]
+        prices[:self._size] = self._prices[:self._size]
+        self._timestamps, self._prices = timestamps, prices
+
+    def discard_before(self, timestamp):
+        """Drops samples older than ``timestamp`` (timestamps must be sorted); returns how many were dropped.
+
+        The kept samples move to fresh buffers, so slices handed out earlier stay valid.
+        """
+        cut = int(np.searchsorted(self.timestamps, timestamp, side='left'))
+        if cut:
+            keep = self._size - cut
+            capacity = max(1024, 2 * keep)
+            timestamps = np.empty(capacity, dtype=np.float64)
+            prices = np.empty(capacity, dtype=np.float64)
+            timestamps[:keep] = self._timestamps[cut:self._size]
+            prices[:keep] = self._prices[cut:self._size]
+            self._timestamps, self._prices, self._size = timestamps, prices, keep
+        return cut
+
+    def between(self, start, end):
+        """Zero-copy slice of samples with ``start <= timestamp < end`` (timestamps must be sorted)."""
+        timestamps = self.timestamps
+        lo = np.searchsorted(timestamps, start, side='left')
+        hi = np.searchsorted(timestamps, end, side='left')
+        return self[lo:hi]
+
+    def max(self):
+        return float(self.prices.max()) if self._size else None
+
+    def min(self):
+        return float(self.prices.min()) if self._size else None
+
+    def mean(self):
+        return float(self.prices.mean()) if self._size else None
+
+    def first_time(self):
+        """Datetime of the first sample, or None when empty."""
+        return dt.datetime.fromtimestamp(self._timestamps[0]) if self._size else None
+
+    def last_time(self):
+        """Datetime of the last sample, or None when empty."""
+        return dt.datetime.fromtimestamp(self._timestamps[self._size - 1]) if self._size else None
+
+    def as_datetime64(self):
+        """Timestamps as naive local-time ``datetime64[us]`` values, ready for plotting."""
+        return to_local_datetime64(self.timestamps)
+
+
+def to_local_datetime64(timestamps):
+    """Converts epoch seconds to naive local-time ``datetime64[us]`` values."""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if not len(timestamps):
+        return np.empty(0, dtype='datetime64[us]')
+    offsets = {_utc_offset(timestamps[0]), _utc_offset(timestamps[-1])}
+    if len(offsets) == 1:
+        local = timestamps + offsets.pop()
+    else:
+        # The timestamps span a DST change; resolve the offset per sample
+        local = timestamps + np.fromiter((_utc_offset(t) for t in timestamps), np.float64, len(timestamps))
+    return (local * 1e6).astype('datetime64[us]')
+
+
+def _utc_offset(timestamp):
+    return dt.datetime.fromtimestamp(timestamp).astimezone().utcoffset().total_seconds()
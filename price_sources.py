@@ -0,0 +1,150 @@
+from resilience import LatencyTracker
+from utils import codec
+
+PARSERS = {}
+SYMBOL_FORMATTERS = {}
+QUOTE_PATHS = {}
+
+
+def register_parser(name, symbol_formatter=None, path=None):
+    """Registers a response parser (decoded JSON -> float price) and the exchange's pair naming.
+
+    ``path`` is the key path of the price in the response (e.g. ``('price',)``)
+    for exchanges with a fixed layout; their responses are then decoded and
+    validated in one step by ``codec.path_decoder``.
+    """
+    def decorator(parser):
+        PARSERS[name] = parser
+        SYMBOL_FORMATTERS[name] = symbol_formatter or (lambda symbol: symbol)
+        if path:
+            QUOTE_PATHS[name] = path
+        return parser
+    return decorator
+
+
+def to_price(value):
+    """Converts a quoted price (number or numeric string) to float; raises ValueError for anything else."""
+    # bool is an int subclass, but ``"amount": true`` is not a price
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"Expected a price, got {value!r}")
+    return float(value)
+
+
+def _split(symbol):
+    base, _, quote = symbol.upper().partition('-')
+    return base, quote
+
+
+@register_parser('coinbase', path=('data', 'amount'))
+def parse_coinbase(data):
+    """``{"data": {"base": "BTC", "currency": "USD", "amount": "105565.74"}}``"""
+    return to_price(data['data']['amount'])
+
+
+@register_parser('kraken', lambda symbol: ''.join(
+    'XBT' if part == 'BTC' else part for part in _split(symbol)))
+def parse_kraken(data):
+    """``{"error": [], "result": {"XXBTZUSD": {"c": ["105565.7", "0.01"], ...}}}``"""
+    if data.get('error'):
+        raise ValueError(f"Kraken error: {', '.join(data['error'])}")
+    ticker, = data['result'].values()
+    return to_price(ticker['c'][0])
+
+
+@register_parser('binance', lambda symbol: ''.join(
+    'USDT' if part == 'USD' else part for part in _split(symbol)), path=('price',))
+def parse_binance(data):
+    """``{"symbol": "BTCUSDT", "price": "105565.74000000"}``"""
+    return to_price(data['price'])
+
+
+@register_parser('bitstamp', lambda symbol: ''.join(_split(symbol)).lower(), path=('last',))
+def parse_bitstamp(data):
+    """``{"last": "105565.74", "bid": ..., "ask": ...}``"""
+    return to_price(data['last'])
+
+
+PRESET_URLS = {
+    'coinbase': 'https://api.coinbase.com/v2/prices/{symbol}/spot',
+    'kraken': 'https://api.kraken.com/0/public/Ticker?pair={symbol}',
+    'binance': 'https://api.binance.com/api/v3/ticker/price?symbol={symbol}',
+    'bitstamp': 'https://www.bitstamp.net/api/v2/ticker/{symbol}/',
+}
+
+
+class SourceStats:
+    """Per-source request, error and latency counters; ``wins`` counts ticks whose result used this source."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+        self.last_latency = None
+        self.total_latency = 0.0
+
+    def record(self, latency, ok):
+        self.requests += 1
+        self.last_latency = latency
+        self.total_latency += latency
+        if not ok:
+            self.errors += 1
+
+    @property
+    def mean_latency(self):
+        return self.total_latency / self.requests if self.requests else None
+
+    def snapshot(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'wins': self.wins,
+            'last_latency': self.last_latency,
+            'mean_latency': self.mean_latency,
+        }
+
+
+class PriceSource:
+    """One exchange endpoint: URL template, response parser and pair naming."""
+
+    def __init__(self, name, url, parser=None):
+        parser = parser or name
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown price parser '{parser}', expected one of {sorted(PARSERS)}")
+        self.name = name
+        self.url = url
+        self.parse = PARSERS[parser]
+        self._decode_quote = codec.path_decoder(QUOTE_PATHS[parser]) if parser in QUOTE_PATHS else None
+        self._format_symbol = SYMBOL_FORMATTERS[parser]
+        self.stats = SourceStats()
+        self.latency = LatencyTracker()
+
+    def __repr__(self):
+        return f"PriceSource({self.name!r}, {self.url!r})"
+
+    def decode(self, body):
+        """Decodes a raw response body straight to the price; raises KeyError/ValueError on bad payloads."""
+        try:
+            if self._decode_quote is not None:
+                return to_price(self._decode_quote(body))
+            return self.parse(codec.loads(body))
+        except codec.SchemaError as e:
+            # A payload of the wrong shape is rejected, naming the key the way a KeyError would
+            raise ValueError(str(e).replace('`', "'")) from None
+        except (TypeError, IndexError, AttributeError) as e:
+            # Indexing into the wrong kind of document, e.g. '"data": "oops"' or a top-level list
+            raise ValueError(f"Unexpected {self.name} payload: {e}") from None
+
+    def url_for(self, symbol):
+        """Returns the endpoint URL for the given currency pair in this exchange's naming."""
+        return self.url.format(symbol=self._format_symbol(symbol)) if '{symbol}' in self.url else self.url
+
+
+def build_sources(names, api_url=None):
+    """Builds PriceSources from preset names; ``api_url`` overrides the Coinbase endpoint."""
+    sources = []
+    for name in names:
+        if name not in PRESET_URLS:
+            raise ValueError(f"Unknown price source '{name}', expected one of {sorted(PRESET_URLS)}")
+        url = api_url if name == 'coinbase' and api_url else PRESET_URLS[name]
+        sources.append(PriceSource(name, url))
+    return sources
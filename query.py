@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from config.app_config import DEFAULT_SYMBOL
+from history_store import DAY, HOUR, MINUTE, HistoryStore
+from storage_backends import read_records, to_epoch, to_iso
+
+RESOLUTIONS = {'1m': MINUTE, '1h': HOUR, '1d': DAY}
+
+
+def parse_time(raw):
+    """Accepts epoch seconds or a local-time ISO-8601 string such as 2024-01-15T14:00."""
+    try:
+        return float(raw)
+    except ValueError:
+        return to_epoch(raw)
+
+
+def parse_args(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Query the indexed price history (HISTORY_DB).")
+    parser.add_argument('--db', default=os.getenv("HISTORY_DB") or "data/price_history.db",
+                        help="History database path (default: HISTORY_DB or data/price_history.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_range_command(name, help_text):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('start', type=parse_time, help="Range start, epoch or ISO-8601 (inclusive)")
+        command.add_argument('end', type=parse_time, help="Range end, epoch or ISO-8601 (exclusive)")
+        command.add_argument('--symbol', default=DEFAULT_SYMBOL)
+        return command
+
+    add_range_command('range', "Print the raw samples of a time range")
+    add_range_command('stats', "Print open/high/low/close/mean of a time range")
+    ohlc = add_range_command('ohlc', "Print pre-aggregated candles of a time range")
+    ohlc.add_argument('--resolution', choices=RESOLUTIONS, default='1h')
+    load = commands.add_parser('import', help="Load price files (any storage format) into the history")
+    load.add_argument('files', nargs='+')
+    commands.add_parser('symbols', help="List the stored symbols")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with HistoryStore(args.db) as store:
+        if args.command == 'range':
+            series = store.range(args.symbol, args.start, args.end)
+            for timestamp, price in zip(series.timestamps, series.prices):
+                print(f"{to_iso(timestamp)}  {price:.2f}")
+        elif args.command == 'stats':
+            stats = store.stats(args.symbol, args.start, args.end)
+            if not stats.count:
+                print(f"No {args.symbol} samples between {to_iso(args.start)} and {to_iso(args.end)}")
+                return 1
+            print(f"{args.symbol} {to_iso(stats.first_ts)} .. {to_iso(stats.last_ts)} ({stats.count} samples)")
+            print(f"open {stats.open:.2f}  high {stats.high:.2f}  low {stats.low:.2f}  "
+                  f"close {stats.close:.2f}  mean {stats.mean:.2f}")
+        elif args.command == 'ohlc':
+            for candle in store.ohlc(args.symbol, args.start, args.end, RESOLUTIONS[args.resolution]):
+                print(f"{to_iso(candle.start)}  O {candle.open:.2f}  H {candle.high:.2f}  L {candle.low:.2f}  "
+                      f"C {candle.close:.2f}  n={candle.count}")
+        elif args.command == 'import':
+            for filepath in args.files:
+                print(f"{filepath}: {store.import_records(read_records(filepath))} records")
+        elif args.command == 'symbols':
+            print("\n".join(store.symbols()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
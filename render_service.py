@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from graph_generator import LINE, GraphGenerator
+from metrics import REGISTRY
+from price_series import PriceSeries
+from utils.logger import forward_logging, listen_for_workers, setup_logger
+
+# Per-worker generator holding the prepared figure template
+_generator = None
+
+
+def _init_worker(options, records, level):
+    global _generator
+    forward_logging(records, level)
+    _generator = GraphGenerator(**options)
+    _generator.warm_up()
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def _render_in_worker(symbol, timestamps, prices, filepath):
+    series = PriceSeries.from_arrays(timestamps, prices, symbol)
+    return _generator.generate_graph(series, symbol, filepath)
+
+
+class RenderService:
+    """Renders graphs in a pool of worker processes that keep a prepared figure template.
+
+    Matplotlib is not thread-safe and holds the GIL while drawing, so instead
+    of the event loop's default thread pool each worker process imports
+    matplotlib and builds a ``GraphGenerator`` figure template once, in the
+    pool initializer, and afterwards only swaps the plotted data. Graphs of
+    several symbols (or several reports) render in parallel, one per worker.
+
+    ``workers=0`` renders in-process, one graph at a time on a single helper
+    thread. Workers are started with ``spawn`` by default because the parent
+    already runs threads (logging listener, executors) that ``fork`` would not
+    copy safely.
+    """
+
+    def __init__(self, filepath, style=LINE, max_points=1000, output_format=None, workers=2, dpi=100,
+                 mp_context='spawn'):
+        self.options = {
+            'filepath': filepath,
+            'style': style,
+            'max_points': max_points,
+            'output_format': output_format,
+            'dpi': dpi,
+        }
+        self.generator = GraphGenerator(**self.options)
+        self.workers = workers
+        self.mp_context = mp_context
+        self._executor = None
+        self._log_listener = None
+        self.logger = setup_logger(__name__)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def filepath_for(self, symbol, multi_symbol=False):
+        """Returns the graph path of a symbol, with the configured output format's suffix."""
+        return self.generator.filepath_for(symbol, multi_symbol)
+
+    async def start(self):
+        """Starts the worker processes and waits until their templates are ready."""
+        if self._executor is not None:
+            return
+        if not self.workers:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='graph-render')
+            return
+        context = multiprocessing.get_context(self.mp_context)
+        records = context.Queue()
+        self._log_listener = listen_for_workers(records)
+        self._executor = ProcessPoolExecutor(
+            self.workers, mp_context=context, initializer=_init_worker,
+            initargs=(self.options, records, logging.getLogger().getEffectiveLevel())
+        )
+        # Spawn every worker now so the first report does not pay for process start-up and imports
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _worker_ready)
+                                      for _ in range(self.workers)))
+        self.logger.info(f"Started {len(set(pids))} graph render worker(s)")
+
+    async def render(self, series, symbol=None, filepath=None):
+        """Renders one graph; returns the saved path, or None if rendering failed."""
+        await self.start()
+        loop = asyncio.get_running_loop()
+        symbol = symbol or series.symbol
+        with REGISTRY.timer('graph_job_seconds', 'Time from submitting a graph to the saved file',
+                            mode='process' if self.workers else 'thread'):
+            if not self.workers:
+                return await loop.run_in_executor(self._executor, self.generator.generate_graph,
+                                                  series, symbol, filepath)
+            try:
+                return await loop.run_in_executor(
+                    self._executor, _render_in_worker, symbol,
+                    np.asarray(series.timestamps), np.asarray(series.prices), filepath
+                )
+            except BrokenProcessPool as e:
+                self.logger.error(f"Graph render worker died while rendering {symbol}: {e}")
+                # Start a fresh pool on the next request
+                await self.close()
+                return None
+
+    async def render_all(self, jobs):
+        """Renders ``(series, symbol, filepath)`` jobs in parallel; returns the saved paths in order."""
+        return list(await asyncio.gather(*(self.render(*job) for job in jobs)))
+
+    async def close(self):
+        """Waits for running renders and stops the workers."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+        if self._log_listener is not None:
+            listener, self._log_listener = self._log_listener, None
+            listener.stop()
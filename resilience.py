@@ -0,0 +1,98 @@
+import random
+import time
+from collections import deque
+
+from utils.logger import setup_logger
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class RetryPolicy:
+    """Retry budget with capped, fully jittered exponential backoff."""
+
+    def __init__(self, max_attempts=3, base_delay=0.25, max_delay=5.0, rng=None):
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def backoff(self, attempt):
+        """Delay before retry number ``attempt`` (1-based): uniform in [0, min(max, base * 2**(attempt-1))]."""
+        cap = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return self._rng.uniform(0, cap)
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint after repeated failures and probes it again after a cool-down.
+
+    closed -> open after ``failure_threshold`` consecutive failures;
+    open -> half_open once ``reset_timeout`` seconds have passed, letting a
+    single trial request through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.logger = setup_logger(__name__)
+
+    def allow(self):
+        """Returns True if a request may be sent now."""
+        if self.state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+            self.logger.info(f"Circuit for {self.name} half-open; sending a trial request")
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+        return self.state == CLOSED
+
+    def record_success(self):
+        if self.state != CLOSED:
+            self.logger.info(f"Circuit for {self.name} closed after a successful request")
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def release(self):
+        """Frees the half-open trial slot after a request that ended without an outcome, e.g. was cancelled."""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.logger.warning(f"Circuit for {self.name} opened after {self.failures} consecutive failures")
+            self.state = OPEN
+            self._opened_at = self.clock()
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Keeps recent request latencies to derive a hedging delay from a percentile."""
+
+    def __init__(self, size=200, min_samples=20):
+        self._latencies = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def record(self, seconds):
+        self._latencies.append(seconds)
+
+    def percentile(self, pct):
+        """Returns the ``pct`` percentile of recent latencies, or None until enough samples exist."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
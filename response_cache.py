@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections import namedtuple
+
+from metrics import REGISTRY
+from utils.logger import setup_logger
+
+HIT = 'hit'
+MISS = 'miss'
+COALESCED = 'coalesced'
+NOT_MODIFIED = 'not_modified'
+
+CacheEntry = namedtuple('CacheEntry', ['value', 'stored_at'])
+Validators = namedtuple('Validators', ['etag', 'last_modified', 'value'])
+
+
+class ResponseCache:
+    """TTL cache with single-flight coalescing for async fetches.
+
+    ``get(key, fetch)`` returns the cached value while it is younger than the
+    TTL (or the caller's own ``max_staleness``). Otherwise it runs ``fetch()``,
+    and callers asking for the same key while that fetch is in flight await
+    the same task instead of sending their own request. Failed fetches
+    (``None`` or an exception) are shared with the waiting callers but not
+    cached.
+
+    The cache also remembers ``ETag``/``Last-Modified`` validators per URL so
+    a fetcher can send a conditional request and reuse the previous value on
+    ``304 Not Modified``.
+    """
+
+    def __init__(self, ttl=0.0, name='price', clock=time.monotonic):
+        self.ttl = ttl
+        self.name = name
+        self.clock = clock
+        self.stats = dict.fromkeys((HIT, MISS, COALESCED, NOT_MODIFIED), 0)
+        self._entries = {}
+        self._in_flight = {}
+        self._validators = {}
+        self.logger = setup_logger(__name__)
+
+    def _count(self, outcome):
+        self.stats[outcome] += 1
+        REGISTRY.counter('response_cache_requests_total', 'Cached fetch lookups by outcome',
+                         cache=self.name, outcome=outcome).inc()
+
+    def peek(self, key, max_staleness=None):
+        """Returns the cached value if it is fresh enough, else None; never fetches."""
+        entry = self._entries.get(key)
+        limit = self.ttl if max_staleness is None else max_staleness
+        if entry is not None and self.clock() - entry.stored_at <= limit:
+            return entry.value
+        return None
+
+    async def get(self, key, fetch, max_staleness=None):
+        """Returns the value of ``key``, calling the coroutine function ``fetch`` at most once per miss.
+
+        ``max_staleness`` (seconds) overrides the TTL for this call: 0 forces a
+        fresh value (still joining a fetch already in flight), a larger budget
+        accepts an older cached value.
+        """
+        value = self.peek(key, max_staleness)
+        if value is not None:
+            self._count(HIT)
+            return value
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._count(COALESCED)
+        else:
+            self._count(MISS)
+            task = self._in_flight[key] = asyncio.ensure_future(self._fill(key, fetch))
+        # A cancelled caller must not cancel the fetch the other callers are waiting for
+        return await asyncio.shield(task)
+
+    async def _fill(self, key, fetch):
+        try:
+            value = await fetch()
+            if value is not None:
+                self._entries[key] = CacheEntry(value, self.clock())
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def invalidate(self, key=None):
+        """Drops one cached key, or everything when ``key`` is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def conditional_headers(self, url):
+        """Returns ``If-None-Match``/``If-Modified-Since`` headers for a URL seen before."""
+        validators = self._validators.get(url)
+        headers = {}
+        if validators is not None:
+            if validators.etag:
+                headers['If-None-Match'] = validators.etag
+            if validators.last_modified:
+                headers['If-Modified-Since'] = validators.last_modified
+        return headers
+
+    def store_validators(self, url, headers, value):
+        """Remembers the validators of a ``200`` response together with its parsed value."""
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        if etag or last_modified:
+            self._validators[url] = Validators(etag, last_modified, value)
+        else:
+            self._validators.pop(url, None)
+
+    def not_modified(self, url):
+        """Returns the value stored for a URL that answered ``304 Not Modified``."""
+        validators = self._validators.get(url)
+        if validators is None:
+            raise ValueError(f"304 Not Modified from {url} without a cached response")
+        self._count(NOT_MODIFIED)
+        self.logger.debug("%s not modified; reusing cached value", url)
+        return validators.value
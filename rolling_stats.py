@@ -0,0 +1,169 @@
+import math
+from collections import deque
+
+DEFAULT_WINDOWS = {'1m': 60, '5m': 300, '1h': 3600, '24h': 86400}
+RUN_WINDOW = 'run'
+
+
+class RollingWindow:
+    """Incremental statistics over the samples of the last ``span`` seconds.
+
+    Every update is amortized O(1): expired samples are evicted from the front,
+    window max/min come from monotonic deques, mean/variance use Welford's
+    algorithm with removal, and the time-weighted average keeps running sums.
+    All queries are O(1). ``span=None`` tracks the whole run without keeping
+    any samples.
+    """
+
+    def __init__(self, span=None):
+        self.span = span
+        self._samples = deque()
+        self._max = deque()
+        self._min = deque()
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._weighted_sum = 0.0
+        self._duration = 0.0
+        self._first = None
+        self._last = None
+        self._last_time = None
+        self._run_max = -math.inf
+        self._run_min = math.inf
+
+    def add(self, timestamp, price):
+        """Adds a sample; samples must arrive in timestamp order."""
+        if self._last_time is not None:
+            # The previous price held until this sample
+            held = timestamp - self._last_time
+            self._weighted_sum += self._last * held
+            self._duration += held
+        self._last, self._last_time = price, timestamp
+        self._welford_add(price)
+
+        if self.span is None:
+            if self._first is None:
+                self._first = price
+            self._run_max = max(self._run_max, price)
+            self._run_min = min(self._run_min, price)
+            return
+
+        self._samples.append((timestamp, price))
+        while self._max and self._max[-1][1] <= price:
+            self._max.pop()
+        self._max.append((timestamp, price))
+        while self._min and self._min[-1][1] >= price:
+            self._min.pop()
+        self._min.append((timestamp, price))
+        self._evict(timestamp - self.span)
+
+    def _evict(self, cutoff):
+        samples = self._samples
+        while samples and samples[0][0] <= cutoff:
+            timestamp, price = samples.popleft()
+            self._welford_remove(price)
+            # The newest sample is never evicted, so the evicted one always has a successor
+            held = samples[0][0] - timestamp
+            self._weighted_sum -= price * held
+            self._duration -= held
+            if self._max[0][0] <= timestamp:
+                self._max.popleft()
+            if self._min[0][0] <= timestamp:
+                self._min.popleft()
+
+    def _welford_add(self, price):
+        self.count += 1
+        delta = price - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (price - self._mean)
+
+    def _welford_remove(self, price):
+        self.count -= 1
+        if self.count == 0:
+            self._mean = self._m2 = 0.0
+            return
+        delta = price - self._mean
+        self._mean -= delta / self.count
+        self._m2 = max(0.0, self._m2 - delta * (price - self._mean))
+
+    @property
+    def max(self):
+        if not self.count:
+            return None
+        return self._run_max if self.span is None else self._max[0][1]
+
+    @property
+    def min(self):
+        if not self.count:
+            return None
+        return self._run_min if self.span is None else self._min[0][1]
+
+    @property
+    def mean(self):
+        return self._mean if self.count else None
+
+    @property
+    def twap(self):
+        """Time-weighted average price: each price counts for as long as it held until the next sample."""
+        if not self.count:
+            return None
+        return self._weighted_sum / self._duration if self._duration > 0 else self._last
+
+    @property
+    def stddev(self):
+        """Sample standard deviation."""
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else None
+
+    @property
+    def pct_change(self):
+        """Percent change from the oldest sample in the window to the latest one."""
+        first = self._first if self.span is None else (self._samples[0][1] if self._samples else None)
+        if not first or self._last is None:
+            return None
+        return (self._last - first) / first * 100
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'max': self.max,
+            'min': self.min,
+            'mean': self.mean,
+            'twap': self.twap,
+            'stddev': self.stddev,
+            'pct_change': self.pct_change,
+        }
+
+
+class StatsEngine:
+    """Keeps whole-run and sliding-window statistics for every symbol."""
+
+    def __init__(self, windows=None):
+        self.windows = dict(DEFAULT_WINDOWS if windows is None else windows)
+        self._stats = {}
+
+    @property
+    def symbols(self):
+        return list(self._stats)
+
+    def _windows_for(self, symbol):
+        windows = self._stats.get(symbol)
+        if windows is None:
+            windows = {RUN_WINDOW: RollingWindow()}
+            windows.update((name, RollingWindow(span)) for name, span in self.windows.items())
+            self._stats[symbol] = windows
+        return windows
+
+    def update(self, symbol, timestamp, price):
+        """Feeds one sample into every window of the symbol."""
+        for window in self._windows_for(symbol).values():
+            window.add(timestamp, price)
+
+    def window(self, symbol, name=RUN_WINDOW):
+        """Returns the RollingWindow of a symbol, or None if the symbol has no samples."""
+        windows = self._stats.get(symbol)
+        return windows[name] if windows else None
+
+    def snapshot(self, symbol):
+        """Returns ``{window name: stats dict}`` for a symbol; whole-run stats are under 'run'."""
+        windows = self._stats.get(symbol, {})
+        return {name: window.snapshot() for name, window in windows.items()}
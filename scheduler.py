@@ -0,0 +1,127 @@
+import asyncio
+import datetime as dt
+import math
+import time
+from collections import deque
+
+from metrics import REGISTRY
+from utils.logger import setup_logger
+
+SKIP = 'skip'
+QUEUE = 'queue'
+CANCEL = 'cancel'
+OVERLAP_POLICIES = (SKIP, QUEUE, CANCEL)
+
+
+class TickStats:
+    """Keeps per-tick scheduling lag and overlap counters."""
+
+    def __init__(self, history=1000):
+        self.ticks = 0
+        self.skipped = 0
+        self.cancelled = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.recent_lags = deque(maxlen=history)
+
+    def record_lag(self, lag):
+        self.ticks += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        self.recent_lags.append(lag)
+        REGISTRY.histogram('tick_lag_seconds', 'Delay between the scheduled tick time and the tick start').record(lag)
+
+    @property
+    def mean_lag(self):
+        return self.total_lag / self.ticks if self.ticks else 0.0
+
+
+class TickScheduler:
+    """Runs a coroutine on a fixed cadence aligned to wall-clock boundaries.
+
+    Every tick target is computed from the aligned start time rather than from
+    the end of the previous fetch, so fetch latency never accumulates into the
+    cadence. The callback receives the *scheduled* tick time as a datetime.
+
+    ``overlap_policy`` decides what happens when a tick is due while the previous
+    callback is still running:
+        - ``skip``: drop the new tick and let the late one finish.
+        - ``queue``: wait for the late one, then run the new tick immediately.
+        - ``cancel``: cancel the late one and start the new tick.
+    """
+
+    def __init__(self, interval, overlap_policy=SKIP, clock=time.time, sleep=asyncio.sleep):
+        if interval <= 0:
+            raise ValueError(f"Tick interval must be positive, got {interval}")
+        if overlap_policy not in OVERLAP_POLICIES:
+            raise ValueError(f"Unknown overlap policy '{overlap_policy}', expected one of {OVERLAP_POLICIES}")
+        self.interval = interval
+        self.overlap_policy = overlap_policy
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = TickStats()
+        self.logger = setup_logger(__name__)
+
+    def next_boundary(self, now=None):
+        """Returns the next wall-clock time that is a whole multiple of the interval."""
+        now = self.clock() if now is None else now
+        return math.ceil(now / self.interval) * self.interval
+
+    async def run(self, callback, duration):
+        """Invokes ``callback(tick_time)`` on every tick for ``duration`` seconds, or until cancelled if None."""
+        first_tick = self.next_boundary()
+        end_time = first_tick + duration if duration is not None else math.inf
+        tick_index = 0
+        pending = None
+        self.logger.info(
+            f"Scheduling ticks every {self.interval}s from "
+            f"{dt.datetime.fromtimestamp(first_tick).isoformat()} ({self.overlap_policy} on overlap)"
+        )
+        try:
+            while True:
+                target = first_tick + tick_index * self.interval
+                if target >= end_time:
+                    break
+                delay = target - self.clock()
+                if delay > 0:
+                    await self.sleep(delay)
+
+                if pending is not None and not pending.done():
+                    if self.overlap_policy == SKIP:
+                        self.stats.skipped += 1
+                        self.logger.warning(f"Previous tick still running; skipping tick {tick_index}")
+                        tick_index += 1
+                        continue
+                    if self.overlap_policy == CANCEL:
+                        self.stats.cancelled += 1
+                        self.logger.warning(f"Previous tick still running; cancelling it for tick {tick_index}")
+                        pending.cancel()
+                    await asyncio.gather(pending, return_exceptions=True)
+
+                lag = max(0.0, self.clock() - target)
+                self.stats.record_lag(lag)
+                pending = asyncio.ensure_future(callback(dt.datetime.fromtimestamp(target)))
+                pending.add_done_callback(self._log_failure)
+                tick_index += 1
+
+                # When the loop fell behind by whole intervals, resume on the next future boundary
+                missed = int((self.clock() - target) // self.interval)
+                if missed > 0 and self.overlap_policy != QUEUE:
+                    self.stats.skipped += missed
+                    tick_index += missed
+
+            if pending is not None:
+                await asyncio.gather(pending, return_exceptions=True)
+        except asyncio.CancelledError:
+            if pending is not None:
+                pending.cancel()
+            raise
+        finally:
+            self.logger.info(
+                f"Scheduler finished: {self.stats.ticks} ticks, {self.stats.skipped} skipped, "
+                f"mean lag {self.stats.mean_lag * 1000:.1f} ms, max lag {self.stats.max_lag * 1000:.1f} ms"
+            )
+
+    def _log_failure(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(f"Tick callback failed: {task.exception()}")
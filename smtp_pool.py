@@ -0,0 +1,124 @@
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.logger import setup_logger
+
+SSL = 'ssl'
+STARTTLS = 'starttls'
+PLAIN = 'none'
+SECURITY_MODES = (SSL, STARTTLS, PLAIN)
+
+
+def default_security(port):
+    """Implicit TLS on 465, STARTTLS on every other port."""
+    return SSL if port == 465 else STARTTLS
+
+
+class SMTPConnectionPool:
+    """A small pool of authenticated, reusable ``smtplib`` connections.
+
+    Connections are opened on demand (TLS handshake and login once per
+    connection), handed out to one thread at a time and returned for reuse.
+    A connection that has been idle longer than ``probe_after`` seconds is
+    checked with ``NOOP`` before reuse, and one that fails is discarded, so
+    servers dropping idle sessions only cost a reconnect.
+    """
+
+    def __init__(self, host, port, username=None, password=None, security=None, size=2, timeout=30,
+                 probe_after=10.0):
+        security = security or default_security(port)
+        if security not in SECURITY_MODES:
+            raise ValueError(f"Unknown SMTP security '{security}', expected one of {SECURITY_MODES}")
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.security = security
+        self.size = size
+        self.timeout = timeout
+        self.probe_after = probe_after
+        self.connections_opened = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+        self.logger = setup_logger(__name__)
+
+    def _open(self):
+        context = ssl.create_default_context()
+        if self.security == SSL:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=context)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == STARTTLS:
+                server.ehlo()
+                server.starttls(context=context)
+        server.ehlo()
+        if self.password:
+            server.login(self.username, self.password)
+        self.connections_opened += 1
+        self.logger.info(f"Opened SMTP connection to {self.host}:{self.port} ({self.security})")
+        return server
+
+    def _take_idle(self):
+        """Returns a live idle connection, or None if there is none."""
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - last_used < self.probe_after:
+                return server
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(server)
+
+    @staticmethod
+    def _discard(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    @contextmanager
+    def connection(self):
+        """Lends a connection for the duration of the block; it is discarded if the connection failed.
+
+        Blocks while ``size`` connections are already lent out.
+        """
+        if self._closed:
+            raise RuntimeError("SMTP connection pool is closed")
+        with self._slots:
+            server = self._take_idle() or self._open()
+            try:
+                yield server
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                # The server answered, so the session is still usable unless it is shutting down (421)
+                self._release(server, reusable=getattr(e, 'smtp_code', None) != 421)
+                raise
+            except BaseException:
+                self._release(server, reusable=False)
+                raise
+            self._release(server, reusable=True)
+
+    def _release(self, server, reusable):
+        if reusable and not self._closed:
+            self._idle.put((server, time.monotonic()))
+        else:
+            self._discard(server)
+
+    def close(self):
+        """Closes every idle connection; connections in use are closed when returned."""
+        self._closed = True
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(server)
@@ -0,0 +1,234 @@
+import datetime as dt
+import json
+import os
+import struct
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from config.app_config import DEFAULT_SYMBOL
+from utils import codec
+from utils.logger import setup_logger
+
+PriceRecord = namedtuple('PriceRecord', ['timestamp', 'symbol', 'price'])
+
+BINARY_MAGIC = b'BPT1'
+BINARY_RECORD = struct.Struct('<dd16s')  # epoch seconds, price, UTF-8 symbol (NUL padded)
+BINARY_SYMBOL_BYTES = 16
+READ_CHUNK_SIZE = 1 << 16
+
+
+def to_epoch(timestamp):
+    """Converts a datetime, ISO-8601 string or epoch number to epoch seconds."""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = dt.datetime.fromisoformat(timestamp)
+    return timestamp.timestamp()
+
+
+def to_iso(epoch):
+    """Converts epoch seconds to the local-time ISO-8601 string, with UTC offset, used in JSON files.
+
+    The offset keeps the repeated hour of a DST change unambiguous; files
+    written without one are still read as local time.
+    """
+    return dt.datetime.fromtimestamp(epoch).astimezone().isoformat()
+
+
+class StorageBackend:
+    """Base class of the append-only price record writers."""
+
+    suffix = ''
+
+    def __init__(self, filepath, fsync_every=32, fsync_interval=1.0):
+        self.filepath = Path(filepath)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.logger = setup_logger(__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def append(self, record):
+        """Writes one record and hands it to the OS immediately; fsync happens in batches."""
+        if self._file is None:
+            self._file = self._open()
+        self._write(record)
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """Forces buffered records to stable storage."""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Syncs and closes the underlying file."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+            self.logger.info(f"Closed price store {self.filepath}")
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write(self, record):
+        raise NotImplementedError
+
+
+class NDJSONBackend(StorageBackend):
+    """One JSON object per line; human readable and trivially appendable."""
+
+    suffix = '.ndjson'
+
+    def _open(self):
+        return open(self.filepath, 'ab')
+
+    def _write(self, record):
+        self._file.write(codec.dumps(
+            {'timestamp': to_iso(record.timestamp), 'symbol': record.symbol, 'price': record.price}
+        ) + b'\n')
+
+
+class BinaryBackend(StorageBackend):
+    """Fixed-size 32-byte little-endian records behind a 4-byte magic header."""
+
+    suffix = '.bin'
+
+    def _open(self):
+        f = open(self.filepath, 'ab')
+        if f.tell() == 0:
+            f.write(BINARY_MAGIC)
+        return f
+
+    def _write(self, record):
+        symbol = record.symbol.encode('utf-8')
+        # struct would silently cut a longer symbol to fit the field
+        if len(symbol) > BINARY_SYMBOL_BYTES:
+            raise ValueError(f"Symbol '{record.symbol}' is longer than the {BINARY_SYMBOL_BYTES} bytes "
+                             f"of a binary record")
+        self._file.write(BINARY_RECORD.pack(record.timestamp, record.price, symbol))
+
+
+class JSONArrayBackend(StorageBackend):
+    """Legacy whole-file JSON array; records are buffered and rewritten on close."""
+
+    suffix = '.json'
+
+    def __init__(self, filepath, **kwargs):
+        super().__init__(filepath, **kwargs)
+        self._records = []
+
+    def append(self, record):
+        self._records.append(record)
+
+    def sync(self):
+        pass
+
+    def close(self):
+        if not self._records:
+            return
+        with open(self.filepath, 'w') as f:
+            json.dump([
+                {'timestamp': to_iso(r.timestamp), 'symbol': r.symbol, 'price': r.price}
+                for r in self._records
+            ], f, indent=4)
+
+
+BACKENDS = {
+    'ndjson': NDJSONBackend,
+    'binary': BinaryBackend,
+    'json': JSONArrayBackend,
+}
+
+
+def open_backend(filepath, storage_format='ndjson', **kwargs):
+    """Creates the backend for ``storage_format``, giving the path that format's suffix."""
+    try:
+        backend_cls = BACKENDS[storage_format]
+    except KeyError:
+        raise ValueError(f"Unknown storage format '{storage_format}', expected one of {sorted(BACKENDS)}")
+    return backend_cls(Path(filepath).with_suffix(backend_cls.suffix), **kwargs)
+
+
+def read_records(filepath, symbol=None):
+    """Streams PriceRecords from an NDJSON, binary or legacy JSON-array file.
+
+    The format is detected from the file content, so existing
+    ``bitcoin_price_data.json`` files can be read with the same call.
+    """
+    filepath = Path(filepath)
+    with open(filepath, 'rb') as f:
+        head = f.read(len(BINARY_MAGIC))
+    if head == BINARY_MAGIC:
+        records = _read_binary(filepath)
+    elif head.lstrip()[:1] == b'[':
+        records = _read_json_array(filepath)
+    else:
+        records = _read_ndjson(filepath)
+    for record in records:
+        if symbol is None or record.symbol == symbol:
+            yield record
+
+
+def _record_from_dict(item):
+    return PriceRecord(to_epoch(item['timestamp']), item.get('symbol', DEFAULT_SYMBOL), float(item['price']))
+
+
+def _read_ndjson(filepath):
+    with open(filepath, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield _record_from_dict(codec.loads(line))
+
+
+def _read_binary(filepath):
+    size = BINARY_RECORD.size
+    with open(filepath, 'rb') as f:
+        f.seek(len(BINARY_MAGIC))
+        while True:
+            chunk = f.read(size * 4096)
+            # A torn trailing record from a crash is ignored
+            usable = len(chunk) - len(chunk) % size
+            for timestamp, price, symbol in BINARY_RECORD.iter_unpack(chunk[:usable]):
+                yield PriceRecord(timestamp, symbol.rstrip(b'\0').decode('utf-8'), price)
+            if len(chunk) < size * 4096:
+                break
+
+
+def _read_json_array(filepath):
+    """Incrementally decodes the objects of a top-level JSON array without loading the file."""
+    decoder = json.JSONDecoder()
+    separators = ' \t\r\n,'
+    with open(filepath, 'r', encoding='utf-8') as f:
+        buffer = f.read(READ_CHUNK_SIZE).lstrip()[1:]
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in separators:
+                pos += 1
+            if buffer.startswith(']', pos):
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    if buffer[pos:].strip():
+                        raise
+                    return
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield _record_from_dict(item)
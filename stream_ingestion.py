@@ -0,0 +1,138 @@
+import asyncio
+import datetime as dt
+import time
+
+import aiohttp
+
+from resilience import RetryPolicy
+from utils import codec
+from utils.logger import setup_logger
+
+
+def coinbase_subscribe(symbols):
+    """Subscription message of the Coinbase Exchange ticker channel."""
+    return {'type': 'subscribe', 'product_ids': list(symbols), 'channels': ['ticker']}
+
+
+def parse_coinbase_ticker(message):
+    """Returns ``(symbol, epoch, price)`` for a Coinbase ticker message, or None for other messages."""
+    if message.get('type') != 'ticker':
+        return None
+    timestamp = message.get('time')
+    epoch = dt.datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp() if timestamp else time.time()
+    return message['product_id'], epoch, float(message['price'])
+
+
+class StreamIngestor:
+    """Streams ticker updates over a WebSocket into a sink, as an alternative to REST polling.
+
+    The receiver never blocks on the sink: ticks land in a per-symbol
+    "latest value" buffer and the consumer drains it, so when storage falls
+    behind, intermediate ticks of a symbol are coalesced (the newest wins)
+    instead of queueing without bound. With ``sample_interval`` the consumer
+    drains at most once per interval, capping the storage rate per symbol.
+
+    Connection liveness is checked with WebSocket ping/pong heartbeats;
+    dropped or silent connections are re-established with jittered backoff.
+    """
+
+    def __init__(self, url, symbols, sink, heartbeat=15.0, sample_interval=0.0, reconnect_policy=None,
+                 subscribe=coinbase_subscribe, parse=parse_coinbase_ticker):
+        self.url = url
+        self.symbols = list(symbols)
+        self.sink = sink
+        self.heartbeat = heartbeat
+        self.sample_interval = sample_interval
+        self.reconnect_policy = reconnect_policy or RetryPolicy(max_attempts=1, base_delay=0.5, max_delay=30)
+        self.subscribe = subscribe
+        self.parse = parse
+        self.received = 0
+        self.stored = 0
+        self.coalesced = 0
+        self.reconnects = 0
+        self._latest = {}
+        self._ready = asyncio.Event()
+        self.logger = setup_logger(__name__)
+
+    async def run(self, duration):
+        """Ingests ticks for ``duration`` seconds (until cancelled if None), then flushes buffered ticks."""
+        async with aiohttp.ClientSession() as session:
+            receiver = asyncio.ensure_future(self._receive_forever(session))
+            consumer = asyncio.ensure_future(self._consume_forever())
+            try:
+                if duration is None:
+                    await asyncio.gather(receiver, consumer)
+                else:
+                    await asyncio.sleep(duration)
+            finally:
+                receiver.cancel()
+                consumer.cancel()
+                await asyncio.gather(receiver, consumer, return_exceptions=True)
+                self._drain()
+        self.logger.info(
+            f"Stream ingestion finished: {self.received} ticks received, {self.stored} stored, "
+            f"{self.coalesced} coalesced, {self.reconnects} reconnects"
+        )
+
+    async def _receive_forever(self, session):
+        failures = 0
+        while True:
+            try:
+                async with session.ws_connect(self.url, heartbeat=self.heartbeat, **self._receive_timeout()) as ws:
+                    await ws.send_json(self.subscribe(self.symbols))
+                    self.logger.info(f"Subscribed to {', '.join(self.symbols)} on {self.url}")
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            failures = 0
+                            self._on_message(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSE):
+                            break
+                self.logger.warning(f"Stream connection to {self.url} closed")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.logger.warning(f"Stream connection error: {e or type(e).__name__}")
+            failures += 1
+            self.reconnects += 1
+            delay = self.reconnect_policy.backoff(failures)
+            self.logger.info(f"Reconnecting in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _receive_timeout(self):
+        """Silence longer than two heartbeats counts as a dead connection."""
+        if hasattr(aiohttp, 'ClientWSTimeout'):
+            return {'timeout': aiohttp.ClientWSTimeout(ws_receive=self.heartbeat * 2)}
+        return {'receive_timeout': self.heartbeat * 2}
+
+    def _on_message(self, data):
+        try:
+            tick = self.parse(codec.loads(data))
+        except (KeyError, ValueError, TypeError) as e:
+            self.logger.error(f"Error parsing stream message: {e}")
+            return
+        if tick is None:
+            return
+        self.received += 1
+        symbol = tick[0]
+        if symbol in self._latest:
+            self.coalesced += 1
+        self._latest[symbol] = tick
+        self._ready.set()
+
+    async def _consume_forever(self):
+        while True:
+            await self._ready.wait()
+            self._drain()
+            if self.sample_interval:
+                await asyncio.sleep(self.sample_interval)
+            else:
+                # Yield so a burst of messages can coalesce before the next drain
+                await asyncio.sleep(0)
+
+    def _drain(self):
+        self._ready.clear()
+        latest, self._latest = self._latest, {}
+        for symbol, epoch, price in latest.values():
+            try:
+                self.sink(symbol, epoch, price)
+                self.stored += 1
+            except Exception as e:
+                self.logger.error(f"Failed to store streamed {symbol} tick: {e}")
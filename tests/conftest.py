@@ -1,6 +1,17 @@
+import json
+
 from api_handler import APIHandler
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
+from utils.logger import configure_logging
+
+
+@pytest.fixture(scope='session', autouse=True)
+def test_log_dir(tmp_path_factory):
+    """Writes the log file of a test run to a temporary directory instead of temp/test_runs."""
+    log_dir = tmp_path_factory.mktemp('logs')
+    configure_logging(log_dir=str(log_dir))
+    return log_dir
 
 
 @pytest.fixture
@@ -11,6 +22,8 @@ def mock_aiohttp_client_session():
         # MagicMock instead of AsyncMock for raise_for_status
         mock_response.raise_for_status = MagicMock()  # Changed from AsyncMock
         mock_response.json = AsyncMock(return_value={"data": {"base": "BTC", "currency": "USD", "amount": "105565.74"}})
+        # The handler reads the raw body; serve whatever payload the test put in json.return_value
+        mock_response.read = AsyncMock(side_effect=lambda: json.dumps(mock_response.json.return_value).encode())
 
         # object that supports async context management
         mock_response.__aenter__.return_value = mock_response
@@ -19,6 +32,8 @@ def mock_aiohttp_client_session():
         # Create a session instance
         session_instance = MagicMock()
         session_instance.get.return_value = mock_response
+        session_instance.closed = False
+        session_instance.close = AsyncMock()
 
         # Make session_instance support async context management
         session_instance.__aenter__.return_value = session_instance
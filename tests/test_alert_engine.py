@@ -0,0 +1,141 @@
+import asyncio
+import random
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from alert_engine import (AlertDispatcher, AlertEngine, AlertRule, WebhookAlertChannel, load_rules,
+                          parse_rule)
+
+START = 1_750_000_000.0
+
+
+def feed(engine, prices, symbol='BTC-USD', step=1.0):
+    return [[alert.rule for alert in engine.evaluate(symbol, START + i * step, price)]
+            for i, price in enumerate(prices)]
+
+
+def test_threshold_fires_on_crossings_only():
+    engine = AlertEngine([parse_rule({'name': 'up', 'type': 'threshold', 'price': 100}),
+                          parse_rule({'name': 'down', 'type': 'threshold', 'price': 90, 'direction': 'down'})],
+                         cooldown=0)
+
+    fired = feed(engine, [95, 101, 102, 99, 100, 89, 85, 91, 90])
+
+    assert fired == [[], ['up'], [], [], ['up'], ['down'], [], [], ['down']]
+
+
+def test_cooldown_suppresses_repeats():
+    engine = AlertEngine([parse_rule({'name': 'up', 'type': 'threshold', 'price': 100})], cooldown=60)
+
+    fired = feed(engine, [99, 101, 99, 101, 99, 101], step=25)
+
+    assert fired == [[], ['up'], [], [], [], ['up']]
+
+
+def test_move_and_zscore_rules():
+    engine = AlertEngine([parse_rule({'name': 'move', 'type': 'move', 'pct': 2, 'window': '5m'}),
+                          parse_rule({'name': 'spike', 'type': 'zscore', 'z': 4, 'window': '1h',
+                                      'direction': 'up'})], cooldown=0, min_samples=30)
+    rng = random.Random(5)
+    calm = [100 + rng.uniform(-0.1, 0.1) for _ in range(60)]
+
+    fired = feed(engine, calm + [101, 102.5])
+    assert fired[:60] == [[]] * 60
+    # The spike fires once while it stays above 4 sigma; the move fires when it passes 2%
+    assert fired[60:] == [['spike'], ['move']]
+    # Samples older than the window no longer count towards a move
+    assert feed(engine, [102.5] * 3, step=600) == [[], [], []]
+
+
+def test_ladder_matches_a_full_scan():
+    rng = random.Random(11)
+    rules = [AlertRule(f"r{i}", 'threshold', 'BTC-USD', rng.uniform(90, 110), None, rng.choice(['up', 'down']))
+             for i in range(2000)]
+    engine = AlertEngine(rules, cooldown=0)
+    prices = [100.0]
+    for _ in range(500):
+        prices.append(prices[-1] + rng.gauss(0, 1))
+
+    fired = feed(engine, prices)
+
+    for previous, price, names in zip(prices, prices[1:], fired[1:]):
+        expected = {rule.name for rule in rules
+                    if (rule.direction == 'up' and previous < rule.level <= price)
+                    or (rule.direction == 'down' and price <= rule.level < previous)}
+        assert set(names) == expected
+
+
+def test_load_rules_rejects_duplicates(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text('[{"name": "a", "type": "threshold", "price": 1}, {"name": "a", "type": "move", "pct": 1}]')
+    with pytest.raises(ValueError, match="Duplicate"):
+        load_rules(path)
+    with pytest.raises(ValueError, match="Unknown alert rule type"):
+        parse_rule({'type': 'volume', 'price': 1})
+
+
+class RecordingChannel:
+    name = 'recording'
+
+    def __init__(self):
+        self.deliveries = []
+
+    async def send(self, alerts):
+        self.deliveries.append([alert.rule for alert in alerts])
+        return True
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_batches_alerts_under_the_rate_limit():
+    engine = AlertEngine([parse_rule({'name': f"r{i}", 'type': 'threshold', 'price': 100 + i})
+                          for i in range(3)], cooldown=0)
+    channel = RecordingChannel()
+    dispatcher = AlertDispatcher([channel], max_per_minute=60)
+    await dispatcher.start()
+
+    dispatcher.submit(engine.evaluate('BTC-USD', START, 99))
+    dispatcher.submit(engine.evaluate('BTC-USD', START + 1, 100.5))
+    await asyncio.sleep(0.05)
+    dispatcher.submit(engine.evaluate('BTC-USD', START + 2, 101.5))
+    dispatcher.submit(engine.evaluate('BTC-USD', START + 3, 102.5))
+    await asyncio.sleep(0.05)
+    # The next delivery is a second away; closing sends it right away
+    assert channel.deliveries == [['r0']]
+    await dispatcher.close()
+
+    assert channel.deliveries == [['r0'], ['r1', 'r2']]
+
+
+@pytest_asyncio.fixture
+async def webhook():
+    received = []
+
+    async def handler(request):
+        received.append(await request.json())
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_post("/hook", handler)
+    server = TestServer(app)
+    await server.start_server()
+    yield str(server.make_url("/hook")), received
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_webhook_delivery(webhook):
+    url, received = webhook
+    engine = AlertEngine([parse_rule({'name': 'up', 'type': 'threshold', 'price': 100})])
+    dispatcher = AlertDispatcher([WebhookAlertChannel(url)])
+    await dispatcher.start()
+
+    feed(engine, [99])
+    dispatcher.submit(engine.evaluate('BTC-USD', START + 1, 100.25))
+    await dispatcher.close()
+
+    alert, = received[0]['alerts']
+    assert alert['rule'] == 'up' and alert['price'] == 100.25
+    assert alert['message'] == "BTC-USD rose above 100.00 (now 100.25)"
@@ -1,5 +1,7 @@
 from unittest.mock import patch
 
+from api_handler import APIHandler
+
 import pytest
 
 
@@ -113,3 +115,76 @@ class TestAPIHandlerParsingErrors:
             error_msg = mock_logger.call_args[0][0]
             assert "Error parsing API response:" in error_msg
             assert "could not convert string to float" in error_msg
+
+
+class TestAPIHandlerSessionLifecycle:
+    """Tests for the pooled, long-lived client session."""
+
+    @pytest.mark.asyncio
+    async def test_session_reused_across_requests(self, load_api_endpoint, mock_aiohttp_client_session):
+        """Consecutive fetches share a single ClientSession."""
+        mock_session, _ = mock_aiohttp_client_session
+        api_handler = load_api_endpoint
+
+        async with api_handler:
+            assert await api_handler.get_bitcoin_price() == 105565.74
+            assert await api_handler.get_bitcoin_price() == 105565.74
+
+        mock_session.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_context_manager_closes_session(self, load_api_endpoint, mock_aiohttp_client_session):
+        """Leaving the context closes the session exactly once."""
+        mock_session, _ = mock_aiohttp_client_session
+        api_handler = load_api_endpoint
+
+        async with api_handler:
+            await api_handler.get_bitcoin_price()
+
+        mock_session.return_value.close.assert_awaited_once()
+        await api_handler.close()
+        mock_session.return_value.close.assert_awaited_once()
+
+
+class TestAPIHandlerMultiSymbol:
+    """Tests for concurrent multi-pair fetching."""
+
+    def test_url_for_substitutes_symbol(self):
+        """A {symbol} placeholder is filled per pair; fixed URLs are left untouched."""
+        templated = APIHandler("https://api.coinbase.com/v2/prices/{symbol}/spot")
+        fixed = APIHandler("https://api.coinbase.com/v2/prices/BTC-USD/spot")
+
+        assert templated.url_for("ETH-USD") == "https://api.coinbase.com/v2/prices/ETH-USD/spot"
+        assert fixed.url_for("ETH-USD") == "https://api.coinbase.com/v2/prices/BTC-USD/spot"
+
+    @pytest.mark.asyncio
+    async def test_get_prices_returns_batch_keyed_by_symbol(self, mock_aiohttp_client_session):
+        """Every requested symbol is fetched once and keyed in the result."""
+        mock_session, _ = mock_aiohttp_client_session
+        api_handler = APIHandler("https://api.coinbase.com/v2/prices/{symbol}/spot")
+
+        prices = await api_handler.get_prices(["BTC-USD", "ETH-USD", "BTC-USD"])
+
+        assert prices == {"BTC-USD": 105565.74, "ETH-USD": 105565.74}
+        requested = [call.args[0] for call in mock_session.return_value.get.call_args_list]
+        assert sorted(requested) == [
+            "https://api.coinbase.com/v2/prices/BTC-USD/spot",
+            "https://api.coinbase.com/v2/prices/ETH-USD/spot",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_prices_keeps_the_batch_when_one_symbol_raises(self):
+        """A symbol whose fetch raises maps to None; the other prices are kept."""
+        api_handler = APIHandler("https://api.coinbase.com/v2/prices/{symbol}/spot")
+
+        async def get_price(symbol, max_staleness=None):
+            if symbol == "ETH-USD":
+                raise TypeError("unexpected payload")
+            return 105565.74
+
+        with patch.object(api_handler, "get_price", side_effect=get_price), \
+                patch.object(api_handler.logger, "error") as mock_logger:
+            prices = await api_handler.get_prices(["BTC-USD", "ETH-USD"])
+
+        assert prices == {"BTC-USD": 105565.74, "ETH-USD": None}
+        assert "ETH-USD" in mock_logger.call_args[0][0]
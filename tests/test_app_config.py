@@ -0,0 +1,85 @@
+import dataclasses
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from config import app_config
+from config.app_config import AppConfig, config_from_environment, load_configuration
+
+REQUIRED_ENV = {
+    'API_URL': 'https://api.coinbase.com/v2/prices/{symbol}/spot',
+    'JSON_FILEPATH': 'prices.json',
+    'GRAPH_FILEPATH': 'graph.png',
+    'RECIPIENT_EMAIL': 'ops@example.com',
+    'SMTP_SERVER': 'smtp.example.com',
+    'SENDER_EMAIL': 'tracker@example.com',
+    'SENDER_PASSWORD': '',
+}
+
+
+def test_config_from_environment_parses_and_defaults():
+    config = config_from_environment({**REQUIRED_ENV, 'SYMBOLS': 'btc-usd, eth-usd', 'REPORT_WINDOW': '15m',
+                                      'HEDGE_PERCENTILE': '', 'ROLLING_WINDOWS': '5m', 'LOG_LEVEL': 'debug'})
+
+    assert config.symbols == ('BTC-USD', 'ETH-USD')
+    assert config.report_window == 900
+    assert config.hedge_percentile == 0.0
+    assert dict(config.rolling_windows) == {'5m': 300}
+    assert config.log_level == 'DEBUG'
+    assert config.fetch_interval == 60.0 and config.sender_password == '' and config.missing == []
+
+
+def test_config_is_frozen_and_validated():
+    config = AppConfig(symbols=['BTC-USD'])
+    assert config.symbols == ('BTC-USD',)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.fetch_interval = 1
+    with pytest.raises(TypeError):
+        config.rolling_windows['1m'] = 1
+    with pytest.raises(ValueError, match="aggregation must be one of .*; fetch_interval must be positive"):
+        AppConfig(aggregation='mean', fetch_interval=0)
+    with pytest.raises(ValueError, match="FETCH_INTERVAL"):
+        config_from_environment({'FETCH_INTERVAL': 'soon'})
+
+
+def test_numeric_settings_are_converted_or_reported():
+    config = AppConfig(smtp_port='465', fetch_interval='2.5', render_workers=3.0)
+    assert config.smtp_port == 465 and config.fetch_interval == 2.5 and config.render_workers == 3
+    assert isinstance(config.render_workers, int)
+    with pytest.raises(ValueError, match="fetch_interval must be a number, got None; "
+                                         "smtp_port must be an integer, got 'smtp'; aggregation must be one of"):
+        AppConfig(smtp_port='smtp', fetch_interval=None, aggregation='mean')
+
+
+def test_load_configuration_reads_the_environment_once(monkeypatch):
+    monkeypatch.setattr(app_config, 'load_dotenv', lambda: None)
+    for variable, value in REQUIRED_ENV.items():
+        monkeypatch.setenv(variable, value)
+    load_configuration.cache_clear()
+    try:
+        config = load_configuration()
+        monkeypatch.setenv('FETCH_INTERVAL', '5')
+        assert load_configuration() is config
+        load_configuration.cache_clear()
+        assert load_configuration().fetch_interval == 5
+
+        monkeypatch.delenv('SMTP_SERVER')
+        load_configuration.cache_clear()
+        assert load_configuration() is None
+        # A failed load is not remembered
+        monkeypatch.setenv('SMTP_SERVER', 'smtp.example.com')
+        assert load_configuration().smtp_server == 'smtp.example.com'
+    finally:
+        load_configuration.cache_clear()
+
+
+def test_start_up_does_not_import_rendering_or_email_modules():
+    heavy = ['matplotlib', 'email.mime', 'aiohttp.web']
+    loaded = subprocess.run(
+        [sys.executable, '-c', f"import sys, main; print([m for m in {heavy!r} if m in sys.modules])"],
+        cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+    assert loaded == '[]'
@@ -0,0 +1,65 @@
+import pytest
+
+from price_sources import PriceSource
+from utils import codec
+
+COINBASE = b'{"data":{"base":"BTC","currency":"USD","amount":"105565.74"}}'
+
+
+@pytest.mark.parametrize("name", sorted(codec.CODECS))
+def test_codecs_round_trip(name):
+    selected = codec.CODECS[name]
+    record = {'timestamp': '2024-01-15T10:30:00.123456', 'symbol': 'BTC-USD', 'price': 42350.75}
+
+    encoded = selected.dumps(record)
+
+    assert isinstance(encoded, bytes) and b'\n' not in encoded
+    assert selected.loads(encoded) == selected.loads(encoded.decode()) == record
+    with pytest.raises(ValueError):
+        selected.loads(b'{"data"')
+
+
+@pytest.mark.parametrize("name", [None] + sorted(codec.CODECS))
+def test_path_decoder(name):
+    decode = codec.path_decoder(('data', 'amount'), codec=codec.CODECS[name] if name else None)
+
+    assert decode(COINBASE) == "105565.74"
+    with pytest.raises((KeyError,) + codec.SchemaError):
+        decode(b'{"data":{"base":"BTC"}}')
+
+
+@pytest.mark.parametrize("name", [None, 'json'])
+@pytest.mark.parametrize("body,error", [
+    (b'{"data":{"base":"BTC"}}', "amount"),
+    (b'{"result":{}}', "data"),
+    (b'{"data":{"amount":true}}', None),
+    (b'{"data":{"amount":null}}', None),
+    (b'{"data":"oops"}', None),
+    (b'[]', None),
+])
+def test_source_decode_rejects_bad_payloads(name, body, error):
+    source = PriceSource('coinbase', 'https://api.coinbase.com/v2/prices/{symbol}/spot')
+    if name:
+        source._decode_quote = codec.path_decoder(('data', 'amount'), codec=codec.CODECS[name])
+
+    assert source.decode(COINBASE) == 105565.74
+    # A missing key is a KeyError only without the typed decoder
+    with pytest.raises((KeyError, ValueError), match=error):
+        source.decode(body)
+    with pytest.raises(ValueError, match="could not convert string to float"):
+        source.decode(b'{"data":{"amount":"not_a_number"}}')
+
+
+@pytest.mark.parametrize("body", [
+    b'[]',
+    b'{"result":[]}',
+    b'{"result":{"XXBTZUSD":{"c":[]}}}',
+    b'{"result":{"XXBTZUSD":{"c":[true]}}}',
+    b'{"result":{"XXBTZUSD":"c"}}',
+])
+def test_kraken_decode_rejects_bad_payloads(body):
+    source = PriceSource('kraken', 'https://api.kraken.com/0/public/Ticker?pair={symbol}')
+
+    assert source.decode(b'{"error":[],"result":{"XXBTZUSD":{"c":["105565.7","0.01"]}}}') == 105565.7
+    with pytest.raises(ValueError):
+        source.decode(body)
@@ -0,0 +1,69 @@
+import asyncio
+import itertools
+from unittest.mock import AsyncMock
+
+import pytest
+
+from business_logic import BusinessLogic, describe_period
+from rolling_stats import RUN_WINDOW
+from storage_backends import read_records
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    config = {
+        'api_url': 'https://api.coinbase.com/v2/prices/{symbol}/spot',
+        'symbols': ['BTC-USD'],
+        'json_filepath': str(tmp_path / 'prices.ndjson'),
+        'graph_filepath': str(tmp_path / 'graph.png'),
+        'recipient_email': 'ops@example.com',
+        'smtp_server': '127.0.0.1',
+        'smtp_port': 2525,
+        'sender_email': 'tracker@example.com',
+        'sender_password': '',
+        'duration_minutes': 60,
+        'fetch_interval': 0.05,
+        'report_window': 0.25,
+        'render_workers': 0,
+    }
+    tracker = BusinessLogic(config)
+    prices = itertools.count(100_000)
+
+    async def fake_get_prices(symbols, max_staleness=None):
+        return {symbol: float(next(prices)) for symbol in symbols}
+
+    tracker.api_handler.get_prices = fake_get_prices
+    tracker.render_service.render_all = AsyncMock(return_value=[])
+    tracker.email_sender.send_report_email = AsyncMock(return_value={})
+    return tracker
+
+
+def test_describe_period():
+    assert describe_period(3600) == 'Hourly'
+    assert describe_period(86400) == 'Daily'
+    assert describe_period(900) == 'Every 15 Minutes'
+
+
+@pytest.mark.asyncio
+async def test_daemon_reports_each_window_and_flushes_on_stop(tracker):
+    stop = asyncio.Event()
+    daemon = asyncio.ensure_future(tracker.run_daemon(stop))
+    send = tracker.email_sender.send_report_email
+    for _ in range(200):
+        if send.await_count >= 2:
+            break
+        await asyncio.sleep(0.02)
+    # Collection carries on while reports are being sent
+    reported = send.await_count
+    await asyncio.sleep(0.1)
+    stop.set()
+    await asyncio.wait_for(daemon, timeout=5)
+
+    assert reported >= 2
+    window_counts = [call.args[1].window('BTC-USD', RUN_WINDOW).count for call in send.await_args_list]
+    assert all(0 < count <= 6 for count in window_counts)
+
+    stored = list(read_records(tracker.data_storage.filepath))
+    assert len(stored) > sum(window_counts)
+    # Reported windows were released from memory; everything is still on disk
+    assert len(tracker.data_storage.get_prices('BTC-USD')) < len(stored)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from downsampling import choose_bucket_seconds, lttb, ohlc
+
+
+@pytest.mark.parametrize("span,expected", [
+    (3600, 30),
+    (86400, 600),
+    (7 * 86400, 3600),
+    (365 * 86400, 2 * 86400),
+])
+def test_choose_bucket_seconds(span, expected):
+    assert choose_bucket_seconds(span, target_buckets=200) == expected
+
+
+def test_ohlc_aggregates_aligned_buckets():
+    timestamps = np.array([0, 10, 59, 60, 61, 130], dtype=float)
+    prices = np.array([5, 9, 7, 3, 4, 8], dtype=float)
+
+    buckets = ohlc(timestamps, prices, bucket_seconds=60)
+
+    assert list(buckets.start) == [0, 60, 120]
+    assert list(buckets.open) == [5, 3, 8]
+    assert list(buckets.high) == [9, 4, 8]
+    assert list(buckets.low) == [5, 3, 8]
+    assert list(buckets.close) == [7, 4, 8]
+
+
+def test_ohlc_auto_bucket_bounds_output_size():
+    timestamps = np.arange(0, 86400 * 3, dtype=float)
+    prices = np.sin(timestamps / 5000)
+
+    buckets = ohlc(timestamps, prices, target_buckets=100)
+
+    assert len(buckets.start) <= 100
+    assert buckets.high.max() == prices.max()
+    assert buckets.low.min() == prices.min()
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    timestamps = np.arange(10_000, dtype=float)
+    prices = np.zeros(10_000)
+    prices[4_321] = 50.0
+    prices[7_654] = -50.0
+
+    keep = lttb(timestamps, prices, 100)
+
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 9_999
+    assert np.all(np.diff(keep) > 0)
+    assert 4_321 in keep and 7_654 in keep
+
+
+def test_lttb_returns_everything_below_threshold():
+    assert list(lttb([0.0, 1.0, 2.0], [1.0, 2.0, 3.0], 10)) == [0, 1, 2]
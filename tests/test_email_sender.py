@@ -0,0 +1,141 @@
+import email
+import socket
+
+import pytest
+
+from email_sender import EmailSender, describe_window, parse_recipients
+from resilience import RetryPolicy
+from rolling_stats import StatsEngine
+
+pytest.importorskip('aiosmtpd')
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import AuthResult, LoginPassword  # noqa: E402
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+class RecordingHandler:
+    """Stores accepted messages; the first ``transient_failures`` DATA commands get a 451."""
+
+    def __init__(self):
+        self.messages = []
+        self.transient_failures = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.transient_failures:
+            self.transient_failures -= 1
+            return '451 Try again later'
+        self.messages.append(email.message_from_bytes(envelope.content))
+        return '250 OK'
+
+
+class CountingAuthenticator:
+    def __init__(self):
+        self.logins = 0
+
+    def __call__(self, server, session, envelope, mechanism, auth_data):
+        success = isinstance(auth_data, LoginPassword) and auth_data.password == b'secret'
+        self.logins += success
+        return AuthResult(success=success, handled=False)
+
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    handler, authenticator = RecordingHandler(), CountingAuthenticator()
+    controller = Controller(handler, hostname='127.0.0.1', port=port,
+                            authenticator=authenticator, auth_require_tls=False)
+    controller.start()
+    yield port, handler, authenticator
+    controller.stop()
+
+
+@pytest.fixture
+def report(tmp_path):
+    stats = StatsEngine()
+    for i, price in enumerate([100_000.0, 101_500.0, 100_750.0]):
+        stats.update('BTC-USD', 1_750_000_000 + i * 60, price)
+    graph = tmp_path / 'graph.png'
+    graph.write_bytes(PNG_BYTES)
+    return stats, graph
+
+
+def make_sender(port, password='secret', pool_size=2):
+    return EmailSender('127.0.0.1', port, 'tracker@example.com', password, security='none', pool_size=pool_size,
+                       retry_policy=RetryPolicy(3, base_delay=0.01, max_delay=0.01))
+
+
+def test_parse_recipients():
+    assert parse_recipients("a@x.com, b@x.com,,a@x.com ") == ['a@x.com', 'b@x.com']
+    assert parse_recipients(['c@x.com']) == ['c@x.com']
+
+
+def test_describe_window():
+    assert describe_window('Hourly') == 'hour'
+    assert describe_window('Daily') == 'day'
+    assert describe_window('Every 15 Minutes') == '15 minutes'
+
+
+@pytest.mark.asyncio
+async def test_report_reaches_every_recipient_over_pooled_connections(smtp_server, report):
+    port, handler, authenticator = smtp_server
+    stats, graph = report
+    recipients = [f"subscriber{i}@example.com" for i in range(6)]
+    sender = make_sender(port)
+
+    first = await sender.send_report_email(", ".join(recipients), stats, graph)
+    second = await sender.send_report_email(recipients[:2], stats, [graph])
+    await sender.close()
+
+    assert first == dict.fromkeys(recipients, True)
+    assert all(second.values())
+    assert sorted(msg['To'] for msg in handler.messages[:6]) == sorted(recipients)
+    # At most one login per pooled connection, reused across both reports
+    assert 1 <= authenticator.logins <= 2
+    assert sender.pool.connections_opened == authenticator.logins
+    for msg in handler.messages:
+        assert msg['Subject'] == "Bitcoin Hourly Price Report - Max Price: $101,500.00"
+        attachment, = [part for part in msg.walk() if part.get_filename()]
+        assert attachment.get_payload(decode=True) == PNG_BYTES
+
+
+@pytest.mark.asyncio
+async def test_transient_rejection_is_retried(smtp_server, report):
+    port, handler, _ = smtp_server
+    handler.transient_failures = 1
+    sender = make_sender(port, pool_size=1)
+
+    result = await sender.send_report_email("ops@example.com", *report)
+    await sender.close()
+
+    assert result == {"ops@example.com": True}
+    assert len(handler.messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_authentication_failure_is_not_retried(smtp_server, report):
+    port, handler, authenticator = smtp_server
+    sender = make_sender(port, password='wrong')
+
+    result = await sender.send_report_email("ops@example.com", *report)
+    await sender.close()
+
+    assert result == {"ops@example.com": False}
+    assert handler.messages == [] and authenticator.logins == 0
+    assert sender.pool.connections_opened == 0
+
+
+@pytest.mark.asyncio
+async def test_report_body_names_its_period(smtp_server, report):
+    port, handler, _ = smtp_server
+    sender = make_sender(port)
+
+    await sender.send_report_email("ops@example.com", *report, period='Daily')
+    await sender.close()
+
+    msg, = handler.messages
+    assert msg['Subject'].startswith("Bitcoin Daily Price Report")
+    body, = [part for part in msg.walk() if part.get_content_type() == 'text/plain']
+    assert "the maximum price recorded in the last day was: $101,500.00" in body.get_payload(decode=True).decode()
@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+import pytest
+
+from history_store import DAY, HOUR, MINUTE, HistoryStore
+from price_data_storage import DataStorage
+from storage_backends import PriceRecord
+
+START = 1_749_999_617.0  # mid-minute; ~3.5 days of samples cross hour and day boundaries
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(3)
+    timestamps = START + np.cumsum(rng.uniform(1, 20, 30_000))
+    prices = 100_000 + np.cumsum(rng.standard_normal(len(timestamps)) * 10)
+    return timestamps, prices
+
+
+@pytest.fixture
+def store(tmp_path, samples):
+    with HistoryStore(tmp_path / 'history.db', batch_size=500) as store:
+        for timestamp, price in zip(*samples):
+            store.append(PriceRecord(float(timestamp), 'BTC-USD', float(price)))
+        store.flush()
+        yield store
+
+
+def test_stats_match_a_full_scan(store, samples):
+    timestamps, prices = samples
+    rng = random.Random(1)
+    ranges = [(timestamps[0], timestamps[-1] + 1)]
+    ranges += [sorted(rng.uniform(timestamps[0] - 100, timestamps[-1] + 100) for _ in range(2)) for _ in range(50)]
+    for start, end in ranges:
+        selected = prices[(timestamps >= start) & (timestamps < end)]
+        stats = store.stats('BTC-USD', start, end)
+        assert stats.count == len(selected)
+        if len(selected):
+            assert (stats.open, stats.close) == (selected[0], selected[-1])
+            assert (stats.high, stats.low) == (selected.max(), selected.min())
+            assert stats.mean == pytest.approx(selected.mean())
+
+
+def test_range_and_rollups(store, samples):
+    timestamps, prices = samples
+    start, end = START + 2 * HOUR + 17, START + 5 * HOUR
+    series = store.range('BTC-USD', start, end)
+    mask = (timestamps >= start) & (timestamps < end)
+    np.testing.assert_array_equal(series.timestamps, timestamps[mask])
+    np.testing.assert_array_equal(series.prices, prices[mask])
+
+    for resolution in (MINUTE, HOUR, DAY):
+        candles = store.ohlc('BTC-USD', timestamps[0], timestamps[-1] + 1, resolution)
+        buckets = np.floor(timestamps / resolution)
+        assert sum(candle.count for candle in candles) == len(timestamps)
+        for candle in candles[:3] + candles[-3:]:
+            bucket_prices = prices[buckets == candle.start // resolution]
+            assert (candle.open, candle.high, candle.low, candle.close) == (
+                bucket_prices[0], bucket_prices.max(), bucket_prices.min(), bucket_prices[-1])
+
+
+def test_duplicate_writes_are_idempotent(store, samples):
+    timestamps, prices = samples
+    before = store.stats('BTC-USD', 0, timestamps[-1] + 1)
+    store.extend(PriceRecord(float(t), 'BTC-USD', float(p)) for t, p in zip(timestamps[:1000], prices[:1000]))
+    assert store.stats('BTC-USD', 0, timestamps[-1] + 1) == before
+    assert store.symbols() == ['BTC-USD']
+    assert store.stats('ETH-USD', 0, timestamps[-1] + 1).count == 0
+
+
+def test_data_storage_writes_history(tmp_path):
+    storage = DataStorage(tmp_path / 'prices', history_db=tmp_path / 'history.db')
+    for i, price in enumerate([100.0, 105.0, 95.0]):
+        storage.store_price(START + i, price)
+    storage.save_to_json()
+
+    with HistoryStore(tmp_path / 'history.db') as store:
+        stats = store.stats('BTC-USD', START, START + 10)
+    assert (stats.count, stats.high, stats.low, stats.close) == (3, 105.0, 95.0, 95.0)
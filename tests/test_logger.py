@@ -0,0 +1,54 @@
+import logging
+import threading
+
+import pytest
+
+from utils import logger as log_module
+from utils.logger import SamplingFilter, configure_logging, setup_logger
+
+
+def make_record(level, name="hot.path"):
+    return logging.LogRecord(name, level, __file__, 1, "message", None, None)
+
+
+def test_sampling_filter_keeps_one_in_n_and_all_warnings():
+    sampler = SamplingFilter(rate=0.25)
+    kept = [sampler.filter(make_record(logging.INFO)) for _ in range(8)]
+    assert kept == [True, False, False, False, True, False, False, False]
+    assert all(sampler.filter(make_record(logging.WARNING)) for _ in range(5))
+
+
+@pytest.fixture
+def isolated_logging(tmp_path, test_log_dir):
+    yield tmp_path
+    configure_logging(log_dir=str(test_log_dir))
+
+
+def test_records_are_written_by_a_background_thread(isolated_logging):
+    configure_logging(log_dir=str(isolated_logging), console=False)
+    emitting_threads = []
+    file_handler = log_module._listener.handlers[0]
+    original_emit = file_handler.emit
+    file_handler.emit = lambda record: (emitting_threads.append(threading.current_thread()),
+                                        original_emit(record))
+
+    setup_logger("tests.logger").info("queued %s", "record")
+    log_module.shutdown_logging()
+
+    log_files = list(isolated_logging.glob("*.log"))
+    assert len(log_files) == 1
+    assert "queued record" in log_files[0].read_text()
+    assert emitting_threads and threading.main_thread() not in emitting_threads
+
+
+def test_one_log_file_per_process(isolated_logging):
+    configure_logging(log_dir=str(isolated_logging), console=False)
+    setup_logger("a").info("first")
+    setup_logger("b").info("second")
+    configure_logging(log_dir=str(isolated_logging), level="WARNING", console=False)
+    setup_logger("c").warning("third")
+    log_module.shutdown_logging()
+
+    log_file, = isolated_logging.glob("*.log")
+    content = log_file.read_text()
+    assert all(message in content for message in ("first", "second", "third"))
@@ -0,0 +1,74 @@
+import random
+
+import aiohttp
+import numpy as np
+import pytest
+
+from metrics import Histogram, MetricsRegistry, MetricsServer
+
+
+def test_histogram_quantiles_within_relative_error():
+    rng = random.Random(7)
+    # Latencies spanning four orders of magnitude
+    values = [rng.lognormvariate(-4, 1.5) for _ in range(20000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+
+    assert histogram.count == len(values)
+    assert histogram.max == max(values)
+    for q in (0.5, 0.9, 0.99, 0.999):
+        exact = float(np.quantile(values, q, method='inverted_cdf'))
+        assert histogram.quantile(q) == pytest.approx(exact, rel=2 ** -6, abs=1e-6)
+
+
+def test_empty_histogram_has_no_quantiles():
+    assert Histogram().quantile(0.5) is None
+
+
+def test_registry_reuses_labelled_series():
+    registry = MetricsRegistry()
+    registry.counter('fetches_total', source='a').inc()
+    registry.counter('fetches_total', source='a').inc(2)
+    registry.counter('fetches_total', source='b').inc()
+
+    assert registry.counter('fetches_total', source='a').value == 3
+    assert registry.counter('fetches_total', source='b').value == 1
+
+
+def test_timer_records_into_histogram():
+    registry = MetricsRegistry()
+    with registry.timer('work_seconds', step='parse') as timer:
+        pass
+    histogram = registry.histogram('work_seconds', step='parse')
+    assert histogram.count == 1
+    assert histogram.sum == timer.elapsed
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter('emails_total', 'Report emails by outcome', outcome='sent').inc()
+    registry.histogram('fetch_seconds', 'Fetch latency', source='coinbase').record(0.25)
+
+    text = registry.render_prometheus()
+
+    assert '# HELP emails_total Report emails by outcome\n# TYPE emails_total counter\n' in text
+    assert 'emails_total{outcome="sent"} 1\n' in text
+    assert '# TYPE fetch_seconds summary\n' in text
+    assert 'fetch_seconds{source="coinbase",quantile="0.5"} 0.25' in text
+    assert 'fetch_seconds_count{source="coinbase"} 1\n' in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_serves_registry():
+    registry = MetricsRegistry()
+    registry.counter('ticks_total').inc(5)
+
+    async with MetricsServer(registry, port=0) as server:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f'http://127.0.0.1:{server.port}/metrics') as response:
+                assert response.status == 200
+                assert response.headers['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+                body = await response.text()
+
+    assert 'ticks_total 5\n' in body
@@ -0,0 +1,53 @@
+import aiohttp
+import pytest
+
+from benchmarks.mock_exchange import MockExchange
+from storage_backends import PriceRecord
+
+START = 1_750_000_000.0
+
+
+class FrozenClock:
+    start = START
+
+    def __init__(self):
+        self.now = START
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        pass
+
+
+def test_quote_replays_the_series_in_a_loop():
+    exchange = MockExchange([PriceRecord(START + i * 60, 'BTC-USD', 100.0 + i) for i in range(3)], FrozenClock())
+
+    prices = [exchange.quote('BTC-USD', START + offset)[0] for offset in (0, 59, 60, 150, 180, 240)]
+
+    assert prices == [100.0, 100.0, 101.0, 102.0, 100.0, 101.0]
+    assert exchange.quote('ETH-USD', START)[0] != 100.0
+
+
+@pytest.mark.asyncio
+async def test_conditional_requests_and_errors():
+    clock = FrozenClock()
+    exchange = MockExchange([PriceRecord(START, 'BTC-USD', 100.0), PriceRecord(START + 60, 'BTC-USD', 101.0)], clock, latency=0)
+    url = (await exchange.start()).format(symbol='BTC-USD')
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as response:
+                etag = response.headers['ETag']
+                assert (await response.json())['data']['amount'] == '100.00'
+            async with session.get(url, headers={'If-None-Match': etag}) as response:
+                assert response.status == 304
+            clock.now += 60
+            async with session.get(url, headers={'If-None-Match': etag}) as response:
+                assert (await response.json())['data']['amount'] == '101.00'
+            exchange.error_rate = 1.0
+            async with session.get(url) as response:
+                assert response.status == 503
+    finally:
+        await exchange.close()
+
+    assert (exchange.requests, exchange.errors, exchange.not_modified) == (4, 1, 1)
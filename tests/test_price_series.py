@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from price_series import PriceSeries
+
+
+@pytest.fixture
+def series():
+    s = PriceSeries("BTC-USD", capacity=2)
+    for i, price in enumerate([100.0, 105.0, 95.0, 102.0, 101.0]):
+        s.append(1_000.0 + 60 * i, price)
+    return s
+
+
+def test_append_grows_past_initial_capacity(series):
+    assert len(series) == 5
+    assert series[0] == (1_000.0, 100.0)
+    assert series[-1] == (1_240.0, 101.0)
+
+
+def test_vectorized_aggregates(series):
+    assert series.max() == 105.0
+    assert series.min() == 95.0
+    assert series.mean() == pytest.approx(100.6)
+
+
+def test_empty_series_aggregates_are_none():
+    empty = PriceSeries()
+    assert len(empty) == 0
+    assert empty.max() is None and empty.min() is None and empty.mean() is None
+
+
+def test_slices_share_memory(series):
+    window = series[1:4]
+    assert np.shares_memory(window.prices, series.prices)
+    assert list(window.prices) == [105.0, 95.0, 102.0]
+
+
+def test_slices_survive_growth_of_parent(series):
+    window = series[:2]
+    for i in range(100):
+        series.append(2_000.0 + i, 1.0)
+    assert list(window.prices) == [100.0, 105.0]
+
+
+def test_views_are_read_only(series):
+    with pytest.raises(ValueError):
+        series.prices[0] = 0.0
+
+
+def test_between_selects_half_open_time_range(series):
+    assert list(series.between(1_060.0, 1_180.0).prices) == [105.0, 95.0]
+
+
+def test_extend_matches_repeated_append(series):
+    other = PriceSeries("BTC-USD")
+    other.extend(series.timestamps, series.prices)
+    assert np.array_equal(other.prices, series.prices)
+    assert np.array_equal(other.timestamps, series.timestamps)
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from api_handler import FASTEST, MEDIAN, APIHandler
+from price_sources import PARSERS, PriceSource, build_sources
+from resilience import RetryPolicy
+
+
+@pytest.mark.parametrize("parser,payload,expected", [
+    ("coinbase", {"data": {"base": "BTC", "currency": "USD", "amount": "105565.74"}}, 105565.74),
+    ("kraken", {"error": [], "result": {"XXBTZUSD": {"c": ["105500.1", "0.01"]}}}, 105500.1),
+    ("binance", {"symbol": "BTCUSDT", "price": "105600.00000000"}, 105600.0),
+    ("bitstamp", {"last": "105550", "bid": "105549"}, 105550.0),
+])
+def test_parsers(parser, payload, expected):
+    assert PARSERS[parser](payload) == expected
+
+
+def test_kraken_error_is_a_parse_error():
+    with pytest.raises(ValueError):
+        PARSERS["kraken"]({"error": ["EQuery:Unknown asset pair"], "result": {}})
+
+
+@pytest.mark.parametrize("name,expected", [
+    ("coinbase", "https://api.coinbase.com/v2/prices/BTC-USD/spot"),
+    ("kraken", "https://api.kraken.com/0/public/Ticker?pair=XBTUSD"),
+    ("binance", "https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT"),
+    ("bitstamp", "https://www.bitstamp.net/api/v2/ticker/btcusd/"),
+])
+def test_sources_use_exchange_pair_naming(name, expected):
+    source, = build_sources([name])
+    assert source.url_for("BTC-USD") == expected
+
+
+class Exchanges:
+    """Local stand-ins for several exchanges with per-exchange price and latency."""
+
+    def __init__(self, server):
+        self.server = server
+
+    def source(self, name, parser):
+        return PriceSource(name, str(self.server.make_url(f"/{name}/")) + "{symbol}", parser)
+
+
+@pytest_asyncio.fixture
+async def exchanges():
+    def route(payload, delay=0.0, status=200):
+        async def handler(request):
+            await asyncio.sleep(delay)
+            if status != 200:
+                return web.Response(status=status)
+            return web.json_response(payload)
+        return handler
+
+    app = web.Application()
+    app.router.add_get("/fast/{symbol}", route({"price": "100"}, delay=0.0))
+    app.router.add_get("/medium/{symbol}", route({"last": "103"}, delay=0.05))
+    app.router.add_get("/slow/{symbol}", route({"data": {"amount": "200"}}, delay=0.1))
+    app.router.add_get("/hung/{symbol}", route({"price": "1"}, delay=5.0))
+    app.router.add_get("/broken/{symbol}", route({}, status=500))
+    server = TestServer(app)
+    await server.start_server()
+    yield Exchanges(server)
+    await server.close()
+
+
+def make_handler(sources, aggregation, **kwargs):
+    return APIHandler(sources[0].url, sources=sources, aggregation=aggregation,
+                      retry_policy=RetryPolicy(max_attempts=1), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_fastest_valid_response_wins(exchanges):
+    sources = [exchanges.source("broken", "binance"), exchanges.source("slow", "coinbase"),
+               exchanges.source("fast", "binance")]
+    async with make_handler(sources, FASTEST) as handler:
+        assert await handler.get_price("BTC-USD") == 100.0
+
+    stats = handler.source_stats()
+    assert stats["fast"]["wins"] == 1
+    assert stats["broken"]["errors"] == 1
+    # The slower source was cancelled and its attempt still counts
+    assert stats["slow"]["requests"] == 1 and stats["slow"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_median_of_sources_within_deadline(exchanges):
+    sources = [exchanges.source("fast", "binance"), exchanges.source("medium", "bitstamp"),
+               exchanges.source("slow", "coinbase"), exchanges.source("hung", "binance")]
+    async with make_handler(sources, MEDIAN, source_deadline=0.5) as handler:
+        started = asyncio.get_running_loop().time()
+        assert await handler.get_price("BTC-USD") == 103.0
+        assert asyncio.get_running_loop().time() - started < 1.0
+
+    stats = handler.source_stats()
+    assert stats["hung"]["requests"] == stats["hung"]["errors"] == 1 and stats["hung"]["wins"] == 0
+    assert all(stats[name]["wins"] == 1 for name in ("fast", "medium", "slow"))
+
+
+@pytest.mark.asyncio
+async def test_median_requires_quorum(exchanges):
+    sources = [exchanges.source("fast", "binance"), exchanges.source("broken", "binance")]
+    async with make_handler(sources, MEDIAN, min_sources=2) as handler:
+        assert await handler.get_price("BTC-USD") is None
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from graph_generator import CANDLESTICK, GraphGenerator
+from price_series import PriceSeries
+from render_service import RenderService
+
+START = 1_750_000_000.0
+
+
+def make_series(symbol, samples=600, offset=0.0):
+    timestamps = START + np.arange(samples, dtype=np.float64) * 10
+    prices = 100_000 + offset + np.sin(np.arange(samples) / 25) * 500
+    return PriceSeries.from_arrays(timestamps, prices, symbol)
+
+
+def test_template_is_reused_and_candles_replaced(tmp_path):
+    generator = GraphGenerator(tmp_path / 'graph.png', CANDLESTICK)
+    first = generator.generate_graph(make_series('BTC-USD'))
+    fig, ax, _ = generator._template
+    second = generator.generate_graph(make_series('ETH-USD', offset=5_000), filepath=tmp_path / 'eth.png')
+
+    assert first.exists() and second.exists()
+    assert generator._template[0] is fig
+    # Only the second graph's wicks remain, and the axes follow its price range
+    assert len(ax.collections) == 1
+    assert ax.get_ylim()[0] > 100_000
+
+
+def test_output_format_sets_suffix(tmp_path):
+    generator = GraphGenerator(tmp_path / 'graph.png', output_format='svg')
+    assert generator.filepath_for('ETH-USD', multi_symbol=True) == tmp_path / 'graph_ETH-USD.svg'
+    with pytest.raises(ValueError):
+        GraphGenerator(tmp_path / 'graph.png', output_format='gif')
+
+
+@pytest.mark.asyncio
+async def test_in_process_rendering(tmp_path):
+    async with RenderService(tmp_path / 'graph.png', workers=0) as service:
+        path, = await service.render_all([(make_series('BTC-USD'), 'BTC-USD', None)])
+
+    assert path.read_bytes().startswith(b'\x89PNG')
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_renders_several_symbols(tmp_path):
+    async with RenderService(tmp_path / 'graph.png', output_format='svg', workers=1) as service:
+        jobs = [(make_series(symbol), symbol, service.filepath_for(symbol, multi_symbol=True))
+                for symbol in ('BTC-USD', 'ETH-USD')]
+        paths = await service.render_all(jobs)
+        empty = await service.render(PriceSeries('SOL-USD'))
+
+    assert [path.name for path in paths] == ['graph_BTC-USD.svg', 'graph_ETH-USD.svg']
+    assert all(b'<svg' in path.read_bytes()[:500] for path in paths)
+    assert empty is None
@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from api_handler import APIHandler
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RetryPolicy
+
+QUOTE = {"data": {"base": "BTC", "currency": "USD", "amount": "105565.74"}}
+
+
+class FaultInjectingExchange:
+    """Local stub exchange whose responses are scripted per request: a status code or a delay in seconds."""
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.requests = 0
+
+    async def handle(self, request):
+        self.requests += 1
+        action = self.script.pop(0) if self.script else 200
+        if isinstance(action, float):
+            await asyncio.sleep(action)
+        elif action != 200:
+            return web.Response(status=action)
+        return web.json_response(QUOTE)
+
+
+@pytest_asyncio.fixture
+async def exchange():
+    stub = FaultInjectingExchange()
+    app = web.Application()
+    app.router.add_get("/v2/prices/{symbol}/spot", stub.handle)
+    server = TestServer(app)
+    await server.start_server()
+    stub.url = str(server.make_url("/v2/prices/")) + "{symbol}/spot"
+    yield stub
+    await server.close()
+
+
+def make_handler(url, **kwargs):
+    kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.02))
+    return APIHandler(url, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(exchange):
+    exchange.script = [503, 429, 200]
+    async with make_handler(exchange.url) as handler:
+        assert await handler.get_price("BTC-USD") == 105565.74
+    assert exchange.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(exchange):
+    exchange.script = [404]
+    async with make_handler(exchange.url) as handler:
+        assert await handler.get_price("BTC-USD") is None
+    assert exchange.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_at_the_budget(exchange):
+    exchange.script = [503] * 10
+    policy = RetryPolicy(max_attempts=10, base_delay=0.2, max_delay=0.2)
+    async with make_handler(exchange.url, retry_policy=policy) as handler:
+        policy.backoff = lambda attempt: 0.2
+        assert await handler.get_price("BTC-USD", budget=0.5) is None
+    assert exchange.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_stops_requests(exchange):
+    exchange.script = [500] * 10
+    async with make_handler(exchange.url, retry_policy=RetryPolicy(max_attempts=1), breaker_threshold=2) as handler:
+        for _ in range(4):
+            assert await handler.get_price("BTC-USD") is None
+    assert exchange.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_request_releases_the_circuit(exchange):
+    exchange.script = [500, 500, 5.0]
+    async with make_handler(exchange.url, retry_policy=RetryPolicy(max_attempts=1), breaker_threshold=2,
+                            breaker_reset_timeout=0.05) as handler:
+        for _ in range(2):
+            assert await handler.get_price("BTC-USD") is None
+        await asyncio.sleep(0.05)
+        # Aggregating handlers cancel the fetch of a source that lost the race or missed the deadline
+        trial = asyncio.ensure_future(handler._fetch_from(handler.sources[0], "BTC-USD"))
+        await asyncio.sleep(0.1)
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+
+        breaker = handler.breaker_for(handler.url_for("BTC-USD"))
+        assert breaker.state == HALF_OPEN and breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_unexpected_decode_error_settles_the_trial(exchange):
+    exchange.script = [500, 500]
+    async with make_handler(exchange.url, retry_policy=RetryPolicy(max_attempts=1), breaker_threshold=2,
+                            breaker_reset_timeout=0.05) as handler:
+        for _ in range(2):
+            assert await handler.get_price("BTC-USD") is None
+        await asyncio.sleep(0.05)
+
+        def broken_decode(body):
+            raise TypeError("unexpected payload")
+        handler.sources[0].decode = broken_decode
+        assert await handler._fetch_from(handler.sources[0], "BTC-USD") is None
+
+        breaker = handler.breaker_for(handler.url_for("BTC-USD"))
+        assert breaker.state == OPEN
+        await asyncio.sleep(0.05)
+        assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_hedged_fetch_cancels_its_request(exchange):
+    exchange.script = [1.0]
+    async with make_handler(exchange.url, hedge_percentile=95) as handler:
+        for _ in range(20):
+            handler.sources[0].latency.record(0.5)
+        fetch = asyncio.ensure_future(handler._fetch_from(handler.sources[0], "BTC-USD"))
+        await asyncio.sleep(0.05)
+        fetch.cancel()
+        await asyncio.gather(fetch, return_exceptions=True)
+
+        requests = [task for task in asyncio.all_tasks() if "APIHandler._request" in repr(task.get_coro())]
+        assert requests == [] and handler.hedges_sent == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged(exchange):
+    exchange.script = [1.0]
+    async with make_handler(exchange.url, hedge_percentile=95) as handler:
+        for _ in range(20):
+            handler.sources[0].latency.record(0.01)
+        started = asyncio.get_running_loop().time()
+        assert await handler.get_price("BTC-USD") == 105565.74
+        elapsed = asyncio.get_running_loop().time() - started
+    assert handler.hedges_sent == 1
+    assert exchange.requests == 2
+    assert elapsed < 0.5
+
+
+def test_circuit_breaker_half_open_cycle():
+    now = [0.0]
+    breaker = CircuitBreaker("api", failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    delays = [policy.backoff(attempt) for attempt in (1, 2, 3, 4, 5) for _ in range(50)]
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) > 1
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from api_handler import APIHandler
+from response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_fetch():
+    cache = ResponseCache(ttl=5, clock=FakeClock())
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 100.0
+
+    results = await asyncio.gather(*(cache.get('BTC-USD', fetch) for _ in range(10)))
+
+    assert results == [100.0] * 10 and len(calls) == 1
+    assert cache.stats == {'hit': 0, 'miss': 1, 'coalesced': 9, 'not_modified': 0}
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_per_call_staleness_budget():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=2, clock=clock)
+    prices = iter([100.0, None, 102.0])
+
+    async def fetch():
+        return next(prices)
+
+    assert await cache.get('BTC-USD', fetch) == 100.0
+    clock.now = 1.5
+    assert await cache.get('BTC-USD', fetch) == 100.0
+    assert await cache.get('BTC-USD', fetch, max_staleness=10) == 100.0
+    # A failed fetch is not cached, and the old value stays available to a generous budget
+    assert await cache.get('BTC-USD', fetch, max_staleness=0) is None
+    clock.now = 4
+    assert await cache.get('BTC-USD', fetch, max_staleness=5) == 100.0
+    assert await cache.get('BTC-USD', fetch) == 102.0
+    assert cache.stats['hit'] == 3 and cache.stats['miss'] == 3
+
+
+@pytest_asyncio.fixture
+async def exchange():
+    state = {'requests': 0, 'conditional': 0}
+
+    async def handler(request):
+        state['requests'] += 1
+        await asyncio.sleep(0.02)
+        if request.headers.get('If-None-Match') == '"v1"':
+            state['conditional'] += 1
+            return web.Response(status=304, headers={'ETag': '"v1"'})
+        return web.json_response({"data": {"amount": "105565.74"}}, headers={'ETag': '"v1"'})
+
+    app = web.Application()
+    app.router.add_get("/prices/{symbol}/spot", handler)
+    server = TestServer(app)
+    await server.start_server()
+    yield str(server.make_url("/prices/")) + "{symbol}/spot", state
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_api_handler_coalesces_and_revalidates(exchange):
+    url, state = exchange
+    async with APIHandler(url, cache_ttl=60) as handler:
+        first = await asyncio.gather(*(handler.get_price('BTC-USD') for _ in range(5)))
+        cached = await handler.get_price('BTC-USD')
+        revalidated = await handler.get_price('BTC-USD', max_staleness=0)
+
+    assert first == [105565.74] * 5 and cached == revalidated == 105565.74
+    assert state == {'requests': 2, 'conditional': 1}
+    assert handler.cache_stats() == {'hit': 1, 'miss': 2, 'coalesced': 4, 'not_modified': 1}
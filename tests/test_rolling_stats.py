@@ -0,0 +1,78 @@
+import random
+import statistics
+
+import pytest
+
+from rolling_stats import RUN_WINDOW, RollingWindow, StatsEngine
+
+
+def brute_force(samples, now, span):
+    window = [(t, p) for t, p in samples if span is None or t > now - span]
+    prices = [p for _, p in window]
+    held = [(p, later - t) for (t, p), (later, _) in zip(window, window[1:])]
+    duration = sum(d for _, d in held)
+    return {
+        'twap': sum(p * d for p, d in held) / duration if duration else prices[-1],
+        'count': len(prices),
+        'max': max(prices),
+        'min': min(prices),
+        'mean': statistics.fmean(prices),
+        'stddev': statistics.stdev(prices) if len(prices) > 1 else None,
+        'pct_change': (prices[-1] - prices[0]) / prices[0] * 100,
+    }
+
+
+@pytest.mark.parametrize("span", [None, 5, 60, 300])
+def test_matches_brute_force(span):
+    """Incremental aggregates equal a full rescan after every sample."""
+    rng = random.Random(42)
+    window = RollingWindow(span)
+    samples = []
+    t = 0.0
+    for _ in range(500):
+        t += rng.choice([1, 1, 2, 7])
+        price = 100_000 + rng.gauss(0, 250)
+        samples.append((t, price))
+        window.add(t, price)
+
+        expected = brute_force(samples, t, span)
+        snapshot = window.snapshot()
+        assert snapshot['count'] == expected['count']
+        assert snapshot['max'] == expected['max']
+        assert snapshot['min'] == expected['min']
+        assert snapshot['mean'] == pytest.approx(expected['mean'])
+        assert snapshot['twap'] == pytest.approx(expected['twap'])
+        assert snapshot['pct_change'] == pytest.approx(expected['pct_change'])
+        if expected['stddev'] is None:
+            assert snapshot['stddev'] is None
+        else:
+            assert snapshot['stddev'] == pytest.approx(expected['stddev'], rel=1e-6)
+
+
+def test_twap_weights_by_time_held():
+    window = RollingWindow(60)
+    window.add(0, 100.0)
+    assert window.twap == 100.0
+    window.add(3, 200.0)
+    window.add(4, 200.0)
+    assert window.twap == pytest.approx(125.0)
+    assert window.mean == pytest.approx(500 / 3)
+
+
+def test_empty_window_returns_none():
+    snapshot = RollingWindow(60).snapshot()
+    assert snapshot['count'] == 0
+    assert all(value is None for key, value in snapshot.items() if key != 'count')
+
+
+def test_engine_tracks_symbols_and_windows_independently():
+    engine = StatsEngine({'1m': 60})
+    engine.update("BTC-USD", 0, 100.0)
+    engine.update("BTC-USD", 120, 90.0)
+    engine.update("ETH-USD", 0, 5.0)
+
+    assert engine.symbols == ["BTC-USD", "ETH-USD"]
+    assert engine.window("BTC-USD", RUN_WINDOW).max == 100.0
+    assert engine.window("BTC-USD", '1m').max == 90.0
+    assert engine.snapshot("ETH-USD")[RUN_WINDOW]['count'] == 1
+    assert engine.window("SOL-USD") is None
@@ -0,0 +1,108 @@
+import asyncio
+import heapq
+
+import pytest
+
+from scheduler import TickScheduler
+
+
+class VirtualClock:
+    """Deterministic clock: sleepers wake in virtual-time order once the loop is idle."""
+
+    def __init__(self, start):
+        self.now = start
+        self._waiters = []
+        self._sequence = 0
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (self.now + seconds, self._sequence, future))
+        self._sequence += 1
+        await future
+
+    async def drive(self, coro):
+        """Runs ``coro`` to completion, jumping the clock to the next wake-up whenever tasks are idle."""
+        task = asyncio.ensure_future(coro)
+        while not task.done():
+            for _ in range(20):
+                await asyncio.sleep(0)
+            if self._waiters and not task.done():
+                wake_time, _, future = heapq.heappop(self._waiters)
+                self.now = max(self.now, wake_time)
+                if not future.done():
+                    future.set_result(None)
+        return await task
+
+
+def make_scheduler(clock, interval=60, policy='skip'):
+    return TickScheduler(interval, policy, clock=clock.time, sleep=clock.sleep)
+
+
+@pytest.mark.asyncio
+async def test_ticks_are_aligned_and_drift_free():
+    """Tick times sit on interval boundaries regardless of fetch latency."""
+    clock = VirtualClock(start=1_000_007.5)
+    scheduler = make_scheduler(clock)
+    ticks = []
+
+    async def slow_fetch(tick_time):
+        ticks.append(tick_time.timestamp())
+        await clock.sleep(7)
+
+    await clock.drive(scheduler.run(slow_fetch, duration=300))
+
+    assert ticks == [1_000_020 + 60 * i for i in range(5)]
+    assert scheduler.stats.ticks == 5
+    assert scheduler.stats.max_lag == 0
+
+
+@pytest.mark.asyncio
+async def test_sub_second_interval():
+    """Fractional intervals are supported."""
+    clock = VirtualClock(start=100.0)
+    scheduler = make_scheduler(clock, interval=0.25)
+    ticks = []
+
+    async def fetch(tick_time):
+        ticks.append(tick_time.timestamp())
+
+    await clock.drive(scheduler.run(fetch, duration=1))
+
+    assert ticks == [100.0, 100.25, 100.5, 100.75]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy,expected_started,expected_skipped", [
+    ("skip", 2, 1),
+    ("queue", 3, 0),
+    ("cancel", 3, 0),
+])
+async def test_overlap_policies(policy, expected_started, expected_skipped):
+    """A fetch that overruns one interval is skipped, queued or cancelled."""
+    clock = VirtualClock(start=0.0)
+    scheduler = make_scheduler(clock, interval=10, policy=policy)
+    started = []
+
+    async def fetch(tick_time):
+        started.append(tick_time.timestamp())
+        if len(started) == 1:
+            await clock.sleep(15)
+
+    await clock.drive(scheduler.run(fetch, duration=30))
+
+    assert len(started) == expected_started
+    assert scheduler.stats.skipped == expected_skipped
+    if policy == "cancel":
+        assert scheduler.stats.cancelled == 1
+    if policy == "queue":
+        assert scheduler.stats.max_lag > 0
+
+
+def test_rejects_invalid_configuration():
+    with pytest.raises(ValueError):
+        TickScheduler(0)
+    with pytest.raises(ValueError):
+        TickScheduler(60, overlap_policy='drop')
@@ -0,0 +1,115 @@
+import json
+import time
+
+import pytest
+
+from price_data_storage import DataStorage
+from storage_backends import BINARY_RECORD, PriceRecord, open_backend, read_records
+
+RECORDS = [
+    PriceRecord(1750030144.372858, "BTC-USD", 104982.815),
+    PriceRecord(1750030144.372858, "ETH-USD", 2550.5),
+    PriceRecord(1750030204.840661, "BTC-USD", 104999.935),
+]
+
+
+@pytest.mark.parametrize("storage_format,suffix", [
+    ("ndjson", ".ndjson"),
+    ("binary", ".bin"),
+    ("json", ".json"),
+])
+def test_round_trip(tmp_path, storage_format, suffix):
+    """Every backend reads back exactly what was appended."""
+    with open_backend(tmp_path / "prices.json", storage_format) as backend:
+        for record in RECORDS:
+            backend.append(record)
+
+    assert backend.filepath.suffix == suffix
+    assert list(read_records(backend.filepath)) == RECORDS
+    assert list(read_records(backend.filepath, symbol="ETH-USD")) == [RECORDS[1]]
+
+
+def test_samples_are_on_disk_before_close(tmp_path):
+    """Append-only backends make each sample visible without closing the store."""
+    backend = open_backend(tmp_path / "prices", "ndjson", fsync_every=1000)
+    backend.append(RECORDS[0])
+
+    assert list(read_records(backend.filepath)) == [RECORDS[0]]
+    backend.close()
+
+
+def test_torn_binary_record_is_ignored(tmp_path):
+    """A partially written trailing record (crash mid-write) does not break reading."""
+    with open_backend(tmp_path / "prices", "binary") as backend:
+        for record in RECORDS:
+            backend.append(record)
+    with open(backend.filepath, "ab") as f:
+        f.write(b"\x00" * (BINARY_RECORD.size // 2))
+
+    assert list(read_records(backend.filepath)) == RECORDS
+
+
+def test_legacy_json_array_is_importable(tmp_path, monkeypatch):
+    """Legacy files without a symbol field stream back as BTC-USD records."""
+    monkeypatch.setattr("storage_backends.READ_CHUNK_SIZE", 64)
+    legacy = tmp_path / "bitcoin_price_data.json"
+    legacy.write_text(json.dumps([
+        {"timestamp": "2025-06-15T23:29:04.372858", "price": 104982.815},
+        {"timestamp": "2025-06-15T23:30:04.840661", "price": 104999.935},
+    ], indent=4))
+
+    storage = DataStorage(tmp_path / "run", "ndjson")
+    assert storage.import_file(legacy) == 2
+    assert storage.get_max_price("BTC-USD") == 104999.935
+    assert [r.price for r in read_records(legacy)] == [104982.815, 104999.935]
+
+
+def test_binary_symbols_are_utf8_and_never_truncated(tmp_path):
+    """Non-ASCII symbols round-trip; a symbol longer than the record field is refused."""
+    with open_backend(tmp_path / "prices", "binary") as backend:
+        backend.append(PriceRecord(1750030144.0, "BTC-€", 1.5))
+        with pytest.raises(ValueError, match="longer than the 16 bytes"):
+            backend.append(PriceRecord(1750030145.0, "VERYLONGTOKEN-USDT", 2.5))
+
+    assert list(read_records(backend.filepath)) == [PriceRecord(1750030144.0, "BTC-€", 1.5)]
+
+
+def test_unwritable_symbol_is_kept_in_memory(tmp_path):
+    storage = DataStorage(tmp_path / "run", "binary")
+    storage.store_price(1750030144.0, 1.5, "VERYLONGTOKEN-USDT")
+    storage.save_to_json()
+
+    assert len(storage.get_prices("VERYLONGTOKEN-USDT")) == 1
+    assert list(read_records(storage.filepath)) == []
+
+
+def test_bounded_memory_reads_older_samples_from_disk(tmp_path):
+    storage = DataStorage(tmp_path / "run", "ndjson", max_memory_samples=3)
+    for i in range(10):
+        storage.store_price(1750030000.0 + i, 100.0 + i)
+
+    assert len(storage.get_prices()) < 6
+    assert list(storage.series_between("BTC-USD").prices) == [100.0 + i for i in range(10)]
+    assert list(storage.series_between("BTC-USD", 1750030002.0, 1750030005.0).prices) == [102.0, 103.0, 104.0]
+    # Recent ranges are still served from memory
+    assert list(storage.series_between("BTC-USD", 1750030008.0).prices) == [108.0, 109.0]
+    assert len(storage.series_between("ETH-USD")) == 0
+    storage.save_to_json()
+
+
+@pytest.mark.skipif(not hasattr(time, "tzset"), reason="needs time.tzset")
+def test_timestamps_survive_the_dst_fall_back_hour(tmp_path, monkeypatch):
+    """Both occurrences of a repeated local hour read back in order and unchanged."""
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        # 01:30 EDT and 01:30 EST on 2024-11-03
+        records = [PriceRecord(1730611800.0, "BTC-USD", 1.0), PriceRecord(1730615400.0, "BTC-USD", 2.0)]
+        with open_backend(tmp_path / "prices", "ndjson") as backend:
+            for record in records:
+                backend.append(record)
+
+        assert list(read_records(backend.filepath)) == records
+    finally:
+        monkeypatch.undo()
+        time.tzset()
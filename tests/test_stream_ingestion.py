@@ -0,0 +1,111 @@
+import json
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from aiohttp import WSMsgType, web
+from aiohttp.test_utils import TestServer
+
+from resilience import RetryPolicy
+from storage_backends import read_records, to_iso
+from stream_ingestion import StreamIngestor
+
+RECORDED = list(read_records(Path(__file__).resolve().parent.parent / "bitcoin_price_data.json"))
+
+
+def ticker(symbol, epoch, price):
+    return {"type": "ticker", "product_id": symbol, "price": str(price), "time": to_iso(epoch)}
+
+
+class ReplayExchange:
+    """Local WebSocket feed replaying recorded ticks; optionally drops the first connection mid-stream."""
+
+    def __init__(self, ticks, drop_after=None):
+        self.ticks = ticks
+        self.drop_after = drop_after
+        self.connections = 0
+        self.subscriptions = []
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        msg = await ws.receive()
+        self.subscriptions.append(json.loads(msg.data))
+        await ws.send_json({"type": "subscriptions"})
+        ticks = self.ticks
+        if self.connections == 1 and self.drop_after is not None:
+            ticks = ticks[:self.drop_after]
+        for tick in ticks:
+            await ws.send_json(tick)
+        if self.connections == 1 and self.drop_after is not None:
+            await ws.close()
+            return ws
+        async for msg in ws:
+            if msg.type == WSMsgType.CLOSE:
+                break
+        return ws
+
+
+@pytest_asyncio.fixture
+async def feed():
+    async def start(exchange):
+        app = web.Application()
+        app.router.add_get("/ws", exchange.handle)
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+        return str(server.make_url("/ws")).replace("http", "ws", 1)
+
+    servers = []
+    yield start
+    for server in servers:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_replayed_ticks_reach_the_sink(feed):
+    ticks = [ticker("BTC-USD", r.timestamp, r.price) for r in RECORDED]
+    ticks += [ticker("ETH-USD", r.timestamp, r.price / 40) for r in RECORDED]
+    exchange = ReplayExchange(ticks)
+    stored = []
+    ingestor = StreamIngestor(await feed(exchange), ["BTC-USD", "ETH-USD"],
+                              lambda *tick: stored.append(tick))
+
+    await ingestor.run(0.3)
+
+    assert exchange.subscriptions[0]["product_ids"] == ["BTC-USD", "ETH-USD"]
+    assert ingestor.received == len(ticks)
+    assert ingestor.stored + ingestor.coalesced == len(ticks)
+    assert stored[-1][0] in ("BTC-USD", "ETH-USD")
+    latest = {symbol: price for symbol, _, price in stored}
+    assert latest["BTC-USD"] == RECORDED[-1].price
+
+
+@pytest.mark.asyncio
+async def test_high_rate_bursts_are_coalesced(feed):
+    ticks = [ticker("BTC-USD", 1_750_000_000 + i / 1000, 100_000 + i) for i in range(5_000)]
+    stored = []
+    ingestor = StreamIngestor(await feed(ReplayExchange(ticks)), ["BTC-USD"],
+                              lambda *tick: stored.append(tick), sample_interval=0.05)
+
+    await ingestor.run(0.5)
+
+    assert ingestor.received == 5_000
+    assert 0 < len(stored) < 5_000
+    assert stored[-1][2] == 100_000 + 4_999
+    assert [price for _, _, price in stored] == sorted(price for _, _, price in stored)
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_dropped_connection(feed):
+    ticks = [ticker("BTC-USD", r.timestamp, r.price) for r in RECORDED]
+    exchange = ReplayExchange(ticks, drop_after=5)
+    ingestor = StreamIngestor(await feed(exchange), ["BTC-USD"], lambda *tick: None,
+                              reconnect_policy=RetryPolicy(max_attempts=1, base_delay=0.01, max_delay=0.01))
+
+    await ingestor.run(0.5)
+
+    assert exchange.connections >= 2
+    assert ingestor.reconnects >= 1
+    assert ingestor.received == 5 + len(ticks)
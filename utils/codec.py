@@ -0,0 +1,81 @@
+"""JSON encoding and decoding through the fastest installed library.
+
+``msgspec`` is preferred, then ``orjson``, then the standard library, so the
+application runs without either optional package (``benchmarks/bench_codec.py``
+compares them on recorded payloads). ``loads`` accepts ``bytes``
+or ``str`` and ``dumps`` returns compact UTF-8 ``bytes`` whichever backend is
+active. Every decode error is a ``ValueError``.
+
+``path_decoder`` builds a one-step decoder for payloads whose interesting
+value sits at a fixed key path: with ``msgspec`` it decodes straight into
+typed structs, validating the structure and skipping every other field,
+instead of materialising the whole document as dicts.
+"""
+import json
+from collections import namedtuple
+from typing import Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+Codec = namedtuple('Codec', ['name', 'loads', 'dumps'])
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+CODECS = {'json': Codec('json', json.loads, _stdlib_dumps)}
+if msgspec is not None:
+    CODECS['msgspec'] = Codec('msgspec', msgspec.json.decode, msgspec.json.encode)
+if orjson is not None:
+    CODECS['orjson'] = Codec('orjson', orjson.loads, orjson.dumps)
+
+PREFERENCE = ('msgspec', 'orjson', 'json')
+DEFAULT = CODECS[next(name for name in PREFERENCE if name in CODECS)]
+BACKEND = DEFAULT.name
+
+loads = DEFAULT.loads
+dumps = DEFAULT.dumps
+
+# Raised by typed decoders when the payload does not have the expected shape (always ValueError subclasses)
+SchemaError = (msgspec.ValidationError,) if msgspec is not None else ()
+
+
+def _walk(document, path):
+    for key in path:
+        document = document[key]
+    return document
+
+
+def path_decoder(path, value_type=Union[str, float], codec=None):
+    """Returns ``decode(body)`` extracting the value at ``path`` (e.g. ``('data', 'amount')``).
+
+    With ``msgspec`` installed (and no explicit ``codec``) the body is decoded
+    into nested structs holding only the keys on the path and a wrong shape
+    raises one of ``SchemaError``; otherwise the body is decoded with ``codec``
+    (default: the preferred one) and walked, raising ``KeyError`` for a
+    missing key.
+    """
+    if codec is None and msgspec is not None:
+        schema = value_type
+        for depth, key in reversed(list(enumerate(path))):
+            schema = msgspec.defstruct(f"Path{depth}", [(key, schema)])
+        decoder = msgspec.json.Decoder(schema)
+
+        def decode(body):
+            document = decoder.decode(body)
+            for key in path:
+                document = getattr(document, key)
+            return document
+        return decode
+
+    codec_loads = (codec or DEFAULT).loads
+    return lambda body: _walk(codec_loads(body), path)
@@ -1,45 +1,126 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 from datetime import datetime
 
-def setup_logger(name=None):
-    """Set up a logger for the given name or configure root logger"""
-    # Create temp directory if it doesn't exist
-    os.makedirs("temp/test_runs", exist_ok=True)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_listener = None
+_log_file = None
+_forwarding = False
+
+
+class SamplingFilter(logging.Filter):
+    """Passes every WARNING and above, but only one in ``1 / rate`` lower-level records per logger."""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counts = {}
 
-    # Get the logger by name or root logger
-    logger = logging.getLogger(name) if name else logging.getLogger()
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.every == 1:
+            return True
+        if not self.every:
+            return False
+        count = self._counts.get(record.name, 0)
+        self._counts[record.name] = count + 1
+        return count % self.every == 0
 
-    # Only configure if not already configured
-    if not logger.handlers:
-        logger.setLevel(logging.INFO)
 
-        # Create handlers
-        c_handler = logging.StreamHandler(sys.stdout)
+def configure_logging(level=logging.INFO, log_dir="temp/test_runs", max_bytes=10 * 1024 * 1024,
+                      backup_count=5, sample_rate=1.0, console=True):
+    """Configure process-wide logging once; later calls replace the previous configuration.
+
+    Loggers only enqueue records through a ``QueueHandler`` on the root logger;
+    a ``QueueListener`` thread does the console and file I/O, so logging never
+    blocks the event loop on disk writes. All loggers share one rotating log
+    file per process.
+    """
+    global _listener, _log_file
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+
+    shutdown_logging()
+    if _log_file is None or os.path.dirname(_log_file) != os.path.normpath(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
-        log_file = f"temp/test_runs/test_run_{timestamp}.log"
-        f_handler = logging.FileHandler(log_file, encoding='utf-8')
+        _log_file = os.path.join(os.path.normpath(log_dir), f"test_run_{timestamp}_{os.getpid()}.log")
+
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=DATETIME_FORMAT)
+    handlers = [logging.handlers.RotatingFileHandler(
+        _log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+    )]
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.setLevel(level)
+
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
 
-        # Set log level for handlers
-        c_handler.setLevel(logging.INFO)
-        f_handler.setLevel(logging.INFO)
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
 
-        # Create formatters with correct timestamp format
-        datetime_format = '%Y-%m-%d %H:%M:%S'
-        log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        c_format = logging.Formatter(log_format, datefmt=datetime_format)
-        f_format = logging.Formatter(log_format, datefmt=datetime_format)
 
-        c_handler.setFormatter(c_format)
-        f_handler.setFormatter(f_format)
+def shutdown_logging():
+    """Flush queued records and stop the background listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
-        # Add handlers to logger
-        logger.addHandler(c_handler)
-        logger.addHandler(f_handler)
 
-        # Disable propagation for non-root loggers to prevent duplicate logs
-        if name:
-            logger.propagate = False
+atexit.register(shutdown_logging)
 
-    return logger
\ No newline at end of file
+
+def forward_logging(records, level=logging.INFO):
+    """Send every record of this (worker) process to ``records``, a multiprocessing queue read by the parent.
+
+    Used as part of a pool initializer so worker processes neither open their
+    own log files nor start their own listener thread.
+    """
+    global _listener, _forwarding
+    _listener = None
+    _forwarding = True
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+
+
+class _Redispatch(logging.Handler):
+    """Hands records received from worker processes to this process's own loggers."""
+
+    def handle(self, record):
+        logging.getLogger(record.name).handle(record)
+        return True
+
+
+def listen_for_workers(records):
+    """Starts a thread writing records forwarded by worker processes (see ``forward_logging``)."""
+    listener = logging.handlers.QueueListener(records, _Redispatch())
+    listener.start()
+    return listener
+
+
+def setup_logger(name=None):
+    """Return the logger for the given name (or the root logger), configuring logging on first use."""
+    if _listener is None and not _forwarding:
+        configure_logging()
+    return logging.getLogger(name) if name else logging.getLogger()